@@ -0,0 +1,173 @@
+"""
+메모리 오디오 버퍼 모듈
+"""
+
+import os
+import struct
+import numpy as np
+import soundfile as sf
+from typing import List, Optional
+
+# WAV fmt 청크의 포맷 태그 (PCM, IEEE float, WAVE_FORMAT_EXTENSIBLE)
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+# 스트리밍 기록기가 길이를 모를 때 데이터 청크 크기에 쓰는 값 (0도 같은 의미로 쓰임)
+WAV_SIZE_UNKNOWN = 0xFFFFFFFF
+
+def read_wav_header(path: str) -> Optional[dict]:
+    """WAV 헤더만 읽어 샘플레이트·채널·샘플 수·데이터 위치 반환 (디코딩 없음, WAV가 아니면 None)"""
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            return None
+        
+        fmt = None
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+            if chunk_id == b"fmt ":
+                chunk = f.read(chunk_size)
+                format_tag, channels, sample_rate = struct.unpack("<HHI", chunk[:8])
+                bits_per_sample = struct.unpack("<H", chunk[14:16])[0]
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(chunk) >= 26:
+                    # 서브포맷 GUID의 앞 2바이트가 실제 포맷 태그
+                    format_tag = struct.unpack("<H", chunk[24:26])[0]
+                fmt = {
+                    "format_tag": format_tag,
+                    "channels": channels,
+                    "sample_rate": sample_rate,
+                    "bits_per_sample": bits_per_sample
+                }
+            elif chunk_id == b"data" and fmt is not None:
+                # 스트리밍으로 쓴 WAV는 데이터 크기가 0(미기록)이나 최댓값일 수 있어 둘 다 파일 끝까지로 처리
+                remaining = os.fstat(f.fileno()).st_size - f.tell()
+                data_size = remaining if chunk_size in (0, WAV_SIZE_UNKNOWN) else min(chunk_size, remaining)
+                frame_size = fmt["channels"] * fmt["bits_per_sample"] // 8
+                return {
+                    **fmt,
+                    "data_offset": f.tell(),
+                    "sample_count": data_size // frame_size if frame_size else 0
+                }
+            else:
+                f.seek(chunk_size, 1)
+            if chunk_size % 2:
+                f.seek(1, 1)  # 청크는 짝수 바이트로 정렬
+
+class AudioBuffer:
+    """메모리에 보관하는 모노 오디오 샘플과 메타데이터
+    
+    TTS → 타이밍 계산 → ffmpeg 먹싱까지 같은 샘플 버퍼를 넘겨 디스크 왕복과 반복 디코딩을 없앱니다.
+    sample_rate, sample_count, duration은 샘플에서 바로 계산되므로 길이 확인에 하위 프로세스가 필요 없습니다.
+    path는 파일에서 읽었거나 write()로 한 번 저장했을 때만 채워집니다.
+    """
+    
+    def __init__(self, samples: np.ndarray, sample_rate: int, path: Optional[str] = None):
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)
+        self.samples = np.ascontiguousarray(samples)
+        self.sample_rate = sample_rate
+        self.path = path
+    
+    @property
+    def sample_count(self) -> int:
+        return len(self.samples)
+    
+    @property
+    def duration(self) -> float:
+        """길이 (초)"""
+        return self.sample_count / self.sample_rate
+    
+    @classmethod
+    def from_file(cls, path: str) -> "AudioBuffer":
+        """오디오 파일을 버퍼로 읽기
+        
+        PCM/float WAV는 헤더의 데이터 위치를 메모리 매핑해 바로 샘플로 변환하고,
+        그 밖의 형식만 soundfile로 디코딩합니다.
+        """
+        header = read_wav_header(path)
+        dtype = None
+        if header:
+            bits = header["bits_per_sample"]
+            if header["format_tag"] == WAVE_FORMAT_PCM and bits in (16, 32):
+                dtype = f"<i{bits // 8}"
+            elif header["format_tag"] == WAVE_FORMAT_IEEE_FLOAT and bits == 32:
+                dtype = "<f4"
+        
+        if dtype is None:
+            samples, sample_rate = sf.read(path, dtype="float32")
+            return cls(samples, sample_rate, path)
+        
+        channels = header["channels"]
+        raw = np.memmap(
+            path, dtype=dtype, mode="r", offset=header["data_offset"],
+            shape=(header["sample_count"] * channels,)
+        )
+        samples = raw.astype(np.float32)
+        if dtype != "<f4":
+            samples /= float(2 ** (header["bits_per_sample"] - 1))
+        del raw
+        if channels > 1:
+            samples = samples.reshape(-1, channels)
+        return cls(samples, header["sample_rate"], path)
+    
+    @classmethod
+    def concatenate(cls, buffers: List["AudioBuffer"], pause_seconds: float = 0.0) -> "AudioBuffer":
+        """버퍼들을 pause_seconds 휴지를 두고 이어 붙임 (첫 버퍼의 샘플레이트 기준)"""
+        sample_rate = buffers[0].sample_rate
+        pause = np.zeros(int(pause_seconds * sample_rate), dtype=np.float32)
+        parts = []
+        for buffer in buffers:
+            if parts and len(pause):
+                parts.append(pause)
+            parts.append(buffer.resample(sample_rate).samples)
+        return cls(np.concatenate(parts), sample_rate)
+    
+    @classmethod
+    def crossfade(cls, buffers: List["AudioBuffer"], seconds: float) -> "AudioBuffer":
+        """버퍼들을 경계에서 seconds만큼 겹쳐 선형 크로스페이드로 이어 붙임"""
+        sample_rate = buffers[0].sample_rate
+        combined = buffers[0].samples
+        for buffer in buffers[1:]:
+            samples = buffer.resample(sample_rate).samples
+            overlap = min(int(seconds * sample_rate), len(combined), len(samples))
+            if overlap <= 0:
+                combined = np.concatenate([combined, samples])
+                continue
+            fade_in = np.linspace(0.0, 1.0, overlap, dtype=np.float32)
+            mixed = combined[-overlap:] * (1.0 - fade_in) + samples[:overlap] * fade_in
+            combined = np.concatenate([combined[:-overlap], mixed, samples[overlap:]])
+        return cls(combined, sample_rate)
+
+    def resample(self, sample_rate: int) -> "AudioBuffer":
+        """샘플레이트가 다를 때만 리샘플링한 새 버퍼 반환"""
+        if sample_rate == self.sample_rate:
+            return self
+        import librosa
+        return AudioBuffer(
+            librosa.resample(self.samples, orig_sr=self.sample_rate, target_sr=sample_rate), sample_rate
+        )
+    
+    def fit(self, seconds: float) -> np.ndarray:
+        """seconds 길이에 맞춰 무음으로 패딩하거나 자른 샘플"""
+        length = int(round(seconds * self.sample_rate))
+        if len(self.samples) >= length:
+            return self.samples[:length]
+        return np.concatenate([self.samples, np.zeros(length - len(self.samples), dtype=np.float32)])
+    
+    def write(self, path: str) -> str:
+        """16비트 PCM WAV로 한 번 저장하고 경로 기록"""
+        sf.write(path, self.samples, self.sample_rate, subtype="PCM_16")
+        self.path = path
+        return path
+    
+    @staticmethod
+    def to_pcm16(samples: np.ndarray) -> bytes:
+        """ffmpeg 원시 입력(-f s16le)용 16비트 리틀엔디언 PCM 바이트"""
+        return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    
+    def pcm16(self) -> bytes:
+        return self.to_pcm16(self.samples)
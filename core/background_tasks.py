@@ -0,0 +1,38 @@
+"""
+백그라운드 태스크 관리 모듈
+"""
+
+import asyncio
+from typing import Coroutine
+
+class BackgroundTaskSet:
+    """결과를 기다리지 않는(fire-and-forget) asyncio 태스크를 보관하는 집합
+    
+    이벤트 루프는 태스크를 약한 참조로만 들고 있으므로, 참조를 남기지 않은 태스크는 실행 도중 가비지 컬렉션될 수 있고
+    예외도 "Task exception was never retrieved"로만 남습니다.
+    끝날 때까지 집합에 보관하고, 완료 시 제거하면서 예외를 로그로 남깁니다.
+    """
+    
+    def __init__(self):
+        self._tasks = set()
+        self.failed = 0
+    
+    def spawn(self, coro: Coroutine, label: str) -> asyncio.Task:
+        """코루틴을 태스크로 실행하고 완료될 때까지 참조 보관"""
+        task = asyncio.create_task(coro, name=label)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(self._report)
+        return task
+    
+    def _report(self, task: asyncio.Task):
+        """완료된 태스크의 예외를 로그로 남김"""
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.failed += 1
+            print(f"❌ {task.get_name()} 실패: {error!r}")
+    
+    def __len__(self) -> int:
+        return len(self._tasks)
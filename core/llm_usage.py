@@ -0,0 +1,130 @@
+"""
+LLM 사용량 집계 모듈
+"""
+
+import threading
+from typing import Optional
+
+class LLMUsageTracker:
+    """작업(task_id)별 LLM 호출 토큰·요청 크기·지연 시간·재시도 집계 클래스
+    
+    발표 1건의 스크립트 단계 비용과 소요 시간을 파악하고 용량 계획에 사용합니다.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tasks = {}
+    
+    def _new_entry(self) -> dict:
+        return {
+            "calls": 0,
+            "failed_calls": 0,
+            "retries": 0,
+            "prompt_tokens": 0,
+            "cached_prompt_tokens": 0,
+            "completion_tokens": 0,
+            "request_bytes": 0,
+            "latency_seconds_total": 0.0,
+            "latency_seconds_max": 0.0,
+            "streamed_calls": 0,
+            "first_token_seconds_total": 0.0,
+            "estimated_calls": 0,
+            "by_route": {}
+        }
+    
+    def record_call(
+        self,
+        task_id: Optional[str],
+        route: str,
+        request_bytes: int,
+        latency: float,
+        retries: int,
+        prompt_tokens: int = 0,
+        cached_prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        first_token_seconds: Optional[float] = None,
+        estimated: bool = False
+    ):
+        """성공한 호출 1건 기록 (task_id가 없으면 무시, estimated는 토큰 수가 응답 usage가 아닌 추정치인 호출)"""
+        if not task_id:
+            return
+        
+        with self._lock:
+            entry = self.tasks.setdefault(task_id, self._new_entry())
+            entry["calls"] += 1
+            entry["retries"] += retries
+            entry["prompt_tokens"] += prompt_tokens
+            entry["cached_prompt_tokens"] += cached_prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            entry["request_bytes"] += request_bytes
+            entry["latency_seconds_total"] += latency
+            entry["latency_seconds_max"] = max(entry["latency_seconds_max"], latency)
+            if first_token_seconds is not None:
+                entry["streamed_calls"] += 1
+                entry["first_token_seconds_total"] += first_token_seconds
+            if estimated:
+                entry["estimated_calls"] += 1
+            
+            route_entry = entry["by_route"].setdefault(route, {
+                "calls": 0, "prompt_tokens": 0, "cached_prompt_tokens": 0,
+                "completion_tokens": 0, "latency_seconds_total": 0.0
+            })
+            route_entry["calls"] += 1
+            route_entry["prompt_tokens"] += prompt_tokens
+            route_entry["cached_prompt_tokens"] += cached_prompt_tokens
+            route_entry["completion_tokens"] += completion_tokens
+            route_entry["latency_seconds_total"] += latency
+    
+    def record_failure(self, task_id: Optional[str], request_bytes: int, retries: int):
+        """재시도 후에도 실패한 호출 1건 기록"""
+        if not task_id:
+            return
+        
+        with self._lock:
+            entry = self.tasks.setdefault(task_id, self._new_entry())
+            entry["failed_calls"] += 1
+            entry["retries"] += retries
+            entry["request_bytes"] += request_bytes
+    
+    def get_summary(self, task_id: str) -> Optional[dict]:
+        """작업의 LLM 사용량 요약 (기록이 없으면 None)"""
+        with self._lock:
+            entry = self.tasks.get(task_id)
+            if entry is None:
+                return None
+            return self._summarize(entry)
+    
+    def get_all_summaries(self) -> dict:
+        """전체 작업의 사용량 요약 (task_id → 요약)"""
+        with self._lock:
+            return {task_id: self._summarize(entry) for task_id, entry in self.tasks.items()}
+    
+    def remove(self, task_id: str):
+        """삭제된 작업의 기록 제거"""
+        with self._lock:
+            self.tasks.pop(task_id, None)
+    
+    def _summarize(self, entry: dict) -> dict:
+        calls = entry["calls"]
+        return {
+            "calls": calls,
+            "failed_calls": entry["failed_calls"],
+            "retries": entry["retries"],
+            "prompt_tokens": entry["prompt_tokens"],
+            "cached_prompt_tokens": entry["cached_prompt_tokens"],
+            "completion_tokens": entry["completion_tokens"],
+            "total_tokens": entry["prompt_tokens"] + entry["completion_tokens"],
+            "request_bytes": entry["request_bytes"],
+            "latency_seconds_total": round(entry["latency_seconds_total"], 3),
+            "latency_seconds_avg": round(entry["latency_seconds_total"] / calls, 3) if calls else 0.0,
+            "latency_seconds_max": round(entry["latency_seconds_max"], 3),
+            "first_token_seconds_avg": (
+                round(entry["first_token_seconds_total"] / entry["streamed_calls"], 3)
+                if entry["streamed_calls"] else None
+            ),
+            "estimated_calls": entry["estimated_calls"],
+            "by_route": {
+                route: {**stats, "latency_seconds_total": round(stats["latency_seconds_total"], 3)}
+                for route, stats in entry["by_route"].items()
+            }
+        }
@@ -3,45 +3,481 @@ PDF 처리 모듈
 """
 
 import os
+import math
+import json
+import asyncio
+import hashlib
 import fitz  # PyMuPDF
-from typing import List
+from PIL import Image
+from collections import Counter
+from typing import Iterator, List, Optional, Tuple
+from core.render_cache import RenderCache
 
 class PDFProcessor:
     """PDF 처리 클래스"""
     
     def __init__(self):
         self.output_dir = "temp"
+        # 출력 영상 해상도에 맞춰 바로 렌더링 (슬라이드 이미지는 페이지 전체, 영상 프레임은 화면을 채우도록 잘라냄)
+        self.frame_width = int(os.getenv("VIDEO_WIDTH", "1920"))
+        self.frame_height = int(os.getenv("VIDEO_HEIGHT", "1080"))
+        # 중간 이미지 형식: jpg (빠른 인코딩, Vision API 호환) / png / ppm (무압축)
+        self.image_format = os.getenv("SLIDE_IMAGE_FORMAT", "jpg").lower()
+        self.jpeg_quality = int(os.getenv("SLIDE_JPEG_QUALITY", "90"))
+        # 파이프 모드면 추출 단계의 래스터화 결과로 원시 영상 프레임도 함께 준비 (페이지당 한 번만 래스터화)
+        self.prepare_raw_frames = os.getenv("VIDEO_RENDER_MODE", "pipe") == "pipe"
+        # 작업 간 공유되는 페이지 렌더링 캐시
+        self.render_cache = RenderCache()
+        # 무압축 원시 프레임(1080p 기준 페이지당 약 6MB)은 슬라이드 이미지를 밀어내지 않도록 별도의 작은 예산으로 캐시
+        self.frame_cache = RenderCache(
+            os.getenv("RENDER_FRAME_CACHE_DIR", os.path.join("cache", "frames")),
+            int(os.getenv("RENDER_FRAME_CACHE_MAX_MB", "512"))
+        )
+        # 업로드 사전 검사 한도
+        self.max_pages = int(os.getenv("PDF_MAX_PAGES", "200"))
+        self.max_file_mb = float(os.getenv("PDF_MAX_FILE_MB", "100"))
+        self.max_page_side_pt = float(os.getenv("PDF_MAX_PAGE_SIDE_PT", "5000"))
+        # 비용 추정 계수
+        self.estimate_tts_seconds_per_slide = float(os.getenv("ESTIMATE_TTS_SECONDS_PER_SLIDE", "12"))
+        self.estimate_tts_rtf = float(os.getenv("ESTIMATE_TTS_RTF", "1.5"))
+        self.estimate_llm_seconds_per_call = float(os.getenv("ESTIMATE_LLM_SECONDS_PER_CALL", "3"))
+        self.estimate_render_seconds_per_page = float(os.getenv("ESTIMATE_RENDER_SECONDS_PER_PAGE", "0.15"))
+        # 스크립트 요청 하나에 묶이는 슬라이드 수 (ScriptGenerator와 같은 설정, 스트리밍 모드는 슬라이드별 요청)
+        streaming = os.getenv("SCRIPT_STREAMING", "false").lower() == "true"
+        self.estimate_script_batch_size = 1 if streaming else max(1, int(os.getenv("SCRIPT_BATCH_SIZE", "1")))
+        # 지각 해시(dHash) 크기와 근접 중복 후보 임계값 (해밍 거리)
+        # 흰 배경 텍스트 슬라이드는 내용이 달라도 16x16 dHash 거리가 3~8 정도로 가까워 후보는 좁게 잡고 텍스트 레이어로 한 번 더 확인
+        self.phash_size = int(os.getenv("SLIDE_PHASH_SIZE", "16"))
+        self.near_duplicate_threshold = int(os.getenv("SLIDE_NEAR_DUPLICATE_THRESHOLD", "2"))
     
     async def extract_pages_from_pdf(self, pdf_path: str, task_id: str) -> List[str]:
-        """PDF의 각 페이지를 이미지로 저장하는 함수"""
+        """PDF의 각 페이지를 이미지로 저장하는 함수 (래스터화는 이벤트 루프를 막지 않도록 스레드에서 실행)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.extract_pages, pdf_path, task_id)
+    
+    def extract_pages(self, pdf_path: str, task_id: str) -> List[str]:
+        """페이지별 슬라이드 이미지·레이아웃 저장 (파이프 모드면 원시 프레임도 같은 래스터화 결과로 저장)"""
         try:
             task_output_dir = os.path.join(self.output_dir, task_id, "slides")
             os.makedirs(task_output_dir, exist_ok=True)
             
             doc = fitz.open(pdf_path)
             slide_images = []
+            pdf_hash = self.render_cache.hash_file(pdf_path) if self.render_cache.enabled or self.frame_cache.enabled else ""
+            frame_settings = self.get_render_settings("rgb24")
+            cache_hits = 0
             
             for page_num in range(len(doc)):
                 page = doc.load_page(page_num)
+                image_path = os.path.join(task_output_dir, f"slide_{page_num + 1}.{self.image_format}")
+                cache_key = self.render_cache.make_key(pdf_hash, page_num, self.get_render_settings())
+                frame_path = self.get_frame_path(image_path)
+                frame_key = self.frame_cache.make_key(pdf_hash, page_num, frame_settings)
                 
-                # 페이지를 이미지로 변환 (고해상도)
-                mat = fitz.Matrix(2.0, 2.0)  # 2배 확대
-                pix = page.get_pixmap(matrix=mat)
-                
-                # 이미지 저장
-                image_path = os.path.join(task_output_dir, f"slide_{page_num + 1}.png")
-                pix.save(image_path)
+                image_cached = self.render_cache.copy_to(cache_key, self.image_format, image_path)
+                frame_cached = not self.prepare_raw_frames or self.frame_cache.copy_to(frame_key, "rgb", frame_path)
+                if image_cached and frame_cached:
+                    cache_hits += 1
+                else:
+                    # 한 번의 래스터화로 슬라이드 이미지와 원시 프레임을 함께 만듦
+                    pix, frame = self.render_slide(page, with_frame=not frame_cached)
+                    if not image_cached:
+                        self.save_pixmap(pix, image_path)
+                        self.render_cache.put_file(cache_key, self.image_format, image_path)
+                    if frame is not None:
+                        with open(frame_path, "wb") as f:
+                            f.write(frame)
+                        self.frame_cache.put_file(frame_key, "rgb", frame_path)
                 slide_images.append(image_path)
                 
+                # 텍스트 레이어와 레이아웃 블록을 이미지 옆에 저장 (텍스트 전용 스크립트 생성용)
+                layout = self.extract_page_layout(page)
+                with open(self.get_layout_path(image_path), "w", encoding="utf-8") as f:
+                    json.dump(layout, f, ensure_ascii=False)
+                
                 print(f"✅ 슬라이드 {page_num + 1} 이미지 저장: {image_path}")
             
             doc.close()
+            if cache_hits:
+                print(f"♻️ 렌더링 캐시 적중: {cache_hits}/{len(slide_images)}개 슬라이드")
             return slide_images
         
         except Exception as e:
             print(f"❌ PDF 페이지 추출 실패: {e}")
             return []
     
+    def get_render_settings(self, output_format: Optional[str] = None) -> dict:
+        """렌더링 결과에 영향을 주는 설정 (캐시 키에 포함)"""
+        output_format = output_format or self.image_format
+        settings = {
+            "width": self.frame_width,
+            "height": self.frame_height,
+            "format": output_format,
+            # 원시 프레임은 영상을 채우도록 잘라내고(cover), 슬라이드 이미지는 페이지 전체를 담음(contain)
+            "fit": "cover" if output_format == "rgb24" else "contain",
+            "renderer": fitz.VersionBind
+        }
+        if output_format in ("jpg", "jpeg"):
+            settings["jpeg_quality"] = self.jpeg_quality
+        return settings
+    
+    def get_render_geometry(self, page, cover: bool = False) -> Tuple[float, "fitz.Rect"]:
+        """영상 프레임 크기에 맞춘 배율과 래스터화할 페이지 영역 계산
+        
+        기본(contain)은 페이지 전체가 프레임 안에 들어가는 배율로, 비전 LLM과 중복 슬라이드 판정이
+        페이지 내용을 빠짐없이 보도록 합니다. cover=True는 ffmpeg의
+        scale=...:force_original_aspect_ratio=increase,crop 과 같은 결과를 래스터화 단계에서 바로 만듭니다
+        (영상 프레임 전용, 페이지 비율이 다르면 위아래나 좌우가 잘림).
+        """
+        rect = page.rect
+        if not cover:
+            return min(self.frame_width / rect.width, self.frame_height / rect.height), rect
+        zoom = max(self.frame_width / rect.width, self.frame_height / rect.height)
+        clip_width = self.frame_width / zoom
+        clip_height = self.frame_height / zoom
+        x0 = rect.x0 + (rect.width - clip_width) / 2
+        y0 = rect.y0 + (rect.height - clip_height) / 2
+        return zoom, fitz.Rect(x0, y0, x0 + clip_width, y0 + clip_height)
+    
+    def render_page(self, page, cover: bool = False) -> "fitz.Pixmap":
+        """페이지를 출력 해상도의 RGB 픽스맵으로 래스터화 (cover=True면 프레임을 채우도록 잘라냄)"""
+        zoom, clip = self.get_render_geometry(page, cover)
+        return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip, alpha=False)
+    
+    def to_raw_frame(self, pix: "fitz.Pixmap") -> bytes:
+        """프레임보다 크거나 같은 픽스맵의 가운데를 영상 해상도의 rgb24 원시 프레임으로 잘라냄"""
+        if pix.width == self.frame_width and pix.height == self.frame_height:
+            return pix.samples
+        
+        image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        left = max((image.width - self.frame_width) // 2, 0)
+        top = max((image.height - self.frame_height) // 2, 0)
+        image = image.crop((
+            left, top, left + min(self.frame_width, image.width), top + min(self.frame_height, image.height)
+        ))
+        if image.size != (self.frame_width, self.frame_height):
+            # 배율 반올림으로 1px 정도 차이가 나는 경우만 보정
+            image = image.resize((self.frame_width, self.frame_height), Image.BILINEAR)
+        return image.tobytes()
+    
+    def render_raw_frame(self, page) -> bytes:
+        """페이지를 영상 해상도와 정확히 같은 rgb24 원시 프레임으로 래스터화"""
+        return self.to_raw_frame(self.render_page(page, cover=True))
+    
+    def render_slide(self, page, with_frame: bool) -> Tuple["fitz.Pixmap", Optional[bytes]]:
+        """슬라이드 이미지용 픽스맵(contain)과 원시 영상 프레임(cover)을 한 번의 래스터화로 생성
+        
+        페이지 전체를 cover 배율로 래스터화한 뒤 프레임은 가운데를 잘라내고,
+        페이지 비율이 프레임과 다르면 슬라이드 이미지는 같은 픽스맵을 contain 크기로 축소합니다.
+        """
+        if not with_frame:
+            return self.render_page(page), None
+        
+        contain_zoom, rect = self.get_render_geometry(page)
+        cover_zoom, _ = self.get_render_geometry(page, cover=True)
+        pix = page.get_pixmap(matrix=fitz.Matrix(cover_zoom, cover_zoom), alpha=False)
+        frame = self.to_raw_frame(pix)
+        if cover_zoom - contain_zoom > 1e-6:
+            pix = fitz.Pixmap(pix, round(rect.width * contain_zoom), round(rect.height * contain_zoom), None)
+        return pix, frame
+    
+    def get_frame_path(self, image_path: str) -> str:
+        """슬라이드 이미지에 대응하는 원시 프레임 경로"""
+        return os.path.splitext(image_path)[0] + ".rgb"
+    
+    def iter_raw_frames(self, pdf_path: str, slide_images: List[str]) -> Iterator[bytes]:
+        """PDF 페이지 순서대로 원시 RGB 프레임 생성 (PNG 저장 없이 ffmpeg 파이프 입력용)
+        
+        추출 단계에서 저장한 프레임을 읽고, 없을 때만 캐시 조회 후 래스터화합니다.
+        동기 제너레이터이므로 호출 측에서 스레드로 한 프레임씩 꺼내 씁니다.
+        """
+        doc = None
+        pdf_hash = None
+        settings = self.get_render_settings("rgb24")
+        try:
+            for page_num, image_path in enumerate(slide_images):
+                try:
+                    with open(self.get_frame_path(image_path), "rb") as f:
+                        yield f.read()
+                    continue
+                except FileNotFoundError:
+                    pass
+                
+                if doc is None:
+                    doc = fitz.open(pdf_path)
+                    pdf_hash = self.frame_cache.hash_file(pdf_path) if self.frame_cache.enabled else ""
+                cache_key = self.frame_cache.make_key(pdf_hash, page_num, settings)
+                frame = self.frame_cache.get_bytes(cache_key, "rgb")
+                if frame is None:
+                    frame = self.render_raw_frame(doc.load_page(page_num))
+                    self.frame_cache.put_bytes(cache_key, "rgb", frame)
+                yield frame
+        finally:
+            if doc is not None:
+                doc.close()
+    
+    def get_cache_stats(self) -> dict:
+        """슬라이드 이미지·원시 프레임 렌더링 캐시 사용량"""
+        return {
+            "images": self.render_cache.get_stats(),
+            "frames": self.frame_cache.get_stats()
+        }
+    
+    def save_pixmap(self, pix: "fitz.Pixmap", image_path: str):
+        """설정된 중간 형식으로 픽스맵 저장"""
+        if self.image_format in ("jpg", "jpeg"):
+            pix.save(image_path, jpg_quality=self.jpeg_quality)
+        else:
+            pix.save(image_path)
+    
+    def extract_page_layout(self, page) -> dict:
+        """페이지의 텍스트 레이어, 레이아웃 블록, 이미지/도형 면적 비율 추출"""
+        page_area = max(page.rect.width * page.rect.height, 1.0)
+        blocks = []
+        image_area = 0.0
+        
+        for block in page.get_text("dict")["blocks"]:
+            x0, y0, x1, y1 = block["bbox"]
+            if block.get("type") == 1:
+                # 이미지 블록
+                image_area += max(x1 - x0, 0) * max(y1 - y0, 0)
+                blocks.append({"type": "image", "bbox": [round(v, 1) for v in block["bbox"]]})
+                continue
+            
+            lines = []
+            max_font_size = 0.0
+            for line in block.get("lines", []):
+                spans = line.get("spans", [])
+                line_text = "".join(span["text"] for span in spans).strip()
+                if line_text:
+                    lines.append(line_text)
+                for span in spans:
+                    max_font_size = max(max_font_size, span.get("size", 0.0))
+            
+            if lines:
+                blocks.append({
+                    "type": "text",
+                    "bbox": [round(v, 1) for v in block["bbox"]],
+                    "text": "\n".join(lines),
+                    "font_size": round(max_font_size, 1)
+                })
+        
+        # 벡터 도형 (차트/다이어그램) 면적도 시각 요소로 포함 (페이지 전체 배경은 제외)
+        for drawing in page.get_drawings():
+            rect = drawing.get("rect")
+            if rect is None:
+                continue
+            area = abs(rect.width * rect.height)
+            if area < page_area * 0.9:
+                image_area += area
+        
+        # 읽기 순서 (위 → 아래, 왼쪽 → 오른쪽)
+        blocks.sort(key=lambda b: (round(b["bbox"][1]), b["bbox"][0]))
+        text = "\n".join(b["text"] for b in blocks if b["type"] == "text")
+        
+        return {
+            "text": text,
+            "text_length": len(text.replace("\n", "").replace(" ", "")),
+            "image_ratio": round(min(image_area / page_area, 1.0), 3),
+            "blocks": blocks
+        }
+    
+    def get_layout_path(self, image_path: str) -> str:
+        """슬라이드 이미지에 대응하는 레이아웃 JSON 경로"""
+        return os.path.splitext(image_path)[0] + ".json"
+    
+    def load_slide_layouts(self, slide_images: List[str]) -> List[Optional[dict]]:
+        """슬라이드 이미지 옆에 저장된 레이아웃 정보 로드 (없으면 None)"""
+        layouts = []
+        for image_path in slide_images:
+            try:
+                with open(self.get_layout_path(image_path), "r", encoding="utf-8") as f:
+                    layouts.append(json.load(f))
+            except Exception as e:
+                print(f"⚠️ 레이아웃 정보 로드 실패: {image_path} ({e})")
+                layouts.append(None)
+        return layouts
+    
+    def compute_slide_hashes(self, image_path: str) -> dict:
+        """슬라이드 이미지의 정확 해시(픽셀 SHA-1)와 지각 해시(dHash) 계산"""
+        with Image.open(image_path) as image:
+            image = image.convert("RGB")
+            exact_hash = hashlib.sha1(image.tobytes()).hexdigest()
+            
+            # dHash: (N+1)xN 흑백 축소 후 가로 방향 밝기 차이를 비트로 기록
+            size = self.phash_size
+            gray = image.convert("L").resize((size + 1, size), Image.BILINEAR)
+            pixels = list(gray.getdata())
+        
+        dhash = 0
+        for row in range(size):
+            offset = row * (size + 1)
+            for col in range(size):
+                dhash = (dhash << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+        
+        return {"exact_hash": exact_hash, "dhash": dhash}
+    
+    @staticmethod
+    def is_text_continuation(earlier_layout: Optional[dict], layout: Optional[dict]) -> bool:
+        """이전 슬라이드의 텍스트 줄이 이 슬라이드에 모두 남아 있는지 (점진적 공개처럼 내용만 추가된 경우)
+        
+        연속 스크립트는 이미지를 보내지 않으므로, 텍스트 레이어가 없는 슬라이드는 확인할 수 없어 False를 반환합니다.
+        """
+        earlier_text = (earlier_layout or {}).get("text", "")
+        text = (layout or {}).get("text", "")
+        if not earlier_text.strip() or not text.strip():
+            return False
+        if text.startswith(earlier_text):
+            return True
+        earlier_lines = Counter(line.strip() for line in earlier_text.splitlines() if line.strip())
+        lines = Counter(line.strip() for line in text.splitlines() if line.strip())
+        return not earlier_lines - lines
+    
+    def find_duplicate_slides(self, slide_images: List[str], slide_layouts: Optional[List[Optional[dict]]] = None) -> List[dict]:
+        """동일/근접 중복 슬라이드를 그룹화
+        
+        각 슬라이드마다 다음 정보를 반환합니다:
+        - duplicate_of: 픽셀이 완전히 같은 이전 슬라이드 인덱스 (스크립트·음성·세그먼트 재사용)
+        - near_duplicate_of: 지각 해시가 임계값 이내이고 텍스트 레이어상 내용만 추가된 이전 슬라이드 인덱스 (연속 프롬프트 사용)
+        
+        이미지를 디코딩하므로 이벤트 루프에서는 run_in_executor로 호출합니다.
+        """
+        if slide_layouts is None:
+            slide_layouts = self.load_slide_layouts(slide_images)
+        groups = []
+        exact_index = {}
+        representatives = []  # (슬라이드 인덱스, dHash) - 중복이 아닌 슬라이드만
+        
+        for i, image_path in enumerate(slide_images):
+            duplicate_of: Optional[int] = None
+            near_duplicate_of: Optional[int] = None
+            
+            try:
+                hashes = self.compute_slide_hashes(image_path)
+            except Exception as e:
+                print(f"⚠️ 슬라이드 {i + 1} 해시 계산 실패: {e}")
+                groups.append({"duplicate_of": None, "near_duplicate_of": None, "distance": None})
+                continue
+            
+            distance = None
+            if hashes["exact_hash"] in exact_index:
+                duplicate_of = exact_index[hashes["exact_hash"]]
+                distance = 0
+            else:
+                exact_index[hashes["exact_hash"]] = i
+                
+                # 임계값 이내의 이전 대표 슬라이드를 가까운 순으로 (동률이면 최근 슬라이드 우선) 텍스트 레이어로 확인
+                candidates = []
+                for index, dhash in reversed(representatives):
+                    hamming = bin(dhash ^ hashes["dhash"]).count("1")
+                    if hamming <= self.near_duplicate_threshold:
+                        candidates.append((index, hamming))
+                for index, hamming in sorted(candidates, key=lambda candidate: (candidate[1], -candidate[0])):
+                    if self.is_text_continuation(slide_layouts[index], slide_layouts[i]):
+                        near_duplicate_of, distance = index, hamming
+                        break
+                
+                representatives.append((i, hashes["dhash"]))
+            
+            if duplicate_of is not None:
+                print(f"♻️ 슬라이드 {i + 1}: 슬라이드 {duplicate_of + 1}와 동일 (작업 재사용)")
+            elif near_duplicate_of is not None:
+                print(f"🔁 슬라이드 {i + 1}: 슬라이드 {near_duplicate_of + 1}와 유사 (해밍 거리 {distance})")
+            
+            groups.append({
+                "duplicate_of": duplicate_of,
+                "near_duplicate_of": near_duplicate_of,
+                "distance": distance
+            })
+        
+        return groups
+    
+    def preflight_pdf(self, pdf_bytes: bytes) -> dict:
+        """무거운 작업 전에 PDF를 빠르게 검사하고 처리 비용 추정
+        
+        페이지를 래스터화하지 않고 메타데이터(페이지 수, 암호화, 페이지 크기,
+        텍스트 레이어 유무)만 읽습니다. errors가 비어 있지 않으면 거부 대상이며,
+        status_code는 거부 시 사용할 HTTP 상태 코드입니다.
+        """
+        result = {"ok": False, "errors": [], "status_code": 400, "info": {}, "estimate": {}}
+        file_mb = len(pdf_bytes) / 1024 / 1024
+        
+        if file_mb > self.max_file_mb:
+            result["errors"].append(f"PDF 파일이 너무 큽니다 ({file_mb:.1f}MB > {self.max_file_mb:.0f}MB)")
+            result["status_code"] = 413
+            return result
+        
+        try:
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        except Exception as e:
+            result["errors"].append(f"PDF 파일을 열 수 없습니다 (손상된 파일): {e}")
+            return result
+        
+        try:
+            # 사용자 암호가 필요한 경우만 거부 (소유자 암호만 있는 PDF는 렌더링 가능)
+            if doc.needs_pass:
+                result["errors"].append("암호로 보호된 PDF는 지원되지 않습니다.")
+                return result
+            
+            page_count = len(doc)
+            info = {"page_count": page_count, "file_mb": round(file_mb, 2)}
+            result["info"] = info
+            
+            if page_count == 0:
+                result["errors"].append("페이지가 없는 PDF입니다.")
+                return result
+            if page_count > self.max_pages:
+                result["errors"].append(f"페이지 수가 너무 많습니다 ({page_count} > {self.max_pages})")
+                result["status_code"] = 413
+                return result
+            
+            page_sizes = {}
+            text_pages = 0
+            for page_num in range(page_count):
+                page = doc.load_page(page_num)
+                width, height = round(page.rect.width), round(page.rect.height)
+                page_sizes[f"{width}x{height}"] = page_sizes.get(f"{width}x{height}", 0) + 1
+                
+                if max(width, height) > self.max_page_side_pt:
+                    result["errors"].append(
+                        f"{page_num + 1}페이지 크기가 너무 큽니다 ({width}x{height}pt > {self.max_page_side_pt:.0f}pt)"
+                    )
+                    result["status_code"] = 413
+                    return result
+                
+                # 텍스트 레이어 유무만 확인 (레이아웃 분석 없이)
+                if page.get_text("text").strip():
+                    text_pages += 1
+            
+            info["page_sizes"] = page_sizes
+            info["text_layer_pages"] = text_pages
+            info["has_text_layer"] = text_pages > 0
+            
+            result["estimate"] = self.estimate_job_cost(info)
+            result["ok"] = True
+            return result
+        finally:
+            doc.close()
+    
+    def estimate_job_cost(self, info: dict) -> dict:
+        """사전 검사 정보로 처리 비용 추정 (LLM 호출 수, TTS 길이, 처리 시간)
+        
+        중복 슬라이드는 렌더링 전에는 알 수 없으므로 모든 페이지가 서로 다르다고 가정한 상한입니다.
+        """
+        page_count = info["page_count"]
+        llm_calls = math.ceil(page_count / self.estimate_script_batch_size)
+        tts_seconds = page_count * self.estimate_tts_seconds_per_slide
+        render_seconds = page_count * self.estimate_render_seconds_per_page
+        llm_seconds = llm_calls * self.estimate_llm_seconds_per_call
+        synthesis_seconds = tts_seconds * self.estimate_tts_rtf
+        
+        return {
+            "llm_calls": llm_calls,
+            "tts_audio_seconds": round(tts_seconds, 1),
+            "render_seconds": round(render_seconds, 1),
+            "processing_seconds": round(render_seconds + llm_seconds + synthesis_seconds, 1)
+        }
+    
     def get_pdf_info(self, pdf_path: str) -> dict:
         """PDF 정보 조회"""
         try:
@@ -0,0 +1,141 @@
+"""
+LLM 요청 속도 제한 모듈
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Optional
+
+class TokenBucket:
+    """토큰 버킷 (capacity만큼 쌓이고 초당 refill_rate씩 채워짐)"""
+    
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+    
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+    
+    def wait_time(self, amount: float) -> float:
+        """amount만큼 꺼내기까지 기다려야 하는 시간 (초)"""
+        self.refill()
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_rate
+
+class LLMRateLimiter:
+    """Azure OpenAI 분당 요청 수(RPM)와 분당 토큰 수(TPM)를 함께 제한하는 프로세스 공용 리미터
+    
+    모든 작업의 요청이 같은 버킷을 공유하므로, 동시에 여러 발표를 처리해도
+    할당량을 넘기지 않고 상한 근처의 처리량을 유지합니다.
+    """
+    
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.request_bucket = TokenBucket(requests_per_minute, requests_per_minute / 60.0) if requests_per_minute > 0 else None
+        self.token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0) if tokens_per_minute > 0 else None
+        self._lock = None
+        self._blocked_until = 0.0  # 429 Retry-After로 전체 요청을 멈출 시각
+        
+        # 지표
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.total_wait_seconds = 0.0
+        self.recent_waits = deque(maxlen=500)
+    
+    def _get_lock(self) -> asyncio.Lock:
+        # 이벤트 루프가 실행된 뒤에 생성
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+    
+    async def acquire(self, estimated_tokens: int) -> float:
+        """요청 1건과 예상 토큰만큼 버킷에서 꺼내고, 기다린 시간(초)을 반환"""
+        started_at = time.monotonic()
+        
+        # 먼저 온 요청부터 순서대로 처리 (대기 중에도 잠금 유지)
+        async with self._get_lock():
+            while True:
+                wait = max(0.0, self._blocked_until - time.monotonic())
+                if self.request_bucket:
+                    wait = max(wait, self.request_bucket.wait_time(1))
+                if self.token_bucket:
+                    amount = min(estimated_tokens, self.token_bucket.capacity)
+                    wait = max(wait, self.token_bucket.wait_time(amount))
+                
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            
+            if self.request_bucket:
+                self.request_bucket.tokens -= 1
+            if self.token_bucket:
+                self.token_bucket.tokens -= min(estimated_tokens, self.token_bucket.capacity)
+        
+        waited = time.monotonic() - started_at
+        self.requests += 1
+        self.total_wait_seconds += waited
+        self.recent_waits.append(waited)
+        return waited
+    
+    def is_saturated(self) -> bool:
+        """다른 요청이 버킷 할당을 기다리고 있거나 429로 전체 요청이 멈춘 상태인지"""
+        if self._blocked_until > time.monotonic():
+            return True
+        return self._lock is not None and self._lock.locked()
+    
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """실제 사용 토큰으로 토큰 버킷 보정 (예상보다 적으면 돌려주고 많으면 더 차감)"""
+        if self.token_bucket and actual_tokens is not None:
+            self.token_bucket.refill()
+            self.token_bucket.tokens = min(
+                self.token_bucket.capacity,
+                self.token_bucket.tokens + (estimated_tokens - actual_tokens)
+            )
+    
+    def record_throttle(self, retry_after: float):
+        """429 응답 시 Retry-After 동안 모든 요청을 멈춤"""
+        self.throttled += 1
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+    
+    def record_retry(self):
+        self.retries += 1
+    
+    def get_stats(self) -> dict:
+        """리미터 대기 시간 및 제한 지표"""
+        waits = sorted(self.recent_waits)
+        
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3)
+        
+        return {
+            "requests": self.requests,
+            "throttled_429": self.throttled,
+            "retries": self.retries,
+            "wait_seconds_total": round(self.total_wait_seconds, 3),
+            "wait_seconds_p50": percentile(0.5),
+            "wait_seconds_p95": percentile(0.95),
+            "wait_seconds_max": round(waits[-1], 3) if waits else 0.0,
+            "rpm_limit": self.request_bucket.capacity if self.request_bucket else None,
+            "tpm_limit": self.token_bucket.capacity if self.token_bucket else None
+        }
+
+_shared_limiter = None
+
+def get_llm_rate_limiter() -> LLMRateLimiter:
+    """프로세스 전체에서 공유하는 LLM 리미터 반환"""
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = LLMRateLimiter(
+            float(os.getenv("AZURE_OPENAI_RPM", "300")),
+            float(os.getenv("AZURE_OPENAI_TPM", "50000"))
+        )
+    return _shared_limiter
@@ -0,0 +1,139 @@
+"""
+참조 화자 음성 정리(VAD) 모듈
+"""
+
+import os
+import numpy as np
+from typing import Optional
+from .audio_buffer import AudioBuffer
+
+class ReferenceVoiceTrimmer:
+    """업로드된 화자 음성에서 무음을 줄이고 가장 깨끗한 발화 구간 N초를 골라내는 클래스
+    
+    몇 분짜리 녹음(무음, 배경 음악 포함)을 그대로 참조 음성으로 쓰면 화자 조건이 길어져 모든 슬라이드 합성이 느려집니다.
+    프레임 에너지·음성 대역 비율·스펙트럼 평탄도·에너지 변동으로 발화 프레임을 판별하고(모두 numpy 벡터 연산),
+    긴 무음은 짧은 휴지로 줄인 뒤, 발화 점수가 가장 높은 SPEAKER_REFERENCE_SECONDS 구간을 선택합니다.
+    업로드마다 한 번만 실행되며 결과는 VibeVoice 입력 형식(24kHz 모노)으로 저장됩니다.
+    """
+    
+    def __init__(self):
+        self.sample_rate = 24000
+        # 선택할 참조 음성 길이 (초, 0이면 사용 안 함)
+        self.target_seconds = float(os.getenv("SPEAKER_REFERENCE_SECONDS", "10"))
+        # 발화 사이에 남겨 둘 최대 휴지 (초)
+        self.max_pause_seconds = float(os.getenv("SPEAKER_VAD_MAX_PAUSE_SECONDS", "0.3"))
+        # 잡음 바닥(하위 10% 프레임 에너지)보다 이만큼 커야 발화로 판정 (dB)
+        self.threshold_db = float(os.getenv("SPEAKER_VAD_THRESHOLD_DB", "12"))
+        self.enabled = self.target_seconds > 0
+        self.frame_seconds = 0.025
+        self.hop_seconds = 0.010
+    
+    @staticmethod
+    def moving_average(values: np.ndarray, width: int) -> np.ndarray:
+        """가운데 정렬 이동 평균"""
+        width = max(1, width)
+        return np.convolve(values, np.ones(width) / width, mode="same")
+    
+    def analyze(self, samples: np.ndarray) -> dict:
+        """프레임별 발화 판정과 점수"""
+        frame = int(self.frame_seconds * self.sample_rate)
+        hop = int(self.hop_seconds * self.sample_rate)
+        if len(samples) < frame:
+            samples = np.pad(samples, (0, frame - len(samples)))
+        frames = np.lib.stride_tricks.sliding_window_view(samples, frame)[::hop]
+        
+        power = np.mean(frames ** 2, axis=1)
+        energy_db = 10 * np.log10(power + 1e-10)
+        spectrum = np.abs(np.fft.rfft(frames * np.hanning(frame).astype(np.float32), axis=1)) ** 2
+        freqs = np.fft.rfftfreq(frame, 1 / self.sample_rate)
+        band = (freqs >= 300) & (freqs <= 3400)
+        band_ratio = spectrum[:, band].sum(axis=1) / (spectrum.sum(axis=1) + 1e-10)
+        flatness = np.exp(np.mean(np.log(spectrum + 1e-10), axis=1)) / (np.mean(spectrum, axis=1) + 1e-10)
+        
+        # 잡음 바닥 대비 에너지로 발화 후보를 찾음
+        noise_floor = np.percentile(energy_db, 10)
+        active = energy_db > max(noise_floor + self.threshold_db, -50.0)
+        
+        # 음성은 에너지가 음절 단위로 크게 출렁이고 음악·지속음은 평탄하므로 0.5초 구간의 에너지 변동을 함께 사용
+        window = int(0.5 / self.hop_seconds)
+        mean_db = self.moving_average(energy_db, window)
+        std_db = np.sqrt(np.maximum(self.moving_average(energy_db ** 2, window) - mean_db ** 2, 0))
+        speech_like = active & (band_ratio > 0.5) & (flatness < 0.5) & (std_db > 6)
+        clipped = np.max(np.abs(frames), axis=1) >= 0.99
+        # 음절 사이·단어 끝이 잘리지 않도록 발화 프레임을 앞뒤 150ms 연장
+        hangover = int(0.15 / self.hop_seconds)
+        voiced = self.moving_average(speech_like.astype(np.float32), 2 * hangover + 1) > 0
+        
+        return {
+            "voiced": voiced,
+            "score": speech_like.astype(np.float32) - clipped.astype(np.float32),
+            "speech_like": speech_like,
+            "hop": hop
+        }
+    
+    def trim(self, input_path: str, output_path: str) -> Optional[dict]:
+        """화자 음성을 정리해 output_path에 저장하고 결과 정보 반환 (발화를 찾지 못하면 None)"""
+        try:
+            import librosa
+            samples, _ = librosa.load(input_path, sr=self.sample_rate, mono=True)
+            samples = samples.astype(np.float32)
+            source_seconds = len(samples) / self.sample_rate
+            
+            analysis = self.analyze(samples)
+            voiced, score, hop = analysis["voiced"], analysis["score"], analysis["hop"]
+            if not analysis["speech_like"].any():
+                print("⚠️ 참조 음성에서 발화 구간을 찾지 못해 원본을 사용합니다.")
+                return None
+            
+            # 무음 구간은 처음 max_pause_seconds만 남김 (구간 내 위치를 누적합으로 계산)
+            starts = np.flatnonzero(np.diff(np.concatenate([[True], voiced])) != 0)
+            run_start = np.zeros(len(voiced), dtype=np.int64)
+            run_start[starts] = starts
+            run_start = np.maximum.accumulate(run_start)
+            position = np.arange(len(voiced)) - run_start
+            keep = voiced | (position < int(self.max_pause_seconds / self.hop_seconds))
+            
+            sample_mask = np.repeat(keep, hop)[:len(samples)]
+            if len(sample_mask) < len(samples):
+                sample_mask = np.concatenate([sample_mask, np.zeros(len(samples) - len(sample_mask), dtype=bool)])
+            kept_indices = np.flatnonzero(sample_mask)
+            condensed = samples[kept_indices]
+            kept_score = score[keep]
+            
+            # 줄인 음성에서 평균 발화 점수가 가장 높은 target_seconds 구간 선택
+            window = int(self.target_seconds / self.hop_seconds)
+            if len(kept_score) <= window:
+                start_frame, window = 0, len(kept_score)
+            else:
+                cumulative = np.concatenate([[0.0], np.cumsum(kept_score)])
+                start_frame = int(np.argmax(cumulative[window:] - cumulative[:-window]))
+            start_sample = start_frame * hop
+            end_sample = min(len(condensed), start_sample + int(self.target_seconds * self.sample_rate))
+            reference = condensed[start_sample:end_sample].copy()
+            
+            # 경계 클릭 방지용 10ms 페이드
+            fade = min(len(reference) // 2, self.sample_rate // 100)
+            if fade:
+                ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)
+                reference[:fade] *= ramp
+                reference[-fade:] *= ramp[::-1]
+            
+            AudioBuffer(reference, self.sample_rate).write(output_path)
+            report = {
+                "source_seconds": round(source_seconds, 2),
+                "speech_seconds": round(float(analysis["speech_like"].sum()) * self.hop_seconds, 2),
+                "condensed_seconds": round(len(condensed) / self.sample_rate, 2),
+                "target_seconds": self.target_seconds,
+                "reference_seconds": round(len(reference) / self.sample_rate, 2),
+                "source_start_seconds": round(float(kept_indices[start_sample]) / self.sample_rate, 2) if len(reference) else 0.0,
+                "speech_ratio": round(float(np.mean(kept_score[start_frame:start_frame + window] > 0)), 3) if window else 0.0
+            }
+            print(
+                f"✂️ 참조 음성 정리: 원본 {report['source_seconds']}초 → 발화 {report['condensed_seconds']}초 → "
+                f"선택 {report['reference_seconds']}초 (원본 {report['source_start_seconds']}초부터, 발화 비율 {report['speech_ratio']})"
+            )
+            return report
+        
+        except Exception as e:
+            print(f"❌ 참조 음성 정리 실패, 원본 사용: {e}")
+            return None
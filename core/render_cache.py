@@ -0,0 +1,175 @@
+"""
+PDF 페이지 렌더링 캐시 모듈
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import threading
+from typing import Optional
+
+class RenderCache:
+    """PDF 페이지 래스터화 결과 캐시 클래스
+    
+    (PDF 내용 해시, 페이지 인덱스, 렌더링 설정)을 키로 작업 간에 공유되며,
+    전체 크기가 한도를 넘으면 가장 오래 사용되지 않은 항목부터 삭제합니다.
+    디렉토리와 한도를 지정하면 슬라이드 이미지와 별도 예산을 쓰는 캐시(원시 프레임용)를 만들 수 있습니다.
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None, max_mb: Optional[int] = None):
+        self.cache_dir = cache_dir or os.getenv("RENDER_CACHE_DIR", os.path.join("cache", "renders"))
+        if max_mb is None:
+            max_mb = int(os.getenv("RENDER_CACHE_MAX_MB", "2048"))
+        self.max_bytes = max_mb * 1024 * 1024
+        self.enabled = self.max_bytes > 0
+        self._lock = threading.Lock()
+        self._current_bytes = None  # 첫 사용 시 디렉토리를 스캔해 계산
+        
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """파일 내용의 SHA-256 해시 계산"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def make_key(self, pdf_hash: str, page_index: int, settings: dict) -> str:
+        """캐시 키 생성"""
+        payload = json.dumps(
+            {"pdf": pdf_hash, "page": page_index, "settings": settings},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _entry_path(self, key: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{extension}")
+    
+    def get_path(self, key: str, extension: str) -> Optional[str]:
+        """캐시 항목 경로 반환 (없으면 None). 적중 시 최근 사용 시각 갱신"""
+        if not self.enabled:
+            return None
+        
+        path = self._entry_path(key, extension)
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            return None
+    
+    def get_bytes(self, key: str, extension: str) -> Optional[bytes]:
+        """캐시 항목 내용 반환 (없으면 None)"""
+        path = self.get_path(key, extension)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            # 다른 작업이 방금 삭제한 경우
+            return None
+    
+    def copy_to(self, key: str, extension: str, target_path: str) -> bool:
+        """캐시 항목을 작업 디렉토리로 복사 (가능하면 하드 링크)"""
+        path = self.get_path(key, extension)
+        if path is None:
+            return False
+        try:
+            if os.path.exists(target_path):
+                os.remove(target_path)
+            try:
+                os.link(path, target_path)
+            except OSError:
+                shutil.copyfile(path, target_path)
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def put_file(self, key: str, extension: str, source_path: str):
+        """작업 디렉토리의 렌더링 결과를 캐시에 저장"""
+        if not self.enabled:
+            return
+        try:
+            path = self._entry_path(key, extension)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.link(source_path, temp_path)
+            except OSError:
+                shutil.copyfile(source_path, temp_path)
+            os.replace(temp_path, path)
+            self._account(os.path.getsize(path))
+        except Exception as e:
+            print(f"⚠️ 렌더링 캐시 저장 실패: {e}")
+    
+    def put_bytes(self, key: str, extension: str, data: bytes):
+        """렌더링 결과 바이트를 캐시에 저장"""
+        if not self.enabled:
+            return
+        try:
+            path = self._entry_path(key, extension)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            self._account(len(data))
+        except Exception as e:
+            print(f"⚠️ 렌더링 캐시 저장 실패: {e}")
+    
+    def _scan(self) -> list:
+        """캐시 항목 목록 (최근 사용 시각, 크기, 경로)"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+    
+    def _account(self, added_bytes: int):
+        """크기 집계 후 한도를 넘으면 LRU 삭제"""
+        with self._lock:
+            if self._current_bytes is None:
+                self._current_bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._current_bytes += added_bytes
+            
+            if self._current_bytes <= self.max_bytes:
+                return
+            
+            # 전체 스캔으로 실제 크기를 다시 맞춘 뒤 한도의 90%까지 오래된 항목 삭제
+            entries = sorted(self._scan())
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * 0.9)
+            evicted = 0
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    evicted += 1
+                except FileNotFoundError:
+                    pass
+            self._current_bytes = total
+            print(f"🧹 렌더링 캐시 정리: {evicted}개 항목 삭제 ({total / 1024 / 1024:.1f}MB 사용 중)")
+    
+    def get_stats(self) -> dict:
+        """캐시 사용량 정보"""
+        entries = self._scan() if self.enabled else []
+        return {
+            "enabled": self.enabled,
+            "entries": len(entries),
+            "size_mb": round(sum(size for _, size, _ in entries) / 1024 / 1024, 1),
+            "max_mb": self.max_bytes // (1024 * 1024)
+        }
@@ -0,0 +1,118 @@
+"""
+스크립트 캐시 모듈
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+
+class ScriptCache:
+    """생성된 발표 스크립트의 영구 캐시 클래스
+    
+    음성이나 자막 설정만 바꿔 다시 생성할 때 같은 슬라이드에 대한 LLM 호출을 생략합니다.
+    항목은 TTL이 지나면 만료되고, 최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 삭제됩니다.
+    """
+    
+    def __init__(self):
+        self.db_path = os.getenv("SCRIPT_CACHE_PATH", os.path.join("cache", "scripts.db"))
+        self.ttl_seconds = float(os.getenv("SCRIPT_CACHE_TTL_HOURS", "168")) * 3600
+        self.max_entries = int(os.getenv("SCRIPT_CACHE_MAX_ENTRIES", "20000"))
+        self.enabled = self.max_entries > 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+        
+        if self.enabled:
+            try:
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS scripts ("
+                    "key TEXT PRIMARY KEY, script TEXT NOT NULL, "
+                    "created_at REAL NOT NULL, last_used REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON scripts(last_used)")
+                self._conn.commit()
+            except Exception as e:
+                print(f"⚠️ 스크립트 캐시 초기화 실패, 캐시 비활성화: {e}")
+                self.enabled = False
+    
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """문자열 SHA-256 해시"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """파일 내용 SHA-256 해시"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def make_key(self, **parts) -> str:
+        """키 구성 요소(슬라이드 내용 해시, 언어, 역할, 이전 스크립트 해시, 프롬프트 버전, 모델 등)로 캐시 키 생성"""
+        payload = "|".join(f"{name}={parts[name]}" for name in sorted(parts))
+        return self.hash_text(payload)
+    
+    def get(self, key: str) -> Optional[str]:
+        """캐시된 스크립트 반환 (없거나 만료되면 None)"""
+        if not self.enabled:
+            return None
+        
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT script, created_at FROM scripts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM scripts WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            
+            self._conn.execute("UPDATE scripts SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+    
+    def set(self, key: str, script: str):
+        """스크립트 저장 후 만료/초과 항목 정리"""
+        if not self.enabled:
+            return
+        
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO scripts (key, script, created_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, script, now, now)
+                )
+                self._conn.execute("DELETE FROM scripts WHERE created_at < ?", (now - self.ttl_seconds,))
+                self._conn.execute(
+                    "DELETE FROM scripts WHERE key IN ("
+                    "SELECT key FROM scripts ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+                self._conn.commit()
+        except Exception as e:
+            print(f"⚠️ 스크립트 캐시 저장 실패: {e}")
+    
+    def get_stats(self) -> dict:
+        """캐시 사용 정보"""
+        entries = 0
+        if self.enabled:
+            with self._lock:
+                entries = self._conn.execute("SELECT COUNT(*) FROM scripts").fetchone()[0]
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses
+        }
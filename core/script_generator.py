@@ -3,20 +3,98 @@
 """
 
 import os
+import re
+import json
+import time
 import base64
-from openai import AzureOpenAI
-from typing import Optional
+import random
+import asyncio
+from collections import deque
+from types import SimpleNamespace
+from openai import AsyncAzureOpenAI, AsyncOpenAI, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from typing import AsyncIterator, List, Optional, Tuple
+from core.script_cache import ScriptCache
+from core.rate_limiter import get_llm_rate_limiter
+from core.llm_usage import LLMUsageTracker
+
+# Vision 입력 이미지 1장의 예상 토큰 수 (1920x1080 → 768px 기준 6타일, high detail)
+IMAGE_TOKEN_ESTIMATE = 1105
+
+# 문장 경계: 문장 부호 뒤에 공백이 오면 문장이 끝난 것으로 판단 (3.5 같은 소수점은 나누지 않음)
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?。])\s+')
+
+# 프롬프트 템플릿 버전 (프롬프트를 수정하면 올려서 스크립트 캐시를 무효화)
+PROMPT_VERSION = "3"
+
+# 제공자 측 프롬프트 캐시가 적용되는 최소 동일 접두부 길이 (토큰, Azure OpenAI/OpenAI 기준)
+PROMPT_CACHE_MIN_TOKENS = 1024
 
 class ScriptGenerator:
     """스크립트 생성 클래스"""
     
     def __init__(self):
-        # Azure OpenAI 클라이언트 초기화
-        self.client = AzureOpenAI(
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview"),
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT", "https://magosaturn.openai.azure.com/"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY", "YOUR_API_KEY_HERE")
-        )
+        # Azure OpenAI 클라이언트 초기화 (재시도는 send_chat_request에서 직접 처리)
+        # LLM_BASE_URL을 설정하면 OpenAI 호환 엔드포인트(tools/mock_openai_server.py 등)를 사용
+        self.base_url = os.getenv("LLM_BASE_URL", "")
+        if self.base_url:
+            self.client = AsyncOpenAI(
+                base_url=self.base_url,
+                api_key=os.getenv("LLM_API_KEY", "local"),
+                max_retries=0
+            )
+        else:
+            self.client = AsyncAzureOpenAI(
+                api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview"),
+                azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT", "https://magosaturn.openai.azure.com/"),
+                api_key=os.getenv("AZURE_OPENAI_API_KEY", "YOUR_API_KEY_HERE"),
+                max_retries=0
+            )
+        
+        # 모든 작업이 공유하는 RPM/TPM 리미터와 재시도 설정
+        self.rate_limiter = get_llm_rate_limiter()
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", "5"))
+        self.backoff_base_seconds = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1"))
+        self.backoff_max_seconds = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "60"))
+        
+        # 요청 헤징: 최근 지연 시간의 백분위수를 넘기면 같은 요청을 한 번 더 보내 먼저 온 응답 사용
+        self.hedge_enabled = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+        self.hedge_percentile = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+        self.hedge_min_samples = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.hedge_budget = float(os.getenv("LLM_HEDGE_BUDGET", "0.1"))  # 전체 요청 대비 추가 요청 비율 상한
+        self.latency_history = {}  # (경로, max_tokens)별 최근 응답 지연 시간 (모델·요청 크기별로 분리)
+        self.primary_requests = 0
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self.hedges_skipped_saturated = 0
+        
+        # 스크립트 입력 모드: auto (텍스트 레이어가 충분하면 텍스트 전용 프롬프트) / vision (항상 이미지)
+        self.input_mode = os.getenv("SCRIPT_INPUT_MODE", "auto")
+        self.text_min_chars = int(os.getenv("SCRIPT_TEXT_MIN_CHARS", "80"))
+        self.text_max_image_ratio = float(os.getenv("SCRIPT_TEXT_MAX_IMAGE_RATIO", "0.25"))
+        self.text_max_chars = int(os.getenv("SCRIPT_TEXT_MAX_CHARS", "3000"))
+        # 한 요청에 묶어 생성할 슬라이드 수 (1이면 슬라이드별 호출)
+        self.batch_size = max(1, int(os.getenv("SCRIPT_BATCH_SIZE", "1")))
+        # 문장 단위 스트리밍 (완성된 문장부터 음성 합성으로 넘김, 켜면 배치 생성 대신 사용)
+        self.streaming = os.getenv("SCRIPT_STREAMING", "false").lower() == "true"
+        
+        self.chat_deployment = os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT", "gpt-4o")
+        # 단순한 슬라이드(제목·구분·Q&A 등)를 보낼 작고 빠른 배포 (비어 있으면 라우팅 없이 모두 chat_deployment)
+        self.light_deployment = os.getenv("AZURE_OPENAI_LIGHT_DEPLOYMENT", "")
+        self.route_light_max_chars = int(os.getenv("SCRIPT_ROUTE_LIGHT_MAX_CHARS", "150"))
+        self.route_light_max_image_ratio = float(os.getenv("SCRIPT_ROUTE_LIGHT_MAX_IMAGE_RATIO", "0.1"))
+        self.route_light_max_entropy = float(os.getenv("SCRIPT_ROUTE_LIGHT_MAX_ENTROPY", "4.5"))
+        # 작업별 토큰·요청 크기·지연 시간·재시도 집계 (/status, /usage/llm)
+        self.usage_tracker = LLMUsageTracker()
+        self.route_stats = {
+            route: {
+                "requests": 0, "latency_seconds_total": 0.0,
+                "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0,
+                "streamed_requests": 0, "first_token_seconds_total": 0.0, "estimated_usage_requests": 0
+            }
+            for route in ("light", "strong")
+        }
+        # 슬라이드 내용·언어·역할·이전 스크립트·프롬프트 버전·모델 기준 스크립트 캐시
+        self.script_cache = ScriptCache()
     
     def preprocess_korean_text_for_presentation(self, text: str) -> str:
         """한국어 텍스트를 발표에 적합하게 전처리"""
@@ -57,20 +135,455 @@ class ScriptGenerator:
         
         return result
     
-    async def generate_script_for_slide(
-        self, 
-        slide_num: int, 
-        slide_image_path: str, 
-        is_first_slide: bool = False, 
-        is_last_slide: bool = False,
-        previous_script: str = "",
-        language: str = "korean"
+    async def create_chat_completion(
+        self, messages: list, max_tokens: int = 200, route: str = "strong", task_id: Optional[str] = None, **kwargs
+    ):
+        """Azure OpenAI 채팅 완성 호출 (모든 스크립트 생성 요청의 공통 경로)
+        
+        route는 "light"(작은 배포) 또는 "strong"(기본 배포)입니다.
+        헤징이 켜져 있으면, 요청이 최근 지연 시간의 백분위수 안에 끝나지 않을 때
+        같은 요청을 한 번 더 보내고 먼저 도착한 응답을 사용합니다.
+        지연 시간은 API 호출이 시작된 시점부터 재며(latency_history와 같은 기준), 리미터 대기나
+        재시도 백오프 중인 요청과 리미터가 포화된 동안에는 헤지하지 않습니다.
+        추가 요청은 전체 요청의 hedge_budget 비율을 넘지 않습니다.
+        """
+        self.primary_requests += 1
+        hedge_delay = self.get_hedge_delay(max_tokens, route)
+        if hedge_delay is None:
+            return await self.request_chat_completion(messages, max_tokens, route, task_id, **kwargs)
+        
+        # 원래 요청의 API 호출 시작 시각 (리미터 통과 시 기록, 백오프 중에는 비움)
+        flight = {"started": asyncio.Event(), "started_at": 0.0}
+        primary = asyncio.create_task(
+            self.request_chat_completion(messages, max_tokens, route, task_id, flight=flight, **kwargs)
+        )
+        while True:
+            waiter = asyncio.create_task(flight["started"].wait())
+            done, _ = await asyncio.wait({primary, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+            if primary in done:
+                return await primary
+            
+            remaining = flight["started_at"] + hedge_delay - time.monotonic()
+            done, _ = await asyncio.wait({primary}, timeout=max(remaining, 0.0))
+            if done:
+                return await primary
+            if flight["started"].is_set() and time.monotonic() - flight["started_at"] >= hedge_delay:
+                break
+            # 지연 중 재시도 백오프로 넘어갔으면 다음 시도가 시작될 때부터 다시 잼
+        
+        if self.hedged_requests >= self.hedge_budget * self.primary_requests:
+            return await primary
+        if self.rate_limiter.is_saturated():
+            # 리미터가 밀려 있을 때의 추가 요청은 다른 요청의 자리를 빼앗을 뿐이므로 보내지 않음
+            self.hedges_skipped_saturated += 1
+            return await primary
+        
+        self.hedged_requests += 1
+        print(f"🪁 LLM 응답 지연 ({hedge_delay:.1f}초 초과) - 헤지 요청 전송")
+        hedge = asyncio.create_task(self.request_chat_completion(messages, max_tokens, route, task_id, **kwargs))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+            # 두 요청 모두 실패하면 원래 요청의 오류 전달
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def get_hedge_delay(self, max_tokens: int, route: str = "strong") -> Optional[float]:
+        """헤지 요청을 보낼 지연 시간 (헤징 불가능하면 None)"""
+        if not self.hedge_enabled:
+            return None
+        history = self.latency_history.get((route, max_tokens))
+        if not history or len(history) < self.hedge_min_samples:
+            return None
+        latencies = sorted(history)
+        return latencies[min(len(latencies) - 1, int(self.hedge_percentile * len(latencies)))]
+    
+    async def request_chat_completion(
+        self,
+        messages: list,
+        max_tokens: int = 200,
+        route: str = "strong",
+        task_id: Optional[str] = None,
+        flight: Optional[dict] = None,
+        **kwargs
+    ):
+        """리미터·재시도를 거친 단일 채팅 완성 요청 (경로별·작업별 사용량 기록)"""
+        response, retries, request_bytes, latency = await self.send_chat_request(
+            messages, max_tokens, route, task_id, flight, **kwargs
+        )
+        usage = getattr(response, "usage", None)
+        self.latency_history.setdefault((route, max_tokens), deque(maxlen=200)).append(latency)
+        self.record_call(route, task_id, request_bytes, latency, retries, usage)
+        return response
+    
+    async def send_chat_request(
+        self, messages: list, max_tokens: int, route: str, task_id: Optional[str], flight: Optional[dict] = None, **kwargs
+    ) -> Tuple[object, int, int, float]:
+        """공용 리미터에서 요청/토큰 할당을 받은 뒤 호출하고, 429·연결 오류·5xx는
+        Retry-After를 따르거나 지터가 있는 지수 백오프로 재시도
+        
+        (응답, 재시도 횟수, 요청 크기(바이트), 마지막 시도의 지연 시간)을 반환합니다.
+        스트리밍 요청은 응답 헤더가 도착하면 반환됩니다.
+        flight가 주어지면 API 호출이 시작될 때 시각을 기록하고, 백오프 동안은 비워 둡니다 (헤징용).
+        """
+        estimated_tokens = self.estimate_prompt_tokens(messages) + max_tokens
+        request_bytes = len(json.dumps(messages, ensure_ascii=False).encode("utf-8"))
+        
+        for attempt in range(self.max_retries + 1):
+            waited = await self.rate_limiter.acquire(estimated_tokens)
+            if waited > 1:
+                print(f"⏳ LLM 속도 제한 대기: {waited:.1f}초")
+            
+            try:
+                started_at = time.monotonic()
+                if flight is not None:
+                    flight["started_at"] = started_at
+                    flight["started"].set()
+                response = await self.client.chat.completions.create(
+                    messages=messages,
+                    model=self.get_deployment(route),
+                    max_tokens=max_tokens,
+                    temperature=0.7,
+                    top_p=0.95,
+                    **kwargs
+                )
+                usage = getattr(response, "usage", None)
+                self.rate_limiter.record_usage(estimated_tokens, usage.total_tokens if usage else None)
+                return response, attempt, request_bytes, time.monotonic() - started_at
+            
+            except (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError) as e:
+                if attempt >= self.max_retries:
+                    self.usage_tracker.record_failure(task_id, request_bytes, attempt)
+                    raise
+                
+                delay = self.get_retry_delay(e, attempt)
+                if isinstance(e, RateLimitError):
+                    # 다른 작업의 요청도 함께 멈추도록 리미터에 기록
+                    self.rate_limiter.record_throttle(delay)
+                self.rate_limiter.record_retry()
+                if flight is not None:
+                    flight["started"].clear()
+                print(f"🔁 LLM 요청 재시도 {attempt + 1}/{self.max_retries} ({type(e).__name__}, {delay:.1f}초 후)")
+                await asyncio.sleep(delay)
+            
+            except Exception:
+                self.usage_tracker.record_failure(task_id, request_bytes, attempt)
+                raise
+    
+    async def stream_chat_completion(
+        self, messages: list, max_tokens: int = 200, route: str = "strong", task_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """스트리밍 채팅 완성 요청 (생성되는 텍스트 조각을 차례로 반환)
+        
+        연결·429 재시도는 첫 응답 전까지만 적용되며, 스트림 도중 오류는 호출자에게 전달됩니다.
+        """
+        estimated_tokens = self.estimate_prompt_tokens(messages) + max_tokens
+        started_at = time.monotonic()
+        stream, retries, request_bytes, _ = await self.send_chat_request(
+            messages, max_tokens, route, task_id, stream=True
+        )
+        
+        characters = 0
+        first_token_seconds = None
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token_seconds is None:
+                    first_token_seconds = time.monotonic() - started_at
+                characters += len(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+        
+        # 스트리밍 응답에는 usage가 없어 (SDK가 stream_options를 지원하지 않음) 요청 추정치와 생성된 문자 수로 보정하고
+        # 사용량 집계에도 추정치임을 표시해 기록
+        usage = SimpleNamespace(
+            prompt_tokens=estimated_tokens - max_tokens,
+            completion_tokens=characters // 2,
+            prompt_tokens_details=None
+        )
+        self.rate_limiter.record_usage(estimated_tokens, usage.prompt_tokens + usage.completion_tokens)
+        self.record_call(
+            route, task_id, request_bytes, time.monotonic() - started_at, retries, usage, first_token_seconds,
+            estimated=True
+        )
+    
+    def get_deployment(self, route: str) -> str:
+        """라우팅 경로에 해당하는 배포 이름"""
+        if route == "light" and self.light_deployment:
+            return self.light_deployment
+        return self.chat_deployment
+    
+    def record_call(
+        self,
+        route: str,
+        task_id: Optional[str],
+        request_bytes: int,
+        latency: float,
+        retries: int,
+        usage,
+        first_token_seconds: Optional[float] = None,
+        estimated: bool = False
+    ):
+        """완료된 호출을 경로별 통계와 작업별 사용량에 기록 (캐시 적중 프롬프트 토큰 포함, estimated는 추정 사용량)"""
+        prompt_tokens = (usage.prompt_tokens or 0) if usage is not None else 0
+        completion_tokens = (usage.completion_tokens or 0) if usage is not None else 0
+        cached_tokens = self.get_cached_tokens(usage) if usage is not None else 0
+        
+        stats = self.route_stats[route]
+        stats["requests"] += 1
+        stats["latency_seconds_total"] += latency
+        if first_token_seconds is not None:
+            stats["streamed_requests"] += 1
+            stats["first_token_seconds_total"] += first_token_seconds
+        stats["prompt_tokens"] += prompt_tokens
+        stats["cached_prompt_tokens"] += cached_tokens
+        stats["completion_tokens"] += completion_tokens
+        if estimated:
+            stats["estimated_usage_requests"] += 1
+        
+        self.usage_tracker.record_call(
+            task_id, route, request_bytes, latency, retries,
+            prompt_tokens, cached_tokens, completion_tokens, first_token_seconds, estimated
+        )
+    
+    def get_cached_tokens(self, usage) -> int:
+        """제공자 측 프롬프트 캐시에서 재사용된 프롬프트 토큰 수 (보고되지 않으면 0)"""
+        details = getattr(usage, "prompt_tokens_details", None)
+        if isinstance(details, dict):
+            return details.get("cached_tokens") or 0
+        return getattr(details, "cached_tokens", 0) or 0
+    
+    def route_slide(
+        self,
+        slide_image_path: str,
+        slide_layout: Optional[dict],
+        is_first_slide: bool = False,
+        is_last_slide: bool = False
     ) -> str:
-        """슬라이드 번호와 이미지를 기반으로 발표 스크립트를 생성하는 함수"""
+        """값싼 신호로 슬라이드를 분류해 "light" 또는 "strong" 경로 결정
+        
+        첫/마지막 슬라이드, 텍스트가 많은 슬라이드, 그림·도형 비율이나 이미지 엔트로피가 높은 슬라이드는
+        기본 배포로 보내고, 제목·구분·Q&A처럼 단순한 슬라이드만 작은 배포로 보냅니다.
+        """
+        if not self.light_deployment or is_first_slide or is_last_slide or not slide_layout:
+            return "strong"
+        if slide_layout.get("text_length", 0) > self.route_light_max_chars:
+            return "strong"
+        if slide_layout.get("image_ratio", 1.0) > self.route_light_max_image_ratio:
+            return "strong"
+        if self.get_image_entropy(slide_image_path) > self.route_light_max_entropy:
+            return "strong"
+        return "light"
+    
+    def get_image_entropy(self, image_path: str) -> float:
+        """축소한 흑백 슬라이드 이미지의 엔트로피 (비트, 단색 배경의 단순한 슬라이드일수록 낮음)"""
         try:
-            # 언어에 따른 시스템 프롬프트
-            if language == "english":
-                system_prompt = """You are an experienced presentation expert with the following expertise:
+            from PIL import Image
+            with Image.open(image_path) as image:
+                image.draft("L", (256, 256))  # JPEG는 디코딩 단계에서 축소
+                small = image.convert("L")
+                small.thumbnail((256, 256))
+                return small.entropy()
+        except Exception as e:
+            print(f"⚠️ 이미지 엔트로피 계산 실패: {e}")
+            return float("inf")
+    
+    def split_sentences(self, text: str) -> Tuple[List[str], str]:
+        """텍스트를 완성된 문장 목록과 아직 끝나지 않은 나머지로 분리"""
+        parts = SENTENCE_BOUNDARY.split(text)
+        return [part.strip() for part in parts[:-1] if part.strip()], parts[-1]
+    
+    def get_retry_delay(self, error: Exception, attempt: int) -> float:
+        """재시도 대기 시간: Retry-After 헤더가 있으면 우선, 없으면 full jitter 지수 백오프"""
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        
+        retry_after = None
+        try:
+            if headers.get("retry-after-ms"):
+                retry_after = float(headers["retry-after-ms"]) / 1000
+            elif headers.get("retry-after"):
+                retry_after = float(headers["retry-after"])
+        except ValueError:
+            retry_after = None
+        
+        if retry_after is not None:
+            # 여러 작업이 동시에 깨어나지 않도록 약간의 지터 추가
+            return min(self.backoff_max_seconds, retry_after + random.uniform(0, 0.1 * retry_after + 0.05))
+        
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * (2 ** attempt)))
+    
+    def estimate_prompt_tokens(self, messages: list) -> int:
+        """요청 토큰 수 대략 추정 (리미터 할당용, 응답 후 실제 사용량으로 보정)"""
+        characters = 0
+        images = 0
+        for message in messages:
+            content = message["content"]
+            if isinstance(content, str):
+                characters += len(content)
+                continue
+            for part in content:
+                if part["type"] == "text":
+                    characters += len(part["text"])
+                else:
+                    images += 1
+        # 한국어를 고려해 문자 2개당 1토큰으로 보수적으로 추정
+        return characters // 2 + images * IMAGE_TOKEN_ESTIMATE
+    
+    def get_fallback_script(self, slide_num: int, is_first_slide: bool, is_last_slide: bool, language: str) -> str:
+        """API 오류 시 사용할 언어별 기본 스크립트"""
+        if language == "english":
+            if is_first_slide:
+                return f"Hello everyone. Let me walk you through slide {slide_num}, which covers an important point."
+            if is_last_slide:
+                return f"Finally, let's look at slide {slide_num}. That concludes my presentation, thank you."
+            return f"Next, let's look at slide {slide_num}. This part is also important."
+        
+        if is_first_slide:
+            return f"안녕하세요. {slide_num}번째 슬라이드에 대해 발표하겠습니다. 이 내용은 중요한 포인트를 포함하고 있습니다."
+        if is_last_slide:
+            return f"마지막으로 {slide_num}번째 슬라이드에 대해 살펴보겠습니다. 발표를 마치겠습니다. 감사합니다."
+        return f"다음으로 {slide_num}번째 슬라이드에 대해 살펴보겠습니다. 이 부분도 중요한 내용입니다."
+    
+    def get_status(self) -> dict:
+        """스크립트 생성기 상태 (리미터 지표, 캐시 통계)"""
+        return {
+            "endpoint": self.base_url or os.getenv("AZURE_OPENAI_ENDPOINT", "https://magosaturn.openai.azure.com/"),
+            "deployment": self.chat_deployment,
+            "light_deployment": self.light_deployment or None,
+            "routes": {
+                route: {
+                    **stats,
+                    "deployment": self.get_deployment(route),
+                    "latency_seconds_total": round(stats["latency_seconds_total"], 3),
+                    "latency_seconds_avg": round(stats["latency_seconds_total"] / stats["requests"], 3) if stats["requests"] else 0.0,
+                    "first_token_seconds_total": round(stats["first_token_seconds_total"], 3),
+                    "first_token_seconds_avg": (
+                        round(stats["first_token_seconds_total"] / stats["streamed_requests"], 3)
+                        if stats["streamed_requests"] else None
+                    ),
+                    "cached_prompt_ratio": (
+                        round(stats["cached_prompt_tokens"] / stats["prompt_tokens"], 3)
+                        if stats["prompt_tokens"] else 0.0
+                    )
+                }
+                for route, stats in self.route_stats.items()
+            },
+            "rate_limiter": self.rate_limiter.get_stats(),
+            "hedging": {
+                "enabled": self.hedge_enabled,
+                "primary_requests": self.primary_requests,
+                "hedged_requests": self.hedged_requests,
+                "hedge_wins": self.hedge_wins,
+                "skipped_saturated": self.hedges_skipped_saturated
+            },
+            "prompt_prefix": {
+                "cache_min_tokens": PROMPT_CACHE_MIN_TOKENS,
+                **{
+                    language: self.estimate_prompt_tokens([{"role": "system", "content": self.get_prompt_prefix(language)}])
+                    for language in ("korean", "english")
+                }
+            },
+            "script_cache": self.script_cache.get_stats()
+        }
+    
+    def get_script_cache_key(
+        self,
+        mode: str,
+        slide_image_path: str,
+        slide_layout: Optional[dict],
+        language: str,
+        role: str,
+        previous_script: str = "",
+        extra: str = "",
+        route: str = "strong"
+    ) -> str:
+        """스크립트 캐시 키 생성 (텍스트 프롬프트는 텍스트 해시, Vision은 이미지 해시 기준)"""
+        if self.use_text_prompt(slide_layout):
+            content_hash = "text:" + ScriptCache.hash_text(self.format_slide_text(slide_layout, language))
+        else:
+            content_hash = "image:" + ScriptCache.hash_file(slide_image_path)
+        
+        return self.script_cache.make_key(
+            mode=mode,
+            content=content_hash,
+            language=language,
+            role=role,
+            previous=ScriptCache.hash_text(previous_script),
+            extra=extra,
+            prompt_version=PROMPT_VERSION,
+            model=self.get_deployment(route)
+        )
+    
+    def get_cached_script(self, cache_key: str, slide_num: int, force_regenerate: bool = False) -> Optional[str]:
+        """캐시된 스크립트 조회 (강제 재생성이면 조회하지 않음)"""
+        if force_regenerate:
+            return None
+        script = self.script_cache.get(cache_key)
+        if script:
+            print(f"♻️ 슬라이드 {slide_num}: 캐시된 스크립트 사용")
+        return script
+    
+    def use_text_prompt(self, slide_layout: Optional[dict]) -> bool:
+        """텍스트 레이어만으로 스크립트를 생성할 수 있는 슬라이드인지 판단"""
+        if self.input_mode != "auto" or not slide_layout:
+            return False
+        return (
+            slide_layout.get("text_length", 0) >= self.text_min_chars
+            and slide_layout.get("image_ratio", 1.0) <= self.text_max_image_ratio
+        )
+    
+    def format_slide_text(self, slide_layout: dict, language: str = "korean") -> str:
+        """레이아웃 블록을 프롬프트에 붙일 슬라이드 텍스트 섹션으로 변환"""
+        text_blocks = [block for block in slide_layout.get("blocks", []) if block["type"] == "text"]
+        font_sizes = sorted(block.get("font_size", 0) for block in text_blocks)
+        median_size = font_sizes[len(font_sizes) // 2] if font_sizes else 0
+        
+        lines = []
+        for block in text_blocks:
+            # 본문보다 큰 글꼴 블록은 제목으로 표시해 레이아웃 정보를 보존
+            prefix = "# " if block.get("font_size", 0) > median_size * 1.25 else "- "
+            lines.append(prefix + block["text"].replace("\n", " "))
+        slide_text = "\n".join(lines)[:self.text_max_chars]
+        
+        if language == "english":
+            return f"\n\nThe slide image is not attached. Use the slide's extracted text below instead.\n\nSlide text:\n{slide_text}"
+        return f"\n\n슬라이드 이미지 대신 추출된 슬라이드 텍스트를 제공합니다. 아래 텍스트를 바탕으로 작성하세요.\n\n슬라이드 텍스트:\n{slide_text}"
+    
+    def encode_image_data_url(self, image_path: str) -> str:
+        """슬라이드 이미지를 Vision API용 data URL로 인코딩
+        
+        PNG/JPEG는 그대로 전송하고, 무압축 중간 형식(PPM 등)은 JPEG로 변환합니다.
+        """
+        extension = os.path.splitext(image_path)[1].lower()
+        mime_types = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg"}
+        
+        if extension in mime_types:
+            with open(image_path, "rb") as image_file:
+                data = image_file.read()
+            mime_type = mime_types[extension]
+        else:
+            from PIL import Image
+            import io
+            buffer = io.BytesIO()
+            with Image.open(image_path) as image:
+                image.convert("RGB").save(buffer, format="JPEG", quality=90)
+            data = buffer.getvalue()
+            mime_type = "image/jpeg"
+        
+        return f"data:{mime_type};base64,{base64.b64encode(data).decode('utf-8')}"
+    
+    def get_system_prompt(self, language: str = "korean") -> str:
+        """언어에 따른 시스템 프롬프트 반환"""
+        if language == "english":
+            return """You are an experienced presentation expert with the following expertise:
 - Creating clear and persuasive presentation scripts
 - Engaging and captivating expression that captures audience attention
 - Logical and natural content flow
@@ -88,8 +601,8 @@ Presentation script writing rules:
 8. Calm and confident tone suitable for presentations
 9. Include natural commas and pauses for appropriate speaking pace
 10. Use proper English punctuation"""
-            else:  # korean
-                system_prompt = """당신은 경험이 풍부한 발표 전문가입니다. 
+        else:  # korean
+            return """당신은 경험이 풍부한 발표 전문가입니다. 
 다음의 전문성을 가지고 있습니다:
 - 명확하고 설득력 있는 발표 스크립트 작성
 - 청중의 관심을 끄는 매력적인 표현력
@@ -109,158 +622,539 @@ Presentation script writing rules:
 9. 적절한 속도로 말할 수 있도록 자연스러운 쉼표와 휴지 포함
 10. 한국어 구두점은 영어 구두점으로 변환 (쌍따옴표, 작은따옴표 등)"""
 
-            # 이미지를 base64로 인코딩
-            with open(slide_image_path, "rb") as image_file:
-                base64_image = base64.b64encode(image_file.read()).decode('utf-8')
-
-            if is_first_slide:
-                # 첫 번째 슬라이드: 인사와 함께 시작
-                if language == "english":
-                    user_prompt = f"""Write a presentation script for the first slide of the presentation.
+    def get_prompt_prefix(self, language: str = "korean") -> str:
+        """모든 슬라이드 요청이 공유하는 고정 프롬프트 접두부
+        
+        시스템 프롬프트, 슬라이드 위치별 요구사항, 출력 형식 규칙, 근접 중복·배치 요청 규칙, 고정 예시로 구성됩니다.
+        슬라이드마다 달라지는 내용(번호, 이전 스크립트, 슬라이드 텍스트·이미지)은 사용자 메시지에만 넣어
+        같은 언어의 모든 요청(단일·연속·배치)이 동일한 접두부로 시작하도록 합니다.
+        제공자 측 프롬프트 캐시는 PROMPT_CACHE_MIN_TOKENS 이상의 동일 접두부에만 적용되므로 접두부는 그보다 길어야 합니다.
+        """
+        if language == "english":
+            return self.get_system_prompt(language) + """
 
-Slide Information:
-- Slide number: {slide_num} (First slide)
-- Presentation opening
+Requirements by slide position:
 
-Requirements:
+[First slide - presentation opening]
 - Write based on actual content of slide images
 - Introduce slide content attractively with greetings
 - Create a compelling first impression for the audience
 - Present the overall direction of the presentation
 
-Presentation script (exactly two sentences):"""
-                else:  # korean
-                    user_prompt = f"""발표의 첫 번째 슬라이드에 대한 발표 스크립트를 작성해주세요.
-
-슬라이드 정보:
-- 슬라이드 번호: {slide_num}번째 (첫 번째 슬라이드)
-- 발표 시작 부분
-
-요구사항:
-- 슬라이드 이미지의 실제 내용을 바탕으로 작성
-- 인사말과 함께 슬라이드 내용을 매력적으로 소개
-- 청중의 관심을 끄는 첫인상 만들기
-- 발표의 전체적인 방향성 제시
-
-발표 스크립트 (정확히 두 문장):"""
-            elif is_last_slide:
-                # 마지막 슬라이드: 발표 마무리
-                if language == "english":
-                    user_prompt = f"""Write a presentation script for the last slide of the presentation.
-
-Previous slide content:
-{previous_script}
-
-Current slide information:
-- Slide number: {slide_num} (Last slide)
-- Presentation conclusion
+[Middle slide - natural connection with previous content]
+- Write based on actual content of slide images
+- Logical transition connecting with previous content
+- Use connecting words like "Next", "Now", "Additionally", "Furthermore"
+- Clear introduction of new content
+- Natural expressions that maintain presentation flow
 
-Requirements:
+[Last slide - presentation conclusion]
 - Write based on actual content of slide images
 - Naturally conclude the previous content
 - Use concluding expressions like "Finally", "In conclusion", "To summarize"
 - Include closing remarks ("Thank you for your attention", "Thank you" etc.)
 - End the presentation with gratitude to the audience
 
-Presentation script (exactly two sentences):"""
-                else:  # korean
-                    user_prompt = f"""발표의 마지막 슬라이드에 대한 발표 스크립트를 작성해주세요.
+Output format rules:
+- Output only the script text the presenter will read aloud (no title, no "Script:" label, no quotation marks around the script, no explanations, no markdown)
+- Write one paragraph of exactly two sentences, without bullet points, numbered lists or line breaks
+- The script is read by a speech synthesizer, so avoid symbols that are hard to read aloud, such as parentheses, slashes, arrows, ampersands and emoji
+- Write numbers and units the way they should be spoken when it helps clarity (for example "3.5 percent", "twenty twenty-four", "ten million dollars")
+- Keep well-known abbreviations as they are, and add a short explanation the first time a less familiar one appears (for example "an API, an application programming interface")
+- Never invent numbers or facts that are not on the slide; if the slide content is unclear, describe the visible title and key terms
+- Keep each sentence short enough to follow when heard once, roughly thirty words or fewer
+- Avoid repeating "This slide shows" or "As you can see on the screen" on every slide
+- When previous slide content is given, do not reuse its wording or sentence structure
 
-이전 슬라이드 내용:
-{previous_script}
+[Near-duplicate slide - progressive builds and similar slides]
+- Applies when the user message includes the script already used for a similar slide
+- Do not repeat that script; briefly continue from it and focus on what is likely newly added or highlighted
+- When slide text is provided, find the items that the earlier script did not mention and build the explanation around them
+- Keep the presentation flow natural, and if the user message says it is the last slide, end the presentation with a closing remark
 
-현재 슬라이드 정보:
-- 슬라이드 번호: {slide_num}번째 (마지막 슬라이드)
-- 발표 마무리 부분
+[Several slides in one request]
+- Applies only when the user message contains several consecutive slides at once
+- Write one script per slide following the rules above, and make each script connect naturally to the one before it
+- The first slide of the presentation opens with a greeting and presents the overall direction
+- The last slide of the presentation concludes with closing remarks such as "Thank you for your attention"
+- Other slides use connecting words like "Next", "Now", "Additionally" to continue from the previous slide
+- Exactly two sentences per slide
+- Respond only with JSON in this format: {"scripts": [{"slide": <slide number>, "script": "<script>"}, ...]}
+- When only one slide is requested, respond with the plain script text and no JSON
 
-요구사항:
+Examples from a fictional presentation titled "Results of Our Workflow Automation Program" (for format reference only; never copy their content):
+[First slide example]
+Hello everyone, today I will walk you through the results of the workflow automation program we have run over the past year. We will start with why we began, then look at what changed in each team, and finish with our plans for next year.
+[Middle slide example]
+Next, let us look at how processing times changed in each team after automation. The finance team in particular cut its month-end closing from five days to just two.
+[Near-duplicate slide example]
+The customer support team's results have now been added to the chart. Their average response time dropped by half, and customer satisfaction rose along with it.
+[Last slide example]
+Finally, next year we plan to extend automation to sales and human resources workflows. Thank you very much for your attention.
+[Several-slides response example]
+{"scripts": [{"slide": 4, "script": "Now let us look at the difficulties we faced during the rollout. The biggest challenge was connecting the new tools to our existing systems."}, {"slide": 5, "script": "To solve this, we chose a gradual, step-by-step migration. As a result, we moved every team to the new system without interrupting daily work."}]}"""
+        else:  # korean
+            return self.get_system_prompt(language) + """
+
+슬라이드 위치별 요구사항:
+
+[첫 번째 슬라이드 - 발표 시작 부분]
+- 슬라이드 이미지의 실제 내용을 바탕으로 작성
+- 인사말과 함께 슬라이드 내용을 매력적으로 소개
+- 청중의 관심을 끄는 첫인상 만들기
+- 발표의 전체적인 방향성 제시
+
+[중간 슬라이드 - 이전 내용과의 자연스러운 연결 필요]
+- 슬라이드 이미지의 실제 내용을 바탕으로 작성
+- 이전 내용과 논리적으로 연결되는 전환
+- "다음으로", "이제", "또한", "더 나아가" 등의 연결어 활용
+- 새로운 내용에 대한 명확한 소개
+- 발표의 흐름을 유지하는 자연스러운 표현
+
+[마지막 슬라이드 - 발표 마무리 부분]
 - 슬라이드 이미지의 실제 내용을 바탕으로 작성
 - 이전 내용을 자연스럽게 마무리
 - "마지막으로", "결론적으로", "요약하면" 등의 마무리 표현 활용
 - 발표 마무리 인사말 포함 ("발표를 마치겠습니다", "감사합니다" 등)
 - 청중에게 감사 인사와 함께 발표 종료
 
-발표 스크립트 (정확히 두 문장):"""
-            else:
-                # 중간 슬라이드: 이전 내용과 자연스럽게 연결
-                if language == "english":
-                    user_prompt = f"""Write a presentation script for the {slide_num}th slide of the presentation.
+출력 형식 규칙:
+- 발표자가 그대로 읽을 스크립트 본문만 출력 (제목, "스크립트:" 같은 머리말, 스크립트를 감싸는 따옴표, 설명, 마크다운 금지)
+- 글머리표·번호 목록·줄바꿈 없이 정확히 두 문장으로 된 한 문단으로 작성
+- 음성 합성으로 읽히므로 괄호, 슬래시, 화살표, 앰퍼샌드, 이모지 등 소리 내어 읽기 어려운 기호 사용 금지
+- 숫자와 단위는 읽기 쉽게 표기 (예: "3.5퍼센트", "2024년", "10억 원", "5일에서 2일로")
+- 널리 쓰이는 영어 약어는 그대로 쓰고, 익숙하지 않은 약어는 처음 나올 때 짧은 설명을 덧붙임 (예: "API, 즉 응용 프로그램 인터페이스")
+- 슬라이드에 없는 수치나 사실을 지어내지 않기, 내용이 불분명하면 보이는 제목과 핵심어를 중심으로 설명
+- 한 문장은 대략 60자 이내로, 청중이 한 번 듣고 이해할 수 있는 길이 유지
+- "이 슬라이드는", "화면에 보시는 것처럼" 같은 표현을 슬라이드마다 반복하지 않기
+- 이전 슬라이드 내용이 주어지면 같은 표현과 문장 구조를 되풀이하지 않기
+- 존댓말(합니다체)을 일관되게 사용하고, 반말이나 지나치게 딱딱한 문어체는 피하기
+
+[거의 동일한 슬라이드 - 점진적 공개 등]
+- 사용자 메시지에 유사한 슬라이드에 사용한 스크립트가 함께 주어지는 경우에 적용
+- 그 스크립트를 반복하지 않고, 이어서 새로 추가되거나 강조된 부분에 집중해 간결하게 설명
+- 슬라이드 텍스트가 주어지면 앞 스크립트에서 다루지 않은 항목을 찾아 그 내용을 중심으로 설명
+- 발표의 흐름을 자연스럽게 유지하고, 마지막 슬라이드라고 주어지면 마무리 인사로 발표 종료
+
+[여러 슬라이드를 한 번에 요청하는 경우]
+- 사용자 메시지에 연속된 슬라이드 여러 장이 함께 주어진 경우에만 적용
+- 위 규칙에 따라 슬라이드마다 스크립트를 하나씩 작성하고, 각 스크립트가 앞 스크립트와 자연스럽게 이어지도록 작성
+- 발표의 첫 번째 슬라이드는 인사말과 함께 발표의 전체적인 방향성 제시
+- 발표의 마지막 슬라이드는 "발표를 마치겠습니다", "감사합니다" 등 마무리 인사 포함
+- 나머지 슬라이드는 "다음으로", "이제", "또한" 등의 연결어로 앞 내용과 연결
+- 슬라이드마다 정확히 두 문장
+- 반드시 다음 형식의 JSON으로만 응답: {"scripts": [{"slide": <슬라이드 번호>, "script": "<스크립트>"}, ...]}
+- 슬라이드 한 장만 요청한 경우에는 JSON 없이 스크립트 본문만 응답
+
+예시 (가상의 "사내 업무 자동화 도입 성과" 발표, 형식 참고용이며 내용을 따라 쓰지 말 것):
+[첫 번째 슬라이드 예시]
+안녕하세요, 오늘은 지난 1년간 추진한 사내 업무 자동화 도입 성과를 말씀드리겠습니다. 먼저 도입 배경을 짚어 본 뒤, 부서별 변화와 앞으로의 계획 순서로 진행하겠습니다.
+[중간 슬라이드 예시]
+다음으로, 자동화 이후 부서별 처리 시간이 어떻게 달라졌는지 살펴보겠습니다. 특히 재무팀은 월말 결산에 걸리던 시간이 5일에서 2일로 크게 줄었습니다.
+[거의 동일한 슬라이드 예시]
+여기에 고객 지원팀의 결과가 새로 추가되었습니다. 문의 응답 시간이 절반으로 줄면서, 고객 만족도도 함께 올라갔습니다.
+[마지막 슬라이드 예시]
+마지막으로, 내년에는 자동화 범위를 영업과 인사 업무까지 넓혀 나갈 계획입니다. 지금까지 발표를 들어 주셔서 감사합니다.
+[여러 슬라이드 요청 응답 예시]
+{"scripts": [{"slide": 4, "script": "이제 도입 과정에서 겪었던 어려움을 짚어 보겠습니다. 가장 큰 과제는 기존 시스템과의 연동이었습니다."}, {"slide": 5, "script": "이 문제를 해결하기 위해 저희는 단계별 전환 방식을 택했습니다. 덕분에 업무 중단 없이 모든 팀이 새 시스템으로 옮겨 갈 수 있었습니다."}]}"""
+    
+    def build_slide_messages(
+        self,
+        slide_num: int,
+        slide_image_path: str,
+        is_first_slide: bool = False,
+        is_last_slide: bool = False,
+        previous_script: str = "",
+        language: str = "korean",
+        slide_layout: Optional[dict] = None
+    ) -> list:
+        """슬라이드 1장에 대한 스크립트 생성 요청 메시지 구성 (텍스트 전용 또는 Vision)
+        
+        고정 접두부(get_prompt_prefix) 뒤에 슬라이드별 내용만 붙입니다.
+        """
+        if language == "english":
+            position = "First slide" if is_first_slide else "Last slide" if is_last_slide else "Middle slide"
+            user_prompt = f"""Write a presentation script for slide {slide_num} of the presentation.
+
+Slide information:
+- Slide number: {slide_num} ({position})
+- Follow the requirements for the {position.lower()}"""
+            if not is_first_slide:
+                user_prompt += f"""
 
 Previous slide content:
-{previous_script}
+{previous_script}"""
+            closing = "\n\nPresentation script (exactly two sentences):"
+        else:  # korean
+            position = "첫 번째 슬라이드" if is_first_slide else "마지막 슬라이드" if is_last_slide else "중간 슬라이드"
+            user_prompt = f"""발표의 {slide_num}번째 슬라이드에 대한 발표 스크립트를 작성해주세요.
 
-Current slide information:
-- Slide number: {slide_num}
-- Natural connection with previous content needed
+슬라이드 정보:
+- 슬라이드 번호: {slide_num}번째 ({position})
+- {position} 요구사항에 따라 작성"""
+            if not is_first_slide:
+                user_prompt += f"""
+
+이전 슬라이드 내용:
+{previous_script}"""
+            closing = "\n\n발표 스크립트 (정확히 두 문장):"
+        
+        if self.use_text_prompt(slide_layout):
+            print(f"📝 슬라이드 {slide_num}: 텍스트 레이어 기반 스크립트 생성")
+            user_content = user_prompt + self.format_slide_text(slide_layout, language) + closing
+        else:
+            # 이미지를 base64로 인코딩 (Vision 모드에서만)
+            user_content = [
+                {"type": "text", "text": user_prompt + closing},
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": self.encode_image_data_url(slide_image_path)
+                    }
+                }
+            ]
+        
+        return [
+            {"role": "system", "content": self.get_prompt_prefix(language)},
+            {"role": "user", "content": user_content}
+        ]
+    
+    async def generate_script_for_slide(
+        self, 
+        slide_num: int, 
+        slide_image_path: str, 
+        is_first_slide: bool = False, 
+        is_last_slide: bool = False,
+        previous_script: str = "",
+        language: str = "korean",
+        slide_layout: Optional[dict] = None,
+        force_regenerate: bool = False,
+        task_id: Optional[str] = None
+    ) -> str:
+        """슬라이드 번호와 이미지를 기반으로 발표 스크립트를 생성하는 함수
+        
+        텍스트 레이어가 충분한 슬라이드는 이미지 대신 추출된 텍스트만 전송합니다.
+        같은 내용·언어·역할·이전 스크립트에 대해 생성된 스크립트가 캐시에 있으면 재사용하며,
+        force_regenerate이면 캐시를 조회하지 않고 새로 생성해 캐시를 갱신합니다.
+        """
+        try:
+            role = "first" if is_first_slide else "last" if is_last_slide else "middle"
+            route = self.route_slide(slide_image_path, slide_layout, is_first_slide, is_last_slide)
+            cache_key = self.get_script_cache_key(
+                "single", slide_image_path, slide_layout, language, role, previous_script, route=route
+            )
+            cached_script = self.get_cached_script(cache_key, slide_num, force_regenerate)
+            if cached_script:
+                return cached_script
+            
+            # Azure OpenAI API 호출 (텍스트 전용 또는 Vision 기능 사용)
+            try:
+                messages = self.build_slide_messages(
+                    slide_num, slide_image_path, is_first_slide, is_last_slide,
+                    previous_script, language, slide_layout
+                )
+                
+                response = await self.create_chat_completion(messages, route=route, task_id=task_id)
+                script = response.choices[0].message.content.strip()
+                # API로 생성된 스크립트만 캐시 (기본 스크립트는 저장하지 않음)
+                self.script_cache.set(cache_key, script)
+            except Exception as api_error:
+                print(f"⚠️ Azure OpenAI API 오류: {api_error}")
+                # API 오류 시 기본 스크립트 사용
+                script = self.get_fallback_script(slide_num, is_first_slide, is_last_slide, language)
+            
+            return script
+            
+        except Exception as e:
+            print(f"❌ 스크립트 생성 실패: {e}")
+            return self.get_fallback_script(slide_num, is_first_slide, is_last_slide, language)
+    
+    async def stream_script_sentences(
+        self,
+        slide_num: int,
+        slide_image_path: str,
+        is_first_slide: bool = False,
+        is_last_slide: bool = False,
+        previous_script: str = "",
+        language: str = "korean",
+        slide_layout: Optional[dict] = None,
+        force_regenerate: bool = False,
+        task_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """generate_script_for_slide의 스트리밍 버전: 스크립트를 생성하면서 완성된 문장부터 반환
+        
+        캐시·프롬프트는 일반 경로와 같으며, 캐시 적중 시에는 캐시된 스크립트를 문장 단위로 나눠 반환합니다.
+        첫 문장 전에 오류가 나면 일반 경로(기본 스크립트 포함)로 대체하고,
+        문장을 보낸 뒤 스트림이 끊기면 그때까지의 문장만 사용합니다.
+        """
+        role = "first" if is_first_slide else "last" if is_last_slide else "middle"
+        emitted = []
+        try:
+            route = self.route_slide(slide_image_path, slide_layout, is_first_slide, is_last_slide)
+            cache_key = self.get_script_cache_key(
+                "single", slide_image_path, slide_layout, language, role, previous_script, route=route
+            )
+            cached_script = self.get_cached_script(cache_key, slide_num, force_regenerate)
+            if cached_script:
+                sentences, rest = self.split_sentences(cached_script)
+                for sentence in sentences + ([rest.strip()] if rest.strip() else []):
+                    yield sentence
+                return
+            
+            messages = self.build_slide_messages(
+                slide_num, slide_image_path, is_first_slide, is_last_slide,
+                previous_script, language, slide_layout
+            )
+            
+            buffer = ""
+            async for delta in self.stream_chat_completion(messages, route=route, task_id=task_id):
+                buffer += delta
+                sentences, buffer = self.split_sentences(buffer)
+                for sentence in sentences:
+                    emitted.append(sentence)
+                    yield sentence
+            if buffer.strip():
+                emitted.append(buffer.strip())
+                yield buffer.strip()
+            if not emitted:
+                raise ValueError("빈 스크립트 응답")
+            
+            self.script_cache.set(cache_key, " ".join(emitted))
+        
+        except Exception as api_error:
+            if emitted:
+                print(f"⚠️ 슬라이드 {slide_num}: 스트리밍 중단, 수신한 {len(emitted)}개 문장만 사용 ({api_error})")
+                return
+            print(f"⚠️ 스트리밍 스크립트 생성 실패, 일반 경로로 대체: {api_error}")
+            script = await self.generate_script_for_slide(
+                slide_num, slide_image_path, is_first_slide, is_last_slide, previous_script, language,
+                slide_layout, force_regenerate, task_id
+            )
+            sentences, rest = self.split_sentences(script)
+            for sentence in sentences + ([rest.strip()] if rest.strip() else []):
+                yield sentence
+    
+    async def generate_continuation_script(
+        self,
+        slide_num: int,
+        slide_image_path: str,
+        reference_script: str,
+        is_last_slide: bool = False,
+        previous_script: str = "",
+        language: str = "korean",
+        slide_layout: Optional[dict] = None,
+        force_regenerate: bool = False,
+        task_id: Optional[str] = None
+    ) -> str:
+        """이전 슬라이드와 거의 같은 슬라이드(점진적 공개 등)에 대한 텍스트 전용 연속 스크립트 생성
+        
+        이미지를 보내지 않으므로 Vision 호출보다 요청 크기와 지연 시간이 작습니다.
+        API 오류 시에는 일반 Vision 경로로 대체합니다.
+        """
+        if language == "english":
+            closing = "\n- This is the last slide, so end the presentation with a closing remark" if is_last_slide else ""
+            user_prompt = f"""Slide {slide_num} is almost identical to a slide that was already presented (for example, a progressive build that adds one bullet).
+
+Script already used for the similar slide:
+{reference_script}
+
+Previous slide content:
+{previous_script}
 
 Requirements:
-- Write based on actual content of slide images
-- Logical transition connecting with previous content
-- Use connecting words like "Next", "Now", "Additionally", "Furthermore"
-- Clear introduction of new content
-- Natural expressions that maintain presentation flow
+- Follow the near-duplicate slide rules{closing}
 
 Presentation script (exactly two sentences):"""
-                else:  # korean
-                    user_prompt = f"""발표의 {slide_num}번째 슬라이드에 대한 발표 스크립트를 작성해주세요.
+        else:  # korean
+            closing = "\n- 마지막 슬라이드이므로 마무리 인사로 발표 종료" if is_last_slide else ""
+            user_prompt = f"""{slide_num}번째 슬라이드는 앞서 발표한 슬라이드와 거의 동일합니다 (예: 항목이 하나씩 추가되는 점진적 공개).
+
+유사한 슬라이드에 사용한 스크립트:
+{reference_script}
 
 이전 슬라이드 내용:
 {previous_script}
 
-현재 슬라이드 정보:
-- 슬라이드 번호: {slide_num}번째
-- 이전 내용과의 자연스러운 연결 필요
-
 요구사항:
-- 슬라이드 이미지의 실제 내용을 바탕으로 작성
-- 이전 내용과 논리적으로 연결되는 전환
-- "다음으로", "이제", "또한", "더 나아가" 등의 연결어 활용
-- 새로운 내용에 대한 명확한 소개
-- 발표의 흐름을 유지하는 자연스러운 표현
+- 거의 동일한 슬라이드 규칙에 따라 작성{closing}
 
 발표 스크립트 (정확히 두 문장):"""
+        
+        # 텍스트 레이어가 있으면 새로 추가된 내용을 알 수 있도록 함께 전달
+        if slide_layout and slide_layout.get("text"):
+            user_prompt += self.format_slide_text(slide_layout, language)
+        
+        try:
+            route = self.route_slide(slide_image_path, slide_layout, False, is_last_slide)
+            cache_key = self.get_script_cache_key(
+                "continuation", slide_image_path, slide_layout, language,
+                "last" if is_last_slide else "middle", previous_script,
+                ScriptCache.hash_text(reference_script), route
+            )
+            cached_script = self.get_cached_script(cache_key, slide_num, force_regenerate)
+            if cached_script:
+                return cached_script
             
-            # Azure OpenAI API 호출 (Vision 기능 사용)
-            try:
-                messages = [
-                    {"role": "system", "content": system_prompt},
-                    {
-                        "role": "user", 
-                        "content": [
-                            {"type": "text", "text": user_prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{base64_image}"
-                                }
-                            }
-                        ]
-                    }
-                ]
+            messages = [
+                {"role": "system", "content": self.get_prompt_prefix(language)},
+                {"role": "user", "content": user_prompt}
+            ]
+            
+            response = await self.create_chat_completion(messages, route=route, task_id=task_id)
+            script = response.choices[0].message.content.strip()
+            self.script_cache.set(cache_key, script)
+            return script
+        except Exception as api_error:
+            print(f"⚠️ 연속 스크립트 생성 실패, Vision 경로로 대체: {api_error}")
+            return await self.generate_script_for_slide(
+                slide_num, slide_image_path, False, is_last_slide, previous_script, language, slide_layout,
+                force_regenerate, task_id
+            )
+    
+    async def generate_scripts_batch(
+        self,
+        slides: List[dict],
+        total_slides: int,
+        previous_script: str = "",
+        language: str = "korean",
+        force_regenerate: bool = False,
+        task_id: Optional[str] = None
+    ) -> List[str]:
+        """여러 슬라이드의 스크립트를 한 번의 요청으로 생성 (JSON 응답)
+        
+        slides의 각 항목은 slide_num, image_path, layout(선택)을 가집니다.
+        시스템 프롬프트와 요청 왕복을 슬라이드 K개가 공유하므로 요청 수와 반복 프롬프트 토큰이 1/K로 줄어듭니다.
+        응답 파싱에 실패하면 슬라이드별 호출로 대체합니다.
+        앞쪽부터 캐시에 있는 슬라이드는 재사용하고 나머지만 요청합니다.
+        모든 슬라이드가 단순할 때만 작은 배포로 보냅니다.
+        """
+        route = "light" if all(
+            self.route_slide(
+                slide["image_path"], slide.get("layout"), slide["slide_num"] == 1, slide["slide_num"] == total_slides
+            ) == "light"
+            for slide in slides
+        ) else "strong"
+        
+        cached_scripts = []
+        while not force_regenerate and len(cached_scripts) < len(slides):
+            slide = slides[len(cached_scripts)]
+            cache_key = self.get_script_cache_key(
+                "batch", slide["image_path"], slide.get("layout"), language,
+                self.get_batch_role(slide["slide_num"], total_slides), previous_script, route=route
+            )
+            cached_script = self.get_cached_script(cache_key, slide["slide_num"])
+            if not cached_script:
+                break
+            cached_scripts.append(cached_script)
+            previous_script = cached_script
+        
+        slides = slides[len(cached_scripts):]
+        if not slides:
+            return cached_scripts
+        
+        if len(slides) == 1:
+            slide = slides[0]
+            return cached_scripts + [await self.generate_script_for_slide(
+                slide["slide_num"], slide["image_path"], slide["slide_num"] == 1,
+                slide["slide_num"] == total_slides, previous_script, language, slide.get("layout"),
+                force_regenerate, task_id
+            )]
+        
+        slide_nums = [slide["slide_num"] for slide in slides]
+        try:
+            if language == "english":
+                header = f"""Write presentation scripts for slides {slide_nums[0]}-{slide_nums[-1]} of a {total_slides}-slide presentation.
+
+Previous slide content:
+{previous_script or "(none - this is the start of the presentation)"}
+
+Requirements:
+- Follow the rules for several slides in one request and respond in JSON"""
+            else:  # korean
+                header = f"""전체 {total_slides}장 발표 중 {slide_nums[0]}~{slide_nums[-1]}번째 슬라이드의 발표 스크립트를 작성해주세요.
+
+이전 슬라이드 내용:
+{previous_script or "(없음 - 발표 시작 부분)"}
+
+요구사항:
+- 여러 슬라이드를 한 번에 요청하는 경우의 규칙에 따라 JSON으로 응답"""
+            
+            content = [{"type": "text", "text": header}]
+            for slide in slides:
+                slide_num = slide["slide_num"]
+                if slide_num == 1:
+                    role = " (first slide)" if language == "english" else " (첫 번째 슬라이드)"
+                elif slide_num == total_slides:
+                    role = " (last slide)" if language == "english" else " (마지막 슬라이드)"
+                else:
+                    role = ""
+                label = f"Slide {slide_num}{role}:" if language == "english" else f"{slide_num}번째 슬라이드{role}:"
                 
-                response = self.client.chat.completions.create(
-                    messages=messages,
-                    model=os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT", "gpt-4o"),
-                    max_tokens=200,
-                    temperature=0.7,
-                    top_p=0.95
-                )
-                script = response.choices[0].message.content.strip()
-            except Exception as api_error:
-                print(f"⚠️ Azure OpenAI API 오류: {api_error}")
-                # API 오류 시 기본 스크립트 사용
-                if is_first_slide:
-                    script = f"안녕하세요. {slide_num}번째 슬라이드에 대해 발표하겠습니다. 이 내용은 중요한 포인트를 포함하고 있습니다."
-                elif is_last_slide:
-                    script = f"마지막으로 {slide_num}번째 슬라이드에 대해 살펴보겠습니다. 발표를 마치겠습니다. 감사합니다."
+                if self.use_text_prompt(slide.get("layout")):
+                    content.append({"type": "text", "text": label + self.format_slide_text(slide["layout"], language)})
                 else:
-                    script = f"다음으로 {slide_num}번째 슬라이드에 대해 살펴보겠습니다. 이 부분도 중요한 내용입니다."
+                    content.append({"type": "text", "text": label})
+                    content.append({
+                        "type": "image_url",
+                        "image_url": {"url": self.encode_image_data_url(slide["image_path"])}
+                    })
             
-            return script
+            messages = [
+                {"role": "system", "content": self.get_prompt_prefix(language)},
+                {"role": "user", "content": content}
+            ]
+            response = await self.create_chat_completion(
+                messages,
+                max_tokens=200 * len(slides),
+                route=route,
+                task_id=task_id,
+                response_format={"type": "json_object"}
+            )
+            scripts = self.parse_batch_scripts(response.choices[0].message.content, slide_nums)
+            print(f"✅ 슬라이드 {slide_nums[0]}~{slide_nums[-1]} 배치 스크립트 생성 완료 ({len(slides)}개)")
             
+            # 슬라이드별로 (직전 스크립트 기준) 캐시 저장
+            for slide, script in zip(slides, scripts):
+                self.script_cache.set(self.get_script_cache_key(
+                    "batch", slide["image_path"], slide.get("layout"), language,
+                    self.get_batch_role(slide["slide_num"], total_slides), previous_script, route=route
+                ), script)
+                previous_script = script
+            return cached_scripts + scripts
+        
         except Exception as e:
-            print(f"❌ 스크립트 생성 실패: {e}")
-            if is_last_slide:
-                return f"마지막으로 {slide_num}번째 슬라이드의 내용을 발표합니다. 발표를 마치겠습니다. 감사합니다."
+            print(f"⚠️ 배치 스크립트 생성 실패, 슬라이드별 생성으로 대체: {e}")
+            scripts = []
+            for slide in slides:
+                script = await self.generate_script_for_slide(
+                    slide["slide_num"], slide["image_path"], slide["slide_num"] == 1,
+                    slide["slide_num"] == total_slides, previous_script, language, slide.get("layout"),
+                    force_regenerate, task_id
+                )
+                scripts.append(script)
+                previous_script = script
+            return cached_scripts + scripts
+    
+    def get_batch_role(self, slide_num: int, total_slides: int) -> str:
+        """배치 안에서 슬라이드 역할 (캐시 키용)"""
+        return "first" if slide_num == 1 else "last" if slide_num == total_slides else "middle"
+    
+    def parse_batch_scripts(self, content: str, slide_nums: List[int]) -> List[str]:
+        """배치 응답 JSON에서 슬라이드 순서대로 스크립트 추출 (형식이 맞지 않으면 ValueError)"""
+        data = json.loads(content)
+        items = data.get("scripts") if isinstance(data, dict) else data
+        if not isinstance(items, list) or len(items) != len(slide_nums):
+            raise ValueError(f"스크립트 개수 불일치: {len(items) if isinstance(items, list) else 0} != {len(slide_nums)}")
+        
+        by_slide = {}
+        for position, item in enumerate(items):
+            if isinstance(item, str):
+                slide_num, script = slide_nums[position], item
             else:
-                return f"{slide_num}번째 슬라이드의 내용을 발표합니다."
+                slide_num, script = int(item.get("slide", slide_nums[position])), item.get("script", "")
+            by_slide[slide_num] = str(script).strip()
+        
+        scripts = [by_slide.get(slide_num, "") for slide_num in slide_nums]
+        if not all(scripts):
+            raise ValueError("비어 있거나 누락된 스크립트가 있습니다.")
+        return scripts
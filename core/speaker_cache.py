@@ -0,0 +1,128 @@
+"""
+화자 조건(reference encoding) 캐시 모듈
+"""
+
+import os
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+class SpeakerConditioningCache:
+    """화자 참조 음성의 인코딩 결과 캐시 클래스
+    
+    상주 VibeVoice 워커 안에서 (화자 음성 해시, 모델)을 키로 참조 음성 파형과 인코딩된 음향 특징을 보관해,
+    같은 화자의 다음 슬라이드와 다음 작업은 참조 음성 인코딩을 건너뜁니다.
+    메모리 사용량이 한도를 넘으면 가장 오래 사용되지 않은 항목부터 내보내고,
+    SPEAKER_CACHE_DIR를 지정하면 디스크에도 저장해 워커가 다시 시작돼도 재사용합니다.
+    """
+    
+    def __init__(self):
+        self.max_bytes = int(float(os.getenv("SPEAKER_CACHE_MAX_MB", "256")) * 1024 * 1024)
+        self.cache_dir = os.getenv("SPEAKER_CACHE_DIR", "")
+        self.enabled = self.max_bytes > 0
+        self._entries = OrderedDict()  # 키 → (값, 크기)
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        if self.enabled and self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def size_of(value: Any) -> int:
+        """numpy 배열·torch 텐서(및 그 dict/list/tuple)의 메모리 크기 (바이트)"""
+        if isinstance(value, dict):
+            return sum(SpeakerConditioningCache.size_of(item) for item in value.values())
+        if isinstance(value, (list, tuple)):
+            return sum(SpeakerConditioningCache.size_of(item) for item in value)
+        if hasattr(value, "nbytes"):
+            return int(value.nbytes)
+        if hasattr(value, "element_size") and hasattr(value, "nelement"):
+            return int(value.element_size() * value.nelement())
+        return 0
+    
+    def _disk_path(self, key: tuple) -> str:
+        name = hashlib.sha256("|".join(str(part) for part in key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.pkl")
+    
+    def get(self, key: tuple) -> Optional[Any]:
+        """캐시 항목 반환 (메모리 → 디스크 순, 없으면 None)"""
+        if not self.enabled:
+            return None
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        
+        if self.cache_dir:
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    value = pickle.load(f)
+                self.disk_hits += 1
+                self._store(key, value)
+                return value
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"⚠️ 화자 캐시 파일 읽기 실패: {e}")
+        
+        self.misses += 1
+        return None
+    
+    def put(self, key: tuple, value: Any):
+        """캐시 항목 저장 (디스크 저장은 선택)"""
+        if not self.enabled:
+            return
+        self._store(key, value)
+        
+        if self.cache_dir:
+            try:
+                path = self._disk_path(key)
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                with open(temp_path, "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, path)
+            except Exception as e:
+                print(f"⚠️ 화자 캐시 파일 저장 실패: {e}")
+    
+    def _store(self, key: tuple, value: Any):
+        """메모리에 저장 후 한도를 넘으면 LRU 삭제"""
+        size = self.size_of(value)
+        if size > self.max_bytes:
+            return
+        
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._current_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._current_bytes += size
+            
+            while self._current_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._current_bytes -= evicted_size
+                self.evictions += 1
+    
+    def get_stats(self) -> dict:
+        """캐시 사용량·적중률"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "size_mb": round(self._current_bytes / 1024 / 1024, 1),
+            "max_mb": round(self.max_bytes / 1024 / 1024, 1),
+            "disk": bool(self.cache_dir),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0
+        }
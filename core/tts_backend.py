@@ -0,0 +1,698 @@
+"""
+TTS 백엔드 모듈
+"""
+
+import os
+import json
+import math
+import asyncio
+import hashlib
+import uuid
+import shutil
+import subprocess
+import tempfile
+import numpy as np
+from abc import ABC, abstractmethod
+from collections import Counter
+import soundfile as sf
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from .audio_buffer import AudioBuffer
+from .background_tasks import BackgroundTaskSet
+from .vibevoice_engine import ResidentWorker, ModelAffinityScheduler, WORKER_SCRIPT
+
+# CPU 복제본 실행기: torch 스레드 수를 고정한 뒤 VibeVoice 데모 스크립트 실행
+CPU_REPLICA_LAUNCHER = (
+    "import os, sys, runpy, torch; "
+    "torch.set_num_threads(int(sys.argv[1])); torch.set_num_interop_threads(1); "
+    "sys.argv = sys.argv[2:]; sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0]))); "
+    "runpy.run_path(sys.argv[0], run_name='__main__')"
+)
+
+class TTSBackend(ABC):
+    """TTS 백엔드 인터페이스
+    
+    synthesize(텍스트, 화자 음성)는 합성한 오디오를 메모리 버퍼(AudioBuffer, 길이 포함)로 반환하고,
+    실패하면 None을 반환합니다. 파일 저장 여부는 호출하는 쪽이 정합니다.
+    동시에 실행할 수 있는 합성 수는 max_concurrency로 제한합니다.
+    synthesize_batch는 batch_key가 같은 요청 여러 개를 한 번에 합성하며, 기본 구현은 요청별 synthesize입니다.
+    """
+    
+    name = "base"
+    max_concurrency = 1
+    # 요청마다 모델을 새로 로드하는지 (문장 단위 합성처럼 작은 요청이 많으면 로드 비용이 반복됨)
+    loads_model_per_request = False
+    _slots = None
+    
+    def get_slots(self) -> asyncio.Semaphore:
+        """동시 합성 수 제한용 세마포어 (이벤트 루프가 실행된 뒤에 생성)"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(1, self.max_concurrency))
+        return self._slots
+    
+    def check_status(self) -> dict:
+        """백엔드 상태 확인"""
+        return {"status": "ready", "backend": self.name}
+    
+    @abstractmethod
+    async def synthesize(
+        self,
+        text: str,
+        speaker_audio_path: str,
+        quality_mode: str = "presentation"
+    ) -> Optional[AudioBuffer]:
+        """텍스트를 화자 음성으로 합성 (실패하면 None)"""
+    
+    def batch_key(self, quality_mode: str) -> tuple:
+        """같은 배치로 묶을 수 있는 요청의 기준 (모델, 생성 설정)"""
+        return (quality_mode,)
+    
+    async def prewarm(self, quality_mode: str):
+        """곧 필요한 모델을 미리 준비 (기본 구현은 아무것도 하지 않음)"""
+        return None
+    
+    async def synthesize_batch(
+        self,
+        texts: List[str],
+        speaker_audio_paths: List[str],
+        quality_mode: str = "presentation"
+    ) -> List[Optional[AudioBuffer]]:
+        return list(await asyncio.gather(*[
+            self.synthesize(text, speaker_audio_path, quality_mode)
+            for text, speaker_audio_path in zip(texts, speaker_audio_paths)
+        ]))
+
+class VibeVoiceBackend(TTSBackend):
+    """VibeVoice 데모 스크립트를 하위 프로세스로 실행하는 백엔드"""
+    
+    name = "vibevoice"
+    
+    def __init__(self, vibevoice_dir: str):
+        self.vibevoice_dir = vibevoice_dir
+        self.voices_dir = os.path.join(self.vibevoice_dir, "demo", "voices")
+        os.makedirs(self.voices_dir, exist_ok=True)
+        # 동시에 실행할 VibeVoice 프로세스 수 (GPU 메모리에 맞춰 조정, 호출마다 화자 파일이 달라 서로 겹치지 않음)
+        self.max_concurrency = int(os.getenv("VIBEVOICE_MAX_CONCURRENCY", "1"))
+        # 프로세스 1회 실행 제한 시간 (초)
+        self.timeout_seconds = float(os.getenv("VIBEVOICE_TIMEOUT_SECONDS", "600"))
+        # CPU 추론 복제본 풀 (0이면 사용 안 함, auto면 코어 수 / VIBEVOICE_THREADS_PER_REPLICA)
+        self.cpu_replica_cores = self.plan_cpu_replicas(
+            os.getenv("VIBEVOICE_CPU_REPLICAS", "0"),
+            int(os.getenv("VIBEVOICE_THREADS_PER_REPLICA", "4"))
+        )
+        self._free_replicas = None
+        # 상주 워커 모드: 모델과 화자 조건 캐시를 프로세스에 유지 (CPU 복제본마다, GPU는 장치당 하나)
+        self.resident = os.getenv("VIBEVOICE_RESIDENT", "false").lower() == "true"
+        self.loads_model_per_request = not self.resident
+        self.workers = {}  # 복제본 번호 또는 장치 → ResidentWorker
+        self.demand = Counter()  # (모델, CPU 최적화) → 대기·실행 중인 상주 워커 요청 수
+        self.background_tasks = BackgroundTaskSet()  # 대기열 진입 시 시작한 미리 로드 태스크
+        self.schedulers = {}  # 장치 → ModelAffinityScheduler
+        # 같은 모델이 올라와 있는 워커에 요청을 먼저 배정할 때 앞선 요청이 밀릴 수 있는 최대 횟수
+        self.affinity_max_skips = int(os.getenv("VIBEVOICE_AFFINITY_MAX_SKIPS", "4"))
+        self._speaker_hashes = {}  # (경로, 수정 시각, 크기) → 해시
+        # cpu_optimized 품질 모드의 CPU 최적화 방식 (auto/int8/bf16/none, 상주 워커 모드에서만 적용)
+        self.cpu_optimization = os.getenv("VIBEVOICE_CPU_OPTIMIZATION", "auto").lower()
+    
+    def plan_cpu_replicas(self, replicas: str, threads_per_replica: int) -> List[List[int]]:
+        """사용 가능한 코어를 복제본 수만큼 연속된 코어 묶음으로 나눔"""
+        if hasattr(os, "sched_getaffinity"):
+            cores = sorted(os.sched_getaffinity(0))
+        else:
+            cores = list(range(os.cpu_count() or 1))
+        
+        if replicas == "auto":
+            count = len(cores) // max(1, threads_per_replica)
+        else:
+            count = int(replicas or 0)
+        count = min(count, len(cores))
+        if count <= 0:
+            return []
+        
+        # 나누어떨어지지 않으면 일부 복제본이 코어를 하나 더 가짐
+        plan = [cores[i * len(cores) // count:(i + 1) * len(cores) // count] for i in range(count)]
+        print(f"🧵 VibeVoice CPU 복제본 {count}개: " + ", ".join(f"#{i} {len(c)}코어" for i, c in enumerate(plan)))
+        return plan
+    
+    def get_free_replicas(self) -> asyncio.Queue:
+        """비어 있는 복제본 번호 큐 (이벤트 루프가 실행된 뒤에 생성)"""
+        if self._free_replicas is None:
+            self._free_replicas = asyncio.Queue()
+            for replica in range(len(self.cpu_replica_cores)):
+                self._free_replicas.put_nowait(replica)
+        return self._free_replicas
+    
+    @asynccontextmanager
+    async def acquire_worker(self, device: str):
+        """실행 슬롯 확보
+        
+        CPU 복제본 풀을 쓰는 경우 먼저 비는 복제본 번호를, 그 외에는 None을 돌려줍니다.
+        여러 작업의 슬라이드가 같은 큐에서 복제본을 나눠 쓰므로 코어 수만큼 처리량이 늘어납니다.
+        """
+        if device != "cpu" or not self.cpu_replica_cores:
+            async with self.get_slots():
+                yield None
+            return
+        
+        free_replicas = self.get_free_replicas()
+        replica = await free_replicas.get()
+        try:
+            yield replica
+        finally:
+            free_replicas.put_nowait(replica)
+    
+    def build_launch_options(self, cmd: List[str], replica: Optional[int]) -> dict:
+        """복제본에 맞춘 실행 명령·환경변수·CPU 고정 설정"""
+        if replica is None:
+            return {"cmd": cmd, "env": None, "preexec_fn": None}
+        
+        cores = self.cpu_replica_cores[replica]
+        threads = str(len(cores))
+        env = {
+            **os.environ,
+            "OMP_NUM_THREADS": threads,
+            "MKL_NUM_THREADS": threads,
+            "OPENBLAS_NUM_THREADS": threads
+        }
+        return {
+            "cmd": [cmd[0], "-c", CPU_REPLICA_LAUNCHER, threads, *cmd[1:]],
+            "env": env,
+            "preexec_fn": lambda: os.sched_setaffinity(0, cores)
+        }
+    
+    def check_status(self) -> dict:
+        """VibeVoice 상태 확인"""
+        try:
+            import torch
+            
+            # VibeVoice 디렉토리 존재 확인
+            if not os.path.exists(self.vibevoice_dir):
+                return {"status": "error", "backend": self.name, "message": "VibeVoice 디렉토리를 찾을 수 없습니다."}
+            
+            # 데모 스크립트 존재 확인
+            demo_script = os.path.join(self.vibevoice_dir, "demo", "inference_from_file.py")
+            if not os.path.exists(demo_script):
+                return {"status": "error", "backend": self.name, "message": "VibeVoice 데모 스크립트를 찾을 수 없습니다."}
+            
+            # GPU 사용 가능 여부
+            gpu_available = torch.cuda.is_available()
+            
+            return {
+                "status": "ready",
+                "backend": self.name,
+                "message": "VibeVoice 준비 완료",
+                "gpu_available": gpu_available,
+                "device": "cuda" if gpu_available else "cpu",
+                "cpu_replicas": [
+                    {"replica": i, "cores": len(cores)} for i, cores in enumerate(self.cpu_replica_cores)
+                ],
+                "cpu_replicas_busy": (
+                    len(self.cpu_replica_cores) - self._free_replicas.qsize()
+                    if self._free_replicas is not None else 0
+                ),
+                "resident": self.resident,
+                "resident_workers": [worker.get_stats() for worker in self.workers.values()],
+                "resident_scheduling": {
+                    device: scheduler.get_stats() for device, scheduler in self.schedulers.items()
+                }
+            }
+        
+        except Exception as e:
+            return {"status": "error", "backend": self.name, "message": f"VibeVoice 상태 확인 실패: {str(e)}"}
+    
+    def get_quality_parameters(self, quality_mode: str = "presentation") -> dict:
+        """품질 모드에 따른 VibeVoice 파라미터 설정"""
+        import torch
+        
+        # 기본 설정들
+        base_params = {
+            "model_path": "vibevoice/VibeVoice-1.5B",  # 안정성을 위해 1.5B 사용
+            "device": "cuda" if torch.cuda.is_available() else "cpu",
+            "cfg_scale": 1.3,  # CFG 스케일 (기본값)
+            "cpu_optimization": "none"  # CPU 추론 최적화 (cpu_optimized 모드에서만 사용)
+        }
+        
+        if quality_mode == "presentation":
+            # 발표용 최적화 설정
+            return {
+                **base_params,
+                "cfg_scale": 1.5,  # 높은 CFG로 더 명확한 음성
+            }
+        
+        elif quality_mode == "high_quality":
+            # 최고 품질 설정 (느리지만 고품질)
+            return {
+                **base_params,
+                "model_path": "vibevoice/VibeVoice-7B",  # 더 큰 모델 사용
+                "cfg_scale": 1.8,  # 매우 높은 CFG로 최고 품질
+            }
+        
+        elif quality_mode == "fast":
+            # 빠른 생성 설정
+            return {
+                **base_params,
+                "cfg_scale": 1.1,  # 낮은 CFG로 빠른 생성
+            }
+        
+        elif quality_mode == "stable_korean":
+            # 한국어 안정성 최적화 설정 (메모리 문제 해결을 위해 1.5B 사용)
+            return {
+                **base_params,
+                "model_path": "vibevoice/VibeVoice-1.5B",  # 메모리 문제 해결
+                "cfg_scale": 1.6,  # 높은 CFG로 안정성 확보
+            }
+        
+        elif quality_mode == "cpu_optimized":
+            # GPU 없는 노드용 CPU 최적화 설정 (상주 워커에서 int8 동적 양자화 또는 bf16, 스레드 조정 적용)
+            return {
+                **base_params,
+                "device": "cpu",
+                "cfg_scale": 1.3,
+                "cpu_optimization": self.cpu_optimization,
+            }
+        
+        else:
+            # 기본 설정
+            return {
+                **base_params,
+                "cfg_scale": 1.3,
+            }
+    
+    def batch_key(self, quality_mode: str) -> tuple:
+        quality_params = self.get_quality_parameters(quality_mode)
+        return (quality_params["model_path"], quality_params["cfg_scale"], quality_params["cpu_optimization"])
+    
+    def prepare_speaker(self, speaker_audio_path: str, speaker_voice_file: str) -> bool:
+        """화자 음성을 VibeVoice 입력 형식(24kHz)으로 변환해 저장"""
+        import librosa
+        try:
+            audio, sr = librosa.load(speaker_audio_path, sr=24000)
+            sf.write(speaker_voice_file, audio, 24000)
+            print(f"✅ 음성 파일 전처리 완료")
+            return True
+        except Exception as e:
+            print(f"❌ 음성 파일 전처리 실패: {e}")
+            return False
+    
+    def hash_speaker(self, speaker_audio_path: str) -> str:
+        """화자 음성 내용 해시 (같은 파일은 다시 읽지 않음)"""
+        stat = os.stat(speaker_audio_path)
+        key = (os.path.abspath(speaker_audio_path), stat.st_mtime_ns, stat.st_size)
+        if key not in self._speaker_hashes:
+            digest = hashlib.sha256()
+            with open(speaker_audio_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            self._speaker_hashes[key] = digest.hexdigest()
+        return self._speaker_hashes[key]
+    
+    def get_worker(self, device: str, replica: Optional[int]) -> ResidentWorker:
+        """복제본(또는 장치)의 상주 워커 (없으면 생성, 프로세스는 첫 요청 때 시작)"""
+        key = replica if replica is not None else device
+        worker = self.workers.get(key)
+        if worker is None:
+            label = f"CPU 복제본 #{replica}" if replica is not None else device
+            launch = self.build_launch_options(["python", WORKER_SCRIPT], replica)
+            worker = self.workers[key] = ResidentWorker(launch, self.vibevoice_dir, label)
+        return worker
+    
+    def get_device_workers(self, device: str) -> List[ResidentWorker]:
+        """장치에서 요청을 받을 수 있는 모든 상주 워커"""
+        if device == "cpu" and self.cpu_replica_cores:
+            return [self.get_worker(device, replica) for replica in range(len(self.cpu_replica_cores))]
+        return [self.get_worker(device, None)]
+    
+    def get_scheduler(self, device: str) -> ModelAffinityScheduler:
+        """장치의 상주 워커 슬롯 배정기 (CPU 복제본 풀이면 복제본마다 슬롯 하나)"""
+        if device not in self.schedulers:
+            if device == "cpu" and self.cpu_replica_cores:
+                slots = list(range(len(self.cpu_replica_cores)))
+            else:
+                slots = [None]
+            self.schedulers[device] = ModelAffinityScheduler(slots, self.affinity_max_skips)
+        return self.schedulers[device]
+    
+    async def prewarm_model(self, quality_params: dict):
+        """모델이 없는 워커에 백그라운드 로드 요청 (다른 대기 요청이 쓰는 모델은 내리지 않음)"""
+        model = (quality_params["model_path"], quality_params["cpu_optimization"])
+        device = quality_params["device"]
+        keep = [list(other) for other, count in self.demand.items() if count > 0 and other != model]
+        workers = [worker for worker in self.get_device_workers(device) if not worker.has_model(model)]
+        if not workers:
+            return
+        print(f"🔥 VibeVoice 모델 미리 로드 요청: {model[0]} (최적화 {model[1]}, 워커 {len(workers)}개)")
+        await asyncio.gather(*[
+            worker.prewarm(model, device, keep, self.timeout_seconds) for worker in workers
+        ])
+    
+    async def prewarm(self, quality_mode: str):
+        """작업이 곧 사용할 품질 모드의 모델을 상주 워커에 미리 로드 (상주 모드가 아니면 무시)"""
+        if not self.resident:
+            return
+        try:
+            await self.prewarm_model(self.get_quality_parameters(quality_mode))
+        except Exception as e:
+            print(f"⚠️ VibeVoice 모델 미리 로드 실패: {e}")
+    
+    async def run_resident(self, items: List[dict], quality_params: dict) -> Optional[dict]:
+        """실행 슬롯의 상주 워커로 요청 전송
+        
+        대기열에 들어가는 즉시 이 모델이 없는 워커에 미리 로드를 요청해, 앞 요청이 끝나기를 기다리는 동안 로드가 진행됩니다.
+        슬롯은 같은 모델이 올라와 있는 워커에 먼저 배정됩니다.
+        """
+        device = quality_params["device"]
+        model = (quality_params["model_path"], quality_params["cpu_optimization"])
+        scheduler = self.get_scheduler(device)
+        has_model = lambda slot, model: self.get_worker(device, slot).has_model(model)
+        self.demand[model] += 1
+        try:
+            self.background_tasks.spawn(self.prewarm_model(quality_params), "VibeVoice 모델 미리 로드")
+            replica = await scheduler.acquire(model, has_model)
+            try:
+                return await self.get_worker(device, replica).request({
+                    "model_path": model[0],
+                    "device": device,
+                    "optimization": model[1],
+                    "cfg_scale": quality_params["cfg_scale"],
+                    "items": items
+                }, self.timeout_seconds)
+            finally:
+                scheduler.release(replica, has_model)
+        finally:
+            self.demand[model] -= 1
+            if self.demand[model] <= 0:
+                del self.demand[model]
+    
+    async def run_process(self, cmd: List[str], device: str) -> Optional[tuple]:
+        """실행 슬롯을 확보해 VibeVoice 명령 실행 후 (반환 코드, stdout, stderr) 반환 (시간 초과 시 None)"""
+        process = None
+        try:
+            async with self.acquire_worker(device) as replica:
+                launch = self.build_launch_options(cmd, replica)
+                replica_text = f" (CPU 복제본 #{replica})" if replica is not None else ""
+                print(f"🚀 VibeVoice 실행 중{replica_text}... (시간이 오래 걸릴 수 있습니다)")
+                print(f"📋 실행 명령어: {' '.join(cmd)}")
+                
+                process = await asyncio.create_subprocess_exec(
+                    *launch["cmd"], cwd=self.vibevoice_dir, env=launch["env"], preexec_fn=launch["preexec_fn"],
+                    stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+                )
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=self.timeout_seconds)
+                return process.returncode, stdout, stderr
+        
+        except (subprocess.TimeoutExpired, asyncio.TimeoutError):
+            if process is not None and process.returncode is None:
+                process.kill()
+            print(f"⏰ VibeVoice 실행 시간 초과 ({self.timeout_seconds:.0f}초)")
+            print("💡 해결 방법:")
+            print("   1. 더 작은 모델 사용 (fast 모드)")
+            print("   2. 텍스트를 더 짧게 나누기")
+            print("   3. GPU 메모리 확인")
+            return None
+    
+    async def synthesize(
+        self,
+        text: str,
+        speaker_audio_path: str,
+        quality_mode: str = "presentation"
+    ) -> Optional[AudioBuffer]:
+        """VibeVoice로 음성 합성
+        
+        비동기 하위 프로세스로 실행되므로 합성 중에도 이벤트 루프(스크립트 스트리밍, 상태 조회)가 멈추지 않습니다.
+        """
+        if self.resident:
+            return (await self.synthesize_batch([text], [speaker_audio_path], quality_mode))[0]
+        
+        try:
+            # 품질 모드에 따른 파라미터 설정
+            quality_params = self.get_quality_parameters(quality_mode)
+            print(f"🎛️ 품질 설정: {quality_mode} 모드")
+            if quality_params["cpu_optimization"] != "none":
+                print("⚠️ CPU 최적화는 상주 워커 모드(VIBEVOICE_RESIDENT=true)에서만 적용됩니다. fp32로 실행합니다.")
+            
+            # 임시 파일들 생성
+            temp_text_file = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8')
+            formatted_text = f"Speaker 1: {text}"
+            temp_text_file.write(formatted_text)
+            temp_text_file.close()
+            
+            # voices 디렉토리에 호출별 화자 파일 복사 (동시 실행 시 서로 덮어쓰지 않도록 고유 이름 사용)
+            speaker_name = f"presenter_{uuid.uuid4().hex[:8]}"
+            speaker_voice_file = os.path.join(self.voices_dir, f"{speaker_name}.wav")
+            
+            # 호출마다 별도 출력 디렉토리 (생성 파일은 버퍼로 읽은 뒤 삭제)
+            output_dir = tempfile.mkdtemp(prefix="vibevoice_")
+            print(f"📁 VibeVoice 출력 디렉토리: {output_dir}")
+            
+            # VibeVoice 명령어 구성
+            cmd = [
+                "python", "demo/inference_from_file.py",
+                "--model_path", quality_params["model_path"],
+                "--txt_path", temp_text_file.name,
+                "--speaker_names", speaker_name,
+                "--output_dir", output_dir,
+                "--device", quality_params["device"],
+                "--cfg_scale", str(quality_params["cfg_scale"])
+            ]
+            
+            # 음성 파일 전처리 (24kHz로 변환)
+            if not self.prepare_speaker(speaker_audio_path, speaker_voice_file):
+                return None
+            
+            result = await self.run_process(cmd, quality_params["device"])
+            if result is None:
+                return None
+            returncode, stdout, stderr = result
+            
+            if returncode != 0:
+                print(f"❌ VibeVoice 실행 실패:")
+                print(f"   Return code: {returncode}")
+                print(f"   Error output: {stderr.decode('utf-8', errors='replace')}")
+                print(f"   Standard output: {stdout.decode('utf-8', errors='replace')}")
+                return None
+            
+            # VibeVoice가 생성하는 파일명 예측
+            txt_filename = os.path.splitext(os.path.basename(temp_text_file.name))[0]
+            expected_filename = f"{txt_filename}_generated.wav"
+            expected_path = os.path.join(output_dir, expected_filename)
+            
+            # 예상 파일이 존재하는지 확인
+            if os.path.exists(expected_path):
+                source_path = expected_path
+                print(f"✅ VibeVoice 생성 파일 발견: {expected_filename}")
+            else:
+                # 예상 파일이 없으면 디렉토리에서 _generated.wav 파일 찾기
+                output_files = [f for f in os.listdir(output_dir) if f.endswith('_generated.wav')]
+                if output_files:
+                    # 가장 최근 파일 선택
+                    latest_file = max(output_files, key=lambda x: os.path.getctime(os.path.join(output_dir, x)))
+                    source_path = os.path.join(output_dir, latest_file)
+                    print(f"✅ 대체 파일 사용: {latest_file}")
+                else:
+                    print("❌ 생성된 오디오 파일을 찾을 수 없습니다.")
+                    return None
+            
+            # 생성 파일을 한 번만 디코딩해 메모리 버퍼로 전달
+            return AudioBuffer.from_file(source_path)
+        
+        except Exception as e:
+            print(f"❌ VibeVoice 합성 실패: {e}")
+            return None
+        finally:
+            # 임시 파일 정리
+            try:
+                if 'temp_text_file' in locals():
+                    os.unlink(temp_text_file.name)
+                    print(f"🗑️ 임시 파일 정리: {temp_text_file.name}")
+                if 'output_dir' in locals():
+                    shutil.rmtree(output_dir, ignore_errors=True)
+                if 'speaker_voice_file' in locals() and os.path.exists(speaker_voice_file):
+                    os.unlink(speaker_voice_file)
+            except Exception as cleanup_error:
+                print(f"⚠️ 임시 파일 정리 실패: {cleanup_error}")
+    
+    async def synthesize_batch(
+        self,
+        texts: List[str],
+        speaker_audio_paths: List[str],
+        quality_mode: str = "presentation"
+    ) -> List[Optional[AudioBuffer]]:
+        """여러 요청을 배치 추론 스크립트로 한 번에 합성 (1건이면 데모 스크립트, 상주 모드면 상주 워커 사용)"""
+        if self.resident:
+            return await self.synthesize_resident(texts, speaker_audio_paths, quality_mode)
+        if len(texts) == 1:
+            return [await self.synthesize(texts[0], speaker_audio_paths[0], quality_mode)]
+        
+        results = [None] * len(texts)
+        work_dir = tempfile.mkdtemp(prefix="vibevoice_batch_")
+        try:
+            quality_params = self.get_quality_parameters(quality_mode)
+            print(f"🎛️ 품질 설정: {quality_mode} 모드 (배치 {len(texts)}건)")
+            if quality_params["cpu_optimization"] != "none":
+                print("⚠️ CPU 최적화는 상주 워커 모드(VIBEVOICE_RESIDENT=true)에서만 적용됩니다. fp32로 실행합니다.")
+            
+            items = []
+            for n, (text, speaker_audio_path) in enumerate(zip(texts, speaker_audio_paths)):
+                speaker_voice_file = os.path.join(work_dir, f"speaker_{n}.wav")
+                if not self.prepare_speaker(speaker_audio_path, speaker_voice_file):
+                    return results
+                items.append({
+                    "text": text,
+                    "speaker_path": speaker_voice_file,
+                    "output_path": os.path.join(work_dir, f"output_{n}.wav")
+                })
+            
+            manifest_path = os.path.join(work_dir, "batch.json")
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump(items, f, ensure_ascii=False)
+            
+            cmd = [
+                "python", os.path.join(os.path.dirname(os.path.abspath(__file__)), "vibevoice_batch_inference.py"),
+                "--manifest", manifest_path,
+                "--model_path", quality_params["model_path"],
+                "--device", quality_params["device"],
+                "--cfg_scale", str(quality_params["cfg_scale"])
+            ]
+            
+            result = await self.run_process(cmd, quality_params["device"])
+            if result is None:
+                return results
+            returncode, stdout, stderr = result
+            if returncode != 0:
+                print(f"❌ VibeVoice 배치 실행 실패 (Return code: {returncode})")
+                print(f"   Error output: {stderr.decode('utf-8', errors='replace')}")
+                return results
+            
+            for n, item in enumerate(items):
+                if os.path.exists(item["output_path"]):
+                    results[n] = AudioBuffer.from_file(item["output_path"])
+            return results
+        
+        except Exception as e:
+            print(f"❌ VibeVoice 배치 합성 실패: {e}")
+            return results
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    async def synthesize_resident(
+        self,
+        texts: List[str],
+        speaker_audio_paths: List[str],
+        quality_mode: str = "presentation"
+    ) -> List[Optional[AudioBuffer]]:
+        """상주 워커로 합성 (화자 음성은 해시와 함께 원본 경로로 넘겨 워커가 한 번만 인코딩)"""
+        results = [None] * len(texts)
+        work_dir = tempfile.mkdtemp(prefix="vibevoice_resident_")
+        try:
+            quality_params = self.get_quality_parameters(quality_mode)
+            print(f"🎛️ 품질 설정: {quality_mode} 모드 (상주 워커, {len(texts)}건)")
+            
+            items = [
+                {
+                    "text": text,
+                    "speaker_path": os.path.abspath(speaker_audio_path),
+                    "speaker_hash": self.hash_speaker(speaker_audio_path),
+                    "output_path": os.path.join(work_dir, f"output_{n}.wav")
+                }
+                for n, (text, speaker_audio_path) in enumerate(zip(texts, speaker_audio_paths))
+            ]
+            
+            response = await self.run_resident(items, quality_params)
+            if not response or not response.get("ok"):
+                return results
+            
+            for n, output_path in enumerate(response.get("outputs", [])):
+                if output_path and os.path.exists(output_path):
+                    results[n] = AudioBuffer.from_file(output_path)
+            return results
+        
+        except Exception as e:
+            print(f"❌ VibeVoice 상주 합성 실패: {e}")
+            return results
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+class StubTTSBackend(TTSBackend):
+    """GPU 없이 전체 파이프라인을 실행·측정하기 위한 결정적 스텁 백엔드
+    
+    텍스트 길이에 비례하는 길이의 오디오(텍스트 해시로 정한 낮은 음량의 사인파)를 생성합니다.
+    같은 텍스트는 항상 같은 오디오가 되므로 캐시·타이밍 측정을 반복해도 결과가 같습니다.
+    """
+    
+    name = "stub"
+    
+    def __init__(self):
+        self.sample_rate = 24000
+        # 글자당 발화 시간 (초), 한국어 발표 속도 기준
+        self.seconds_per_char = float(os.getenv("TTS_STUB_SECONDS_PER_CHAR", "0.12"))
+        # 오디오 길이 대비 합성 시간 비율 (0이면 즉시 반환, 1이면 실시간 속도 흉내)
+        self.realtime_factor = float(os.getenv("TTS_STUB_REALTIME_FACTOR", "0"))
+        # 동시 합성 수 (실제 백엔드의 용량을 흉내낼 때 조정)
+        self.max_concurrency = int(os.getenv("TTS_STUB_MAX_CONCURRENCY", "4"))
+    
+    def check_status(self) -> dict:
+        return {
+            "status": "ready",
+            "backend": self.name,
+            "message": "스텁 TTS 백엔드 (테스트·벤치마크용)",
+            "gpu_available": False,
+            "device": "cpu"
+        }
+    
+    def render(self, text: str) -> np.ndarray:
+        """텍스트에 대한 결정적 오디오 샘플"""
+        duration = max(0.5, len(text.strip()) * self.seconds_per_char)
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        frequency = 180 + digest[0] % 120  # 180~300Hz
+        
+        t = np.arange(int(duration * self.sample_rate), dtype=np.float32) / self.sample_rate
+        audio = 0.1 * np.sin(2 * math.pi * frequency * t)
+        # 클릭 방지용 페이드 인/아웃 (10ms)
+        fade = min(len(audio) // 2, self.sample_rate // 100)
+        if fade:
+            ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)
+            audio[:fade] *= ramp
+            audio[-fade:] *= ramp[::-1]
+        return audio.astype(np.float32)
+    
+    async def synthesize(
+        self,
+        text: str,
+        speaker_audio_path: str,
+        quality_mode: str = "presentation"
+    ) -> Optional[AudioBuffer]:
+        try:
+            audio = AudioBuffer(self.render(text), self.sample_rate)
+            if self.realtime_factor > 0:
+                async with self.get_slots():
+                    await asyncio.sleep(audio.duration * self.realtime_factor)
+            return audio
+        except Exception as e:
+            print(f"❌ 스텁 음성 합성 실패: {e}")
+            return None
+    
+    async def synthesize_batch(
+        self,
+        texts: List[str],
+        speaker_audio_paths: List[str],
+        quality_mode: str = "presentation"
+    ) -> List[Optional[AudioBuffer]]:
+        """배치 합성 흉내 (합성 시간은 배치에서 가장 긴 오디오 기준)"""
+        try:
+            audios = [AudioBuffer(self.render(text), self.sample_rate) for text in texts]
+            if self.realtime_factor > 0:
+                async with self.get_slots():
+                    await asyncio.sleep(max(audio.duration for audio in audios) * self.realtime_factor)
+            return audios
+        except Exception as e:
+            print(f"❌ 스텁 배치 합성 실패: {e}")
+            return [None] * len(texts)
+
+def create_tts_backend(name: Optional[str] = None) -> TTSBackend:
+    """TTS_BACKEND 환경변수(vibevoice/stub)에 맞는 백엔드 생성"""
+    name = (name or os.getenv("TTS_BACKEND", "vibevoice")).lower()
+    if name == "stub":
+        return StubTTSBackend()
+    if name != "vibevoice":
+        print(f"⚠️ 알 수 없는 TTS 백엔드 '{name}', VibeVoice 사용")
+    return VibeVoiceBackend(os.getenv("VIBEVOICE_DIR", "/home/devsy/workspace/VibeVoice"))
@@ -0,0 +1,95 @@
+"""
+TTS 동적 배칭 모듈
+"""
+
+import time
+import asyncio
+from typing import Optional
+from .audio_buffer import AudioBuffer
+from .tts_backend import TTSBackend
+from .background_tasks import BackgroundTaskSet
+
+class TTSBatcher:
+    """여러 작업의 합성 요청을 모아 한 번의 배치 생성으로 실행하는 동적 배처
+    
+    같은 batch_key(모델, cfg_scale)의 요청을 최대 max_batch_size개까지 모으고,
+    첫 요청이 들어온 뒤 max_wait_seconds가 지나면 모인 만큼만 실행해 추가 지연을 제한합니다.
+    결과는 요청별 future로 돌려줍니다.
+    """
+    
+    def __init__(self, backend: TTSBackend, max_batch_size: int, max_wait_seconds: float):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.pending = {}  # batch_key → [(텍스트, 화자 음성, 품질 모드, future, 도착 시각)]
+        self._timers = {}
+        self._batches = BackgroundTaskSet()
+        
+        # 지표
+        self.requests = 0
+        self.batches = 0
+        self.batched_requests = 0  # 2건 이상 배치로 처리된 요청 수
+        self.largest_batch = 0
+        self.total_wait_seconds = 0.0
+    
+    async def synthesize(self, text: str, speaker_audio_path: str, quality_mode: str) -> Optional[AudioBuffer]:
+        """요청을 대기열에 넣고 배치 실행 결과를 기다림"""
+        loop = asyncio.get_running_loop()
+        key = self.backend.batch_key(quality_mode)
+        future = loop.create_future()
+        self.requests += 1
+        
+        group = self.pending.setdefault(key, [])
+        group.append((text, speaker_audio_path, quality_mode, future, time.monotonic()))
+        if len(group) >= self.max_batch_size:
+            self.flush(key)
+        elif len(group) == 1:
+            self._timers[key] = loop.call_later(self.max_wait_seconds, self.flush, key)
+        
+        return await future
+    
+    def flush(self, key: tuple):
+        """모인 요청을 배치로 실행"""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        group = self.pending.pop(key, [])
+        if group:
+            self._batches.spawn(self.run_batch(group), "TTS 배치 실행")
+    
+    async def run_batch(self, group: list):
+        started_at = time.monotonic()
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(group))
+        if len(group) > 1:
+            self.batched_requests += len(group)
+            print(f"📦 TTS 배치 실행: {len(group)}건 (모델 설정 {self.backend.batch_key(group[0][2])})")
+        for _, _, _, _, arrived_at in group:
+            self.total_wait_seconds += started_at - arrived_at
+        
+        try:
+            results = await self.backend.synthesize_batch(
+                [text for text, _, _, _, _ in group],
+                [speaker_audio_path for _, speaker_audio_path, _, _, _ in group],
+                group[0][2]
+            )
+        except Exception as e:
+            print(f"❌ TTS 배치 실행 실패: {e}")
+            results = [None] * len(group)
+        
+        for (_, _, _, future, _), result in zip(group, results):
+            if not future.done():
+                future.set_result(result)
+    
+    def get_stats(self) -> dict:
+        """배칭 지표"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait_seconds * 1000),
+            "requests": self.requests,
+            "batches": self.batches,
+            "batched_requests": self.batched_requests,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "avg_queue_wait_ms": round(self.total_wait_seconds / self.requests * 1000, 1) if self.requests else 0.0
+        }
@@ -0,0 +1,67 @@
+"""
+VibeVoice 배치 추론 스크립트
+
+VibeVoiceBackend가 VibeVoice 디렉토리를 작업 디렉토리로 하여 하위 프로세스로 실행합니다.
+매니페스트의 여러 요청(텍스트, 화자 음성, 출력 경로)을 한 번의 배치 생성으로 합성합니다.
+
+사용법:
+    python vibevoice_batch_inference.py --manifest batch.json --model_path vibevoice/VibeVoice-1.5B \
+        --device cuda --cfg_scale 1.5
+"""
+
+import os
+import sys
+import json
+import argparse
+
+# VibeVoice 패키지를 작업 디렉토리(VibeVoice 체크아웃)에서 가져옴
+sys.path.insert(0, os.getcwd())
+
+import torch
+from vibevoice.modular.modeling_vibevoice_inference import VibeVoiceForConditionalGenerationInference
+from vibevoice.processor.vibevoice_processor import VibeVoiceProcessor
+
+def main():
+    parser = argparse.ArgumentParser(description="VibeVoice 배치 추론")
+    parser.add_argument("--manifest", required=True, help="[{text, speaker_path, output_path}, ...] JSON 파일")
+    parser.add_argument("--model_path", required=True)
+    parser.add_argument("--device", default="cuda")
+    parser.add_argument("--cfg_scale", type=float, default=1.3)
+    args = parser.parse_args()
+    
+    with open(args.manifest, encoding="utf-8") as f:
+        items = json.load(f)
+    
+    processor = VibeVoiceProcessor.from_pretrained(args.model_path)
+    model = VibeVoiceForConditionalGenerationInference.from_pretrained(
+        args.model_path,
+        torch_dtype=torch.bfloat16 if args.device == "cuda" else torch.float32,
+        device_map=args.device
+    )
+    model.eval()
+    model.set_ddpm_inference_steps(num_steps=10)
+    
+    inputs = processor(
+        text=[f"Speaker 1: {item['text']}" for item in items],
+        voice_samples=[[item["speaker_path"]] for item in items],
+        padding=True,
+        return_tensors="pt",
+        return_attention_mask=True
+    )
+    outputs = model.generate(
+        **inputs,
+        max_new_tokens=None,
+        cfg_scale=args.cfg_scale,
+        tokenizer=processor.tokenizer,
+        generation_config={"do_sample": False},
+        verbose=False
+    )
+    
+    # 요청 순서대로 출력 경로에 저장 (생성되지 않은 항목은 건너뜀)
+    for item, speech in zip(items, outputs.speech_outputs):
+        if speech is not None:
+            processor.save_audio(speech, output_path=item["output_path"])
+    print(f"✅ 배치 {len(items)}건 합성 완료")
+
+if __name__ == "__main__":
+    main()
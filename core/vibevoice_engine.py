@@ -0,0 +1,254 @@
+"""
+상주 VibeVoice 워커 프로세스 관리 모듈
+"""
+
+import os
+import json
+import asyncio
+from collections import deque
+from typing import List, Optional
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vibevoice_worker.py")
+RESPONSE_PREFIX = "@@VIBEVOICE_WORKER "
+
+class ResidentWorker:
+    """상주 워커 프로세스 하나와의 요청/응답 통신
+    
+    첫 요청 때 프로세스를 띄우고 이후 요청은 같은 프로세스(이미 로드된 모델과 화자 캐시)로 보냅니다.
+    응답은 요청 id로 짝지으므로, 합성이 진행 중이어도 미리 로드 요청을 바로 보낼 수 있습니다.
+    프로세스가 죽거나 시간 초과되면 종료시키고, 다음 요청 때 다시 띄웁니다.
+    워커가 보낸 모델 로드/축출 이벤트는 로그로 남기고 최근 이벤트를 상태 조회용으로 보관합니다.
+    """
+    
+    def __init__(self, launch: dict, cwd: str, label: str):
+        self.launch = launch
+        self.cwd = cwd
+        self.label = label
+        self.process = None
+        self.requests = 0
+        self.restarts = 0
+        self.last_stats = {}
+        self.resident_models = []
+        self.model_loads = 0
+        self.model_evictions = 0
+        self.recent_events = deque(maxlen=20)
+        self._pending = {}  # 요청 id → future
+        self._next_id = 0
+        self._reader = None
+        self._start_lock = None
+    
+    def get_start_lock(self) -> asyncio.Lock:
+        """프로세스 시작 직렬화용 락 (이벤트 루프가 실행된 뒤에 생성)"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        return self._start_lock
+    
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+    
+    def has_model(self, model: tuple) -> bool:
+        """(모델 경로, CPU 최적화)가 상주 중인지 (마지막 응답 기준)"""
+        return any(
+            (resident["model"], resident.get("optimization", "none")) == tuple(model)
+            for resident in self.resident_models
+        )
+    
+    async def start(self, timeout: float) -> bool:
+        """워커 프로세스를 띄우고 준비 응답을 기다림"""
+        async with self.get_start_lock():
+            if self.running:
+                return True
+            if self.process is not None:
+                self.restarts += 1
+                self.resident_models = []
+                print(f"🔁 VibeVoice 상주 워커 재시작: {self.label}")
+            
+            print(f"🚀 VibeVoice 상주 워커 시작: {self.label}")
+            self.process = await asyncio.create_subprocess_exec(
+                *self.launch["cmd"], cwd=self.cwd, env=self.launch["env"], preexec_fn=self.launch["preexec_fn"],
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+                limit=16 * 1024 * 1024
+            )
+            response = await asyncio.wait_for(self.read_response(), timeout=timeout)
+            if not response or not response.get("ready"):
+                return False
+            self._reader = asyncio.create_task(self.dispatch_responses())
+            return True
+    
+    async def read_response(self) -> Optional[dict]:
+        """응답 줄이 나올 때까지 stdout을 읽음 (라이브러리 출력은 무시, 프로세스 종료 시 None)"""
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                return None
+            text = line.decode("utf-8", errors="replace")
+            if text.startswith(RESPONSE_PREFIX):
+                return json.loads(text[len(RESPONSE_PREFIX):])
+    
+    async def dispatch_responses(self):
+        """응답을 요청 id별 future로 전달 (프로세스가 끝나면 남은 요청은 None)"""
+        try:
+            while True:
+                response = await self.read_response()
+                if response is None:
+                    break
+                self.record(response)
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except Exception as e:
+            print(f"❌ VibeVoice 상주 워커 응답 처리 실패: {e}")
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_result(None)
+            self._pending.clear()
+    
+    def record(self, response: dict):
+        """응답에 실린 상태와 모델 로드/축출 이벤트 반영"""
+        self.last_stats = response.get("speaker_cache", self.last_stats)
+        self.resident_models = response.get("resident_models", self.resident_models)
+        for event in response.get("events", []):
+            self.recent_events.append(event)
+            if event["event"] == "load":
+                self.model_loads += 1
+                print(
+                    f"📦 [{self.label}] 모델 로드: {event['model']} ({event['mb']}MB, 최적화 {event.get('applied')}, "
+                    f"{event.get('seconds')}초, {event.get('reason')})"
+                )
+            elif event["event"] == "evict":
+                self.model_evictions += 1
+                print(f"♻️ [{self.label}] 모델 축출: {event['model']} ({event['mb']}MB)")
+            else:
+                print(f"⚠️ [{self.label}] 모델 미리 로드 건너뜀: {event['model']} (예산 부족)")
+    
+    async def request(self, payload: dict, timeout: float) -> Optional[dict]:
+        """요청 하나를 보내고 응답 반환 (실패 시 None)"""
+        request_id = None
+        try:
+            if not await self.start(timeout):
+                print(f"❌ VibeVoice 상주 워커 시작 실패: {self.label}")
+                self.stop()
+                return None
+            
+            self._next_id += 1
+            request_id = self._next_id
+            future = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = future
+            if payload.get("op") != "prewarm":
+                self.requests += 1
+            
+            self.process.stdin.write((json.dumps({**payload, "id": request_id}, ensure_ascii=False) + "\n").encode("utf-8"))
+            await self.process.stdin.drain()
+            response = await asyncio.wait_for(future, timeout=timeout)
+            if response is None:
+                print(f"❌ VibeVoice 상주 워커 비정상 종료: {self.label} (code {self.process.returncode})")
+                return None
+            
+            if not response.get("ok"):
+                print(f"❌ VibeVoice 상주 워커 합성 실패: {response.get('error')}")
+            return response
+        
+        except asyncio.TimeoutError:
+            print(f"⏰ VibeVoice 상주 워커 응답 시간 초과 ({timeout:.0f}초): {self.label}")
+            self.stop()
+            return None
+        except Exception as e:
+            print(f"❌ VibeVoice 상주 워커 통신 실패: {e}")
+            self.stop()
+            return None
+        finally:
+            self._pending.pop(request_id, None)
+    
+    async def prewarm(self, model: tuple, device: str, keep: List[list], timeout: float) -> bool:
+        """(모델 경로, CPU 최적화)를 백그라운드에서 미리 로드하도록 요청 (keep의 모델은 내리지 않음)"""
+        if self.running and self.has_model(model):
+            return False
+        response = await self.request(
+            {"op": "prewarm", "model_path": model[0], "device": device, "optimization": model[1], "keep": keep}, timeout
+        )
+        return bool(response and response.get("prewarm_started"))
+    
+    def stop(self):
+        """워커 프로세스 종료"""
+        if self.running:
+            self.process.kill()
+    
+    def get_stats(self) -> dict:
+        return {
+            "worker": self.label,
+            "running": self.running,
+            "requests": self.requests,
+            "restarts": self.restarts,
+            "resident_models": self.resident_models,
+            "model_loads": self.model_loads,
+            "model_evictions": self.model_evictions,
+            "recent_model_events": list(self.recent_events),
+            "speaker_cache": self.last_stats
+        }
+
+class ModelAffinityScheduler:
+    """상주 워커 슬롯 배정기
+    
+    슬롯이 비면 그 워커에 이미 올라와 있는 모델을 쓰는 대기 요청을 먼저 배정해, 품질 모드가 섞인 요청이
+    번갈아 들어와도 모델을 매번 다시 로드하지 않게 합니다. 앞선 요청이 max_skips번 넘게 밀리면 그 요청을 먼저 배정합니다.
+    """
+    
+    def __init__(self, slots: list, max_skips: int):
+        self.free_slots = list(slots)
+        self.slot_count = len(slots)
+        self.max_skips = max_skips
+        self.waiters = []  # [모델, future, 밀린 횟수]
+        self.affinity_hits = 0
+        self.affinity_reorders = 0
+    
+    async def acquire(self, model: tuple, has_model) -> object:
+        """빈 슬롯 반환 (모델이 올라와 있는 슬롯 우선, 없으면 대기)"""
+        if self.free_slots:
+            slot = next((slot for slot in self.free_slots if has_model(slot, model)), self.free_slots[0])
+            self.free_slots.remove(slot)
+            if has_model(slot, model):
+                self.affinity_hits += 1
+            return slot
+        
+        future = asyncio.get_running_loop().create_future()
+        waiter = [model, future, 0]
+        self.waiters.append(waiter)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+            elif future.done() and not future.cancelled():
+                self.release(future.result(), has_model)
+            raise
+    
+    def release(self, slot, has_model):
+        """슬롯 반납 후 다음 대기 요청 배정"""
+        if not self.waiters:
+            self.free_slots.append(slot)
+            return
+        
+        chosen = 0
+        if self.waiters[0][2] < self.max_skips:
+            chosen = next(
+                (i for i, (model, _, _) in enumerate(self.waiters) if has_model(slot, model)), 0
+            )
+        for waiter in self.waiters[:chosen]:
+            waiter[2] += 1
+        if chosen:
+            self.affinity_reorders += 1
+        model, future, _ = self.waiters.pop(chosen)
+        if has_model(slot, model):
+            self.affinity_hits += 1
+        future.set_result(slot)
+    
+    def get_stats(self) -> dict:
+        return {
+            "slots": self.slot_count,
+            "busy": self.slot_count - len(self.free_slots),
+            "waiting": len(self.waiters),
+            "affinity_hits": self.affinity_hits,
+            "affinity_reorders": self.affinity_reorders
+        }
@@ -0,0 +1,459 @@
+"""
+VibeVoice 상주 추론 워커
+
+VibeVoiceBackend가 VIBEVOICE_RESIDENT=true일 때 VibeVoice 디렉토리를 작업 디렉토리로 하여 실행하는 상주 프로세스입니다.
+모델을 메모리 예산 안에서 상주시키고, stdin으로 받은 요청(JSON 한 줄)을 배치 생성으로 합성한 뒤 결과를 stdout에 한 줄로 돌려줍니다.
+라이브러리 출력과 구분하도록 응답 줄은 RESPONSE_PREFIX로 시작하고, 요청의 id를 그대로 돌려줍니다.
+
+합성 요청: {"id", "model_path", "device", "optimization", "cfg_scale", "items": [{"text", "speaker_path", "speaker_hash", "output_path"}, ...]}
+미리 로드 요청: {"id", "op": "prewarm", "model_path", "device", "optimization", "keep": [[비우면 안 되는 모델, 최적화], ...]}
+응답: {"id", "ok", "outputs", "error", "events": [로드/축출 이벤트], "resident_models", "speaker_cache"}
+"""
+
+import os
+import re
+import gc
+import sys
+import json
+import time
+import queue
+import warnings
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# VibeVoice 패키지를 작업 디렉토리(VibeVoice 체크아웃)에서 가져옴
+sys.path.insert(0, os.getcwd())
+
+import numpy as np
+import torch
+from vibevoice.modular.modeling_vibevoice_inference import VibeVoiceForConditionalGenerationInference
+from vibevoice.processor.vibevoice_processor import VibeVoiceProcessor
+from speaker_cache import SpeakerConditioningCache
+from vibevoice_engine import RESPONSE_PREFIX
+
+_stdout_lock = threading.Lock()
+
+def resolve_cpu_optimization(optimization: str) -> str:
+    """auto면 CPU가 bf16 연산을 지원할 때 bf16, 아니면 int8"""
+    if optimization != "auto":
+        return optimization
+    try:
+        if torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported():
+            return "bf16"
+    except Exception:
+        pass
+    return "int8"
+
+def optimize_for_cpu(model, optimization: str):
+    """CPU 추론 최적화 적용 후 모델 반환
+    
+    int8은 Linear 층을 동적 양자화(가중치 int8, 활성값은 실행 시 양자화)하고, bf16은 로드할 때 dtype으로 적용됩니다.
+    스레드 수는 고정된 코어 수(CPU 복제본이면 복제본의 코어) 또는 VIBEVOICE_CPU_THREADS에 맞추고,
+    VIBEVOICE_CPU_COMPILE=true이면 언어 모델과 확산 헤드를 torch.compile로 컴파일합니다.
+    """
+    threads = int(os.getenv("VIBEVOICE_CPU_THREADS", "0")) or len(os.sched_getaffinity(0))
+    torch.set_num_threads(threads)
+    torch.set_flush_denormal(True)
+    
+    if optimization == "int8":
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    
+    if os.getenv("VIBEVOICE_CPU_COMPILE", "false").lower() == "true":
+        inner = getattr(model, "model", None)
+        for name in ("language_model", "prediction_head"):
+            module = getattr(inner, name, None)
+            if module is None:
+                continue
+            try:
+                setattr(inner, name, torch.compile(module, dynamic=True))
+            except Exception as e:
+                print(f"⚠️ {name} 컴파일 실패, 그대로 사용: {e}", file=sys.stderr)
+    
+    print(f"⚙️ CPU 최적화 적용: {optimization}, 스레드 {threads}개", file=sys.stderr)
+    return model
+
+def respond(payload: dict):
+    with _stdout_lock:
+        sys.stdout.write(RESPONSE_PREFIX + json.dumps(payload, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+class SpeakerConditioningHook:
+    """모델의 참조 음성 인코딩(_process_speech_inputs)을 화자별 캐시로 감싸는 훅
+    
+    배치의 각 참조 음성 행을 (화자 해시, 모델) 키로 찾아, 캐시에 없는 행만 원래 인코더로 계산하고
+    행별 음향 특징과 연결층 출력을 다시 배치 형태로 조립합니다.
+    모델 구조가 예상과 다르면 원래 인코딩을 그대로 사용합니다.
+    """
+    
+    def __init__(self, model, model_path: str, cache: SpeakerConditioningCache):
+        self.model = model
+        self.model_path = model_path
+        self.cache = cache
+        self.keys = None  # 현재 배치의 행별 화자 해시
+        self.original = getattr(model, "_process_speech_inputs", None)
+        if self.original is None:
+            print("⚠️ 모델에 _process_speech_inputs가 없어 화자 조건 캐시를 사용하지 않습니다.", file=sys.stderr)
+        else:
+            model._process_speech_inputs = self.process_speech_inputs
+    
+    def process_speech_inputs(self, speech_tensors, speech_masks, speech_type="audio"):
+        keys = self.keys
+        if speech_type != "audio" or keys is None or len(keys) != speech_tensors.shape[0]:
+            return self.original(speech_tensors, speech_masks, speech_type)
+        
+        frames = speech_masks.sum(dim=1).tolist()
+        rows = [self.cache.get((speaker_hash, self.model_path, "conditioning")) for speaker_hash in keys]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        
+        if missing:
+            # 캐시에 없는 화자만 인코딩 후 행별로 잘라 저장
+            index = torch.tensor(missing, device=speech_tensors.device)
+            features, connected = self.original(
+                speech_tensors.index_select(0, index), speech_masks.index_select(0, index.to(speech_masks.device)),
+                speech_type
+            )
+            offset = 0
+            for n, i in enumerate(missing):
+                count = int(frames[i])
+                row = {
+                    "features": features[n, :count].detach().to("cpu", torch.float32).clone(),
+                    "connected": connected[offset:offset + count].detach().to("cpu", torch.float32).clone()
+                }
+                offset += count
+                rows[i] = row
+                self.cache.put((keys[i], self.model_path, "conditioning"), row)
+        
+        # 행별 결과를 배치 형태(패딩된 특징, 마스크 순서로 이어 붙인 연결층 출력)로 조립
+        reference = rows[0]["features"]
+        dtype, device = self.model.dtype, speech_tensors.device
+        features = torch.zeros(
+            (len(rows), speech_masks.shape[1], reference.shape[-1]), dtype=dtype, device=device
+        )
+        for i, row in enumerate(rows):
+            features[i, :row["features"].shape[0]] = row["features"].to(device, dtype)
+        connected = torch.cat([row["connected"] for row in rows]).to(device, dtype)
+        return features, connected
+
+class ResidentModel:
+    """상주 중인 모델 하나 (모델, 프로세서, 화자 조건 훅, 메모리 크기, CPU 최적화 방식)"""
+    
+    def __init__(self, model_path: str, device: str, optimization: str, applied: str, model, processor, hook, size_bytes: int):
+        self.model_path = model_path
+        self.device = device
+        self.optimization = optimization  # 요청한 방식 (auto 포함)
+        self.applied = applied  # 실제로 적용한 방식
+        self.model = model
+        self.processor = processor
+        self.hook = hook
+        self.size_bytes = size_bytes
+        self.in_use = 0
+        self.last_used = time.time()
+
+class ModelResidencyManager:
+    """메모리 예산 안에서 여러 모델(1.5B, 7B 등)을 상주시키는 관리자
+    
+    모델별 메모리 크기(파라미터·버퍼)를 집계해 VIBEVOICE_MODEL_MEMORY_BUDGET_MB를 넘으면
+    사용 중이 아닌 모델을 가장 오래 사용되지 않은 순서로 내립니다 (0이면 한 번에 하나만 상주).
+    미리 로드(prewarm)는 백그라운드 스레드에서 진행되며, 부모가 대기 요청이 있다고 알려준 모델은 내리지 않습니다.
+    로드/축출 이벤트는 다음 응답에 실어 보냅니다.
+    """
+    
+    def __init__(self, speaker_cache: SpeakerConditioningCache):
+        self.speaker_cache = speaker_cache
+        self.budget_bytes = int(float(os.getenv("VIBEVOICE_MODEL_MEMORY_BUDGET_MB", "0")) * 1024 * 1024)
+        self.models = OrderedDict()  # (모델 경로, 장치, 최적화) → ResidentModel (LRU 순서)
+        self.footprints = {}  # (모델 경로, 장치, 최적화) → 실제 로드 후 측정한 크기
+        self._loading = {}  # (모델 경로, 장치, 최적화) → threading.Event
+        self._lock = threading.Lock()
+        self._events = []
+    
+    def estimate_bytes(self, key: tuple) -> int:
+        """로드 전 메모리 크기 추정 (이전 측정값, 없으면 모델 이름의 파라미터 수 × dtype 크기)"""
+        if key in self.footprints:
+            return self.footprints[key]
+        model_path, device, optimization = key
+        match = re.search(r"(\d+(?:\.\d+)?)B", os.path.basename(model_path.rstrip("/")))
+        if not match:
+            return 0
+        # int8은 fp32로 로드한 뒤 양자화하므로 로드 중 최대 사용량은 fp32 기준
+        bytes_per_param = 2 if device == "cuda" or optimization == "bf16" else 4
+        return int(float(match.group(1)) * 1e9 * bytes_per_param)
+    
+    @staticmethod
+    def measure_bytes(model) -> int:
+        """state_dict 텐서(양자화된 가중치 포함)의 실제 메모리 크기"""
+        seen = set()
+        
+        def tensor_bytes(value) -> int:
+            if isinstance(value, (list, tuple)):
+                return sum(tensor_bytes(item) for item in value)
+            if not isinstance(value, torch.Tensor) or id(value) in seen:
+                return 0
+            seen.add(id(value))
+            return value.element_size() * value.nelement()
+        
+        return sum(tensor_bytes(value) for value in model.state_dict(keep_vars=True).values())
+    
+    def used_bytes(self) -> int:
+        return sum(resident.size_bytes for resident in self.models.values())
+    
+    def over_budget(self, key: tuple, needed_bytes: int) -> bool:
+        """needed_bytes를 더하면 예산 초과인지 (예산이 0이면 다른 모델이 하나라도 있으면 초과)"""
+        if self.budget_bytes <= 0:
+            return any(other != key for other in self.models)
+        return self.used_bytes() + needed_bytes > self.budget_bytes
+    
+    def record(self, event: str, key: tuple, size_bytes: int, **details):
+        event = {
+            "event": event,
+            "model": key[0],
+            "device": key[1],
+            "optimization": key[2],
+            "mb": round(size_bytes / 1024 / 1024, 1),
+            **details
+        }
+        self._events.append(event)
+    
+    def drain_events(self) -> list:
+        with self._lock:
+            events, self._events = self._events, []
+        return events
+    
+    def make_room(self, key: tuple, needed_bytes: int, keep: set, reason: str) -> bool:
+        """needed_bytes가 예산에 들어가도록 LRU 모델 축출 (keep과 사용 중인 모델 제외, 자리가 없으면 False)"""
+        evicted = False
+        with self._lock:
+            while self.over_budget(key, needed_bytes):
+                victim = next(
+                    (
+                        other for other, resident in self.models.items()
+                        if other != key and resident.in_use == 0 and (other[0], other[2]) not in keep
+                    ),
+                    None
+                )
+                if victim is None:
+                    break
+                resident = self.models.pop(victim)
+                self.record("evict", victim, resident.size_bytes, reason=reason)
+                evicted = True
+            fits = not self.over_budget(key, needed_bytes)
+        
+        if evicted:
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        return fits
+    
+    def load(
+        self, model_path: str, device: str, optimization: str, reason: str, keep: set = frozenset()
+    ) -> Optional[ResidentModel]:
+        """모델이 상주 중이 아니면 예산을 확보한 뒤 로드 (다른 스레드가 로드 중이면 완료를 기다림)
+        
+        미리 로드가 예산 부족으로 건너뛰어지면 None을 반환합니다.
+        """
+        key = (model_path, device, optimization)
+        while True:
+            with self._lock:
+                resident = self.models.get(key)
+                if resident is not None:
+                    self.models.move_to_end(key)
+                    return resident
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    break
+            # 다른 스레드의 로드가 끝나면 다시 확인 (실패·건너뜀이면 직접 로드)
+            loading.wait()
+        
+        try:
+            # 미리 로드는 대기 요청이 있는 모델을 내리지 않으며, 다른 모델과 함께 예산에 들어가지 않으면 건너뜀
+            fits = self.make_room(key, self.estimate_bytes(key), keep, reason)
+            if reason == "prewarm" and not fits and any(other != key for other in self.models):
+                self.record("prewarm_skipped", key, self.estimate_bytes(key), used_mb=round(self.used_bytes() / 1024 / 1024, 1))
+                return None
+            
+            started_at = time.monotonic()
+            applied = resolve_cpu_optimization(optimization) if device == "cpu" else "none"
+            processor = VibeVoiceProcessor.from_pretrained(model_path)
+            model = VibeVoiceForConditionalGenerationInference.from_pretrained(
+                model_path,
+                torch_dtype=torch.bfloat16 if device == "cuda" or applied == "bf16" else torch.float32,
+                device_map=device
+            )
+            model.eval()
+            model.set_ddpm_inference_steps(num_steps=10)
+            if applied != "none":
+                model = optimize_for_cpu(model, applied)
+            size_bytes = self.measure_bytes(model)
+            self.footprints[key] = size_bytes
+            
+            # 화자 조건 캐시는 최적화 방식마다 인코딩 결과가 달라 모델 키에 포함
+            cache_model = model_path if applied == "none" else f"{model_path}#{applied}"
+            resident = ResidentModel(
+                model_path, device, optimization, applied, model, processor,
+                SpeakerConditioningHook(model, cache_model, self.speaker_cache), size_bytes
+            )
+            with self._lock:
+                self.models[key] = resident
+                self.record(
+                    "load", key, size_bytes, reason=reason, applied=applied,
+                    seconds=round(time.monotonic() - started_at, 1)
+                )
+            
+            # 추정보다 크면 다른 모델을 더 내림
+            self.make_room(key, 0, keep, reason)
+            return resident
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            loading.set()
+    
+    def prewarm(self, model_path: str, device: str, optimization: str, keep: set) -> bool:
+        """백그라운드 스레드에서 모델 미리 로드 (이미 상주·로드 중이면 False)"""
+        key = (model_path, device, optimization)
+        with self._lock:
+            if key in self.models or key in self._loading:
+                return False
+        
+        def run():
+            try:
+                self.load(model_path, device, optimization, "prewarm", keep)
+            except Exception as e:
+                print(f"❌ 모델 미리 로드 실패: {model_path} ({e})", file=sys.stderr)
+        
+        threading.Thread(target=run, daemon=True).start()
+        return True
+    
+    def acquire(self, model_path: str, device: str, optimization: str) -> ResidentModel:
+        resident = self.load(model_path, device, optimization, "request")
+        with self._lock:
+            resident.in_use += 1
+            resident.last_used = time.time()
+        return resident
+    
+    def release(self, resident: ResidentModel):
+        with self._lock:
+            resident.in_use -= 1
+            resident.last_used = time.time()
+    
+    def get_stats(self) -> list:
+        with self._lock:
+            return [
+                {
+                    "model": resident.model_path,
+                    "device": resident.device,
+                    "optimization": resident.optimization,
+                    "applied": resident.applied,
+                    "mb": round(resident.size_bytes / 1024 / 1024, 1),
+                    "in_use": resident.in_use > 0,
+                    "last_used": round(resident.last_used, 1)
+                }
+                for resident in self.models.values()
+            ]
+
+class ResidentEngine:
+    """상주 모델과 화자 조건 캐시를 프로세스 수명 동안 보관하는 추론 엔진"""
+    
+    def __init__(self):
+        self.speaker_cache = SpeakerConditioningCache()
+        self.models = ModelResidencyManager(self.speaker_cache)
+    
+    def load_reference(self, speaker_path: str, speaker_hash: str) -> np.ndarray:
+        """화자 음성을 24kHz 모노 파형으로 (해시별 캐시, 모델과 무관)"""
+        key = (speaker_hash, "reference")
+        waveform = self.speaker_cache.get(key)
+        if waveform is None:
+            import librosa
+            waveform, _ = librosa.load(speaker_path, sr=24000, mono=True)
+            waveform = waveform.astype(np.float32)
+            self.speaker_cache.put(key, waveform)
+        return waveform
+    
+    def report(self) -> dict:
+        """응답에 붙이는 상태 (이벤트는 한 번만 전달)"""
+        return {
+            "events": self.models.drain_events(),
+            "resident_models": self.models.get_stats(),
+            "speaker_cache": self.speaker_cache.get_stats()
+        }
+    
+    def synthesize(self, request: dict) -> dict:
+        resident = self.models.acquire(request["model_path"], request["device"], request.get("optimization", "none"))
+        try:
+            items = request["items"]
+            voice_samples = [[self.load_reference(item["speaker_path"], item["speaker_hash"])] for item in items]
+            inputs = resident.processor(
+                text=[f"Speaker 1: {item['text']}" for item in items],
+                voice_samples=voice_samples,
+                padding=True,
+                return_tensors="pt",
+                return_attention_mask=True
+            )
+            
+            resident.hook.keys = [item["speaker_hash"] for item in items]
+            try:
+                with torch.inference_mode():
+                    outputs = resident.model.generate(
+                        **inputs,
+                        max_new_tokens=None,
+                        cfg_scale=request["cfg_scale"],
+                        tokenizer=resident.processor.tokenizer,
+                        generation_config={"do_sample": False},
+                        verbose=False
+                    )
+            finally:
+                resident.hook.keys = None
+            
+            results = []
+            for item, speech in zip(items, outputs.speech_outputs):
+                if speech is None:
+                    results.append(None)
+                    continue
+                resident.processor.save_audio(speech, output_path=item["output_path"])
+                results.append(item["output_path"])
+            return {"ok": True, "outputs": results}
+        finally:
+            self.models.release(resident)
+
+def read_requests(engine: ResidentEngine, requests: queue.Queue):
+    """stdin 읽기 스레드: 미리 로드는 바로 처리하고 합성 요청은 큐로 넘김"""
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            respond({"ok": False, "error": f"잘못된 요청: {e}"})
+            continue
+        
+        if request.get("op") == "prewarm":
+            started = engine.models.prewarm(
+                request["model_path"], request["device"], request.get("optimization", "none"),
+                {tuple(model) for model in request.get("keep", [])}
+            )
+            respond({"id": request.get("id"), "ok": True, "prewarm_started": started, **engine.report()})
+        else:
+            requests.put(request)
+    requests.put(None)
+
+def main():
+    engine = ResidentEngine()
+    requests = queue.Queue()
+    threading.Thread(target=read_requests, args=(engine, requests), daemon=True).start()
+    respond({"ok": True, "ready": True})
+    
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        try:
+            response = engine.synthesize(request)
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        respond({"id": request.get("id"), **response, **engine.report()})
+
+if __name__ == "__main__":
+    main()
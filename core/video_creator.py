@@ -3,9 +3,12 @@
 """
 
 import os
+import math
 import subprocess
-from typing import List, Optional
+import numpy as np
+from typing import Iterable, List, Optional
 import asyncio
+from .audio_buffer import AudioBuffer
 
 class VideoCreator:
     """영상 생성 클래스"""
@@ -13,45 +16,60 @@ class VideoCreator:
     def __init__(self):
         self.output_dir = "outputs"
         os.makedirs(self.output_dir, exist_ok=True)
+        # 출력 영상 해상도 (PDFProcessor의 렌더링 크기와 동일)
+        self.frame_width = int(os.getenv("VIDEO_WIDTH", "1920"))
+        self.frame_height = int(os.getenv("VIDEO_HEIGHT", "1080"))
+        # 영상 생성 방식: pipe (단일 ffmpeg 프로세스에 원시 프레임 전달) / segments (슬라이드별 세그먼트 후 합치기)
+        self.render_mode = os.getenv("VIDEO_RENDER_MODE", "pipe")
+        # 파이프 입력 프레임레이트 (슬라이드 길이의 시간 해상도) 및 출력 프레임레이트
+        self.pipe_fps = int(os.getenv("VIDEO_PIPE_FPS", "4"))
+        self.output_fps = int(os.getenv("VIDEO_FPS", "25"))
     
     async def create_presentation_video(
         self, 
         slide_images: List[str], 
-        audio_files: List[str], 
+        audio_clips: List[Optional[AudioBuffer]], 
         task_id: str,
         slide_duration: int = 5,
         scripts: List[str] = None,
-        include_subtitles: bool = False
+        include_subtitles: bool = False,
+        duplicate_of: Optional[List[Optional[int]]] = None
     ) -> Optional[str]:
-        """발표 영상 생성"""
+        """발표 영상 생성
+        
+        duplicate_of[i]가 지정된 슬라이드는 해당 슬라이드의 인코딩된 세그먼트를 그대로 재사용합니다.
+        오디오는 메모리 버퍼를 ffmpeg 표준 입력으로 전달하므로 오디오 파일을 다시 읽지 않습니다.
+        """
         try:
             print("🎬 영상 생성 중...")
             video_segments = []
+            segment_by_slide = {}
             
-            for i, (slide_image, audio_file) in enumerate(zip(slide_images, audio_files)):
-                if not os.path.exists(audio_file):
-                    print(f"❌ 오디오 파일이 존재하지 않습니다: {audio_file}")
+            for i, (slide_image, audio) in enumerate(zip(slide_images, audio_clips)):
+                if audio is None:
+                    print(f"❌ 페이지 {i+1} 오디오가 없습니다.")
                     continue
                 
-                # 오디오 길이 확인
-                duration = await self.get_audio_duration(audio_file)
-                if duration is None:
-                    print(f"❌ 오디오 파일 분석 실패: {audio_file}")
+                # 동일 슬라이드는 이미 인코딩된 세그먼트 재사용
+                source_index = duplicate_of[i] if duplicate_of else None
+                if source_index is not None and source_index in segment_by_slide:
+                    video_segments.append(segment_by_slide[source_index])
+                    print(f"♻️ 세그먼트 {i+1}: 세그먼트 {source_index+1} 재사용")
                     continue
                 
                 # 최소 슬라이드 시간 적용
-                if duration < slide_duration:
-                    duration = slide_duration
+                duration = max(audio.duration, slide_duration)
                 
                 print(f"📊 페이지 {i+1} 오디오 길이: {duration:.2f}초")
                 
                 # 개별 영상 생성
                 segment_path = await self.create_video_segment(
-                    slide_image, audio_file, duration, task_id, i + 1
+                    slide_image, audio, duration, task_id, i + 1
                 )
                 
                 if segment_path:
                     video_segments.append(segment_path)
+                    segment_by_slide[i] = segment_path
                     print(f"✅ 세그먼트 {i+1} 생성 완료 (길이: {duration:.2f}초)")
                 else:
                     print(f"❌ 세그먼트 {i+1} 생성 실패")
@@ -65,20 +83,10 @@ class VideoCreator:
             
             # 자막이 포함된 경우 자막 오버레이 추가
             if include_subtitles and scripts:
-                print("📝 자막 오버레이 추가 중...")
-                srt_path = self.create_srt_file(scripts, audio_files, task_id)
-                final_video_with_subtitles = await self.add_subtitles_to_video(final_video, srt_path, task_id)
-                
-                if final_video_with_subtitles:
-                    # 기존 파일 삭제하고 자막 포함 파일로 교체
-                    os.remove(final_video)
-                    final_video = final_video_with_subtitles
-                    print("✅ 자막 오버레이 완료")
-                else:
-                    print("❌ 자막 오버레이 실패, 원본 영상 사용")
+                final_video = await self.apply_subtitles(final_video, scripts, audio_clips, task_id)
             
             # 임시 세그먼트 파일들 정리
-            await self.cleanup_segments(video_segments)
+            await self.cleanup_segments(list(dict.fromkeys(video_segments)))
             
             return final_video
             
@@ -86,51 +94,203 @@ class VideoCreator:
             print(f"❌ 영상 생성 실패: {e}")
             return None
     
-    async def get_audio_duration(self, audio_file: str) -> Optional[float]:
-        """오디오 파일의 길이를 초 단위로 반환"""
+    async def create_presentation_video_piped(
+        self,
+        frames: Iterable[bytes],
+        audio_clips: List[Optional[AudioBuffer]],
+        task_id: str,
+        slide_duration: int = 5,
+        scripts: List[str] = None,
+        include_subtitles: bool = False
+    ) -> Optional[str]:
+        """원시 RGB 프레임을 하나의 ffmpeg 프로세스에 파이프로 전달해 발표 영상 생성
+        
+        frames는 슬라이드 순서대로 영상 해상도의 rgb24 프레임을 내놓아야 하며,
+        파일 읽기·래스터화가 이벤트 루프를 막지 않도록 한 프레임씩 스레드에서 꺼냅니다.
+        각 슬라이드의 길이는 반복해서 쓰는 프레임 수로 표현하므로, 슬라이드별 PNG
+        인코딩/디코딩과 ffmpeg 프로세스 실행, 세그먼트 합치기 단계가 모두 사라집니다.
+        오디오는 슬라이드 길이에 맞춰 메모리에서 이어 붙인 PCM을 별도 파이프로 전달합니다.
+        """
         try:
-            result = subprocess.run([
-                "ffprobe", "-v", "error", "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1", audio_file
-            ], capture_output=True, text=True)
+            print("🎬 영상 생성 중 (파이프 모드)...")
+            w, h = self.frame_width, self.frame_height
+            frame_size = w * h * 3
             
-            if result.returncode != 0:
+            # 슬라이드별 표시 시간을 프레임 수로 계산 (오디오는 같은 길이로 패딩)
+            frame_counts = {}
+            slide_audio = []
+            for i, audio in enumerate(audio_clips):
+                if audio is None:
+                    print(f"❌ 페이지 {i+1} 오디오가 없습니다.")
+                    continue
+                
+                # 최소 슬라이드 시간 적용
+                duration = max(audio.duration, slide_duration)
+                frame_counts[i] = math.ceil(duration * self.pipe_fps)
+                slide_audio.append((i, audio))
+                print(f"📊 페이지 {i+1} 길이: {frame_counts[i] / self.pipe_fps:.2f}초 ({frame_counts[i]} 프레임)")
+            
+            if not slide_audio:
+                print("❌ 영상으로 만들 슬라이드가 없습니다.")
                 return None
             
-            return float(result.stdout.strip())
+            # 슬라이드별 오디오를 표시 시간에 맞춰 패딩/자른 뒤 하나의 PCM 스트림으로 이어붙임
+            sample_rate = slide_audio[0][1].sample_rate
+            pcm = AudioBuffer.to_pcm16(np.concatenate([
+                audio.resample(sample_rate).fit(frame_counts[i] / self.pipe_fps)
+                for i, audio in slide_audio
+            ]))
             
-        except (ValueError, subprocess.SubprocessError) as e:
-            print(f"❌ 오디오 길이 파싱 실패: {e}")
+            final_video = os.path.join(self.output_dir, f"{task_id}_presentation.mp4")
+            audio_read_fd, audio_write_fd = os.pipe()
+            cmd = [
+                "ffmpeg", "-y", "-loglevel", "error",
+                "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{w}x{h}",
+                "-framerate", str(self.pipe_fps), "-i", "pipe:0",   # 표준 입력으로 원시 프레임 수신
+                "-f", "s16le", "-ar", str(sample_rate), "-ac", "1",
+                "-i", f"pipe:{audio_read_fd}",                      # 별도 파이프로 원시 PCM 수신
+                "-map", "0:v", "-map", "1:a",
+                "-c:v", "libx264",
+                "-pix_fmt", "yuv420p",
+                "-r", str(self.output_fps),
+                "-c:a", "aac",
+                final_video
+            ]
+            
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                    pass_fds=(audio_read_fd,)
+                )
+            except Exception:
+                os.close(audio_write_fd)
+                raise
+            finally:
+                os.close(audio_read_fd)
+            
+            # stderr를 동시에 읽어 파이프 버퍼가 가득 차 멈추는 것을 방지
+            stderr_task = asyncio.create_task(process.stderr.read())
+            # 오디오는 별도 스레드에서 쓰고 프레임은 이벤트 루프에서 씀 (ffmpeg가 두 입력을 번갈아 읽음)
+            loop = asyncio.get_running_loop()
+            audio_task = loop.run_in_executor(None, self.write_pipe, audio_write_fd, pcm)
+            
+            try:
+                frame_iter = iter(frames)
+                for i in range(len(audio_clips)):
+                    frame = await loop.run_in_executor(None, next, frame_iter, None)
+                    if frame is None:
+                        break
+                    frame_count = frame_counts.get(i)
+                    if not frame_count:
+                        continue
+                    if len(frame) != frame_size:
+                        raise ValueError(f"슬라이드 {i+1} 프레임 크기 불일치: {len(frame)} != {frame_size}")
+                    
+                    for _ in range(frame_count):
+                        process.stdin.write(frame)
+                        await process.stdin.drain()
+                    print(f"✅ 슬라이드 {i+1} 프레임 전송 완료")
+                process.stdin.close()
+            except (BrokenPipeError, ConnectionResetError) as pipe_error:
+                print(f"❌ ffmpeg 파이프 오류: {pipe_error}")
+            except Exception:
+                process.kill()
+                raise
+            
+            stderr = await stderr_task
+            await process.wait()
+            await audio_task
+            
+            if process.returncode != 0:
+                print(f"❌ 영상 생성 실패: {stderr.decode(errors='ignore')}")
+                return None
+            
+            print(f"🎉 발표 영상 생성 완료: {final_video}")
+            
+            # 자막이 포함된 경우 실제 슬라이드 표시 시간 기준으로 자막 오버레이 추가
+            if include_subtitles and scripts:
+                final_video = await self.apply_subtitles(
+                    final_video,
+                    [scripts[i] for i, _ in slide_audio],
+                    [audio for _, audio in slide_audio],
+                    task_id,
+                    [frame_counts[i] / self.pipe_fps for i, _ in slide_audio]
+                )
+            
+            return final_video
+            
+        except Exception as e:
+            print(f"❌ 영상 생성 실패: {e}")
             return None
     
+    async def apply_subtitles(
+        self,
+        video_path: str,
+        scripts: List[str],
+        audio_clips: List[Optional[AudioBuffer]],
+        task_id: str,
+        durations: Optional[List[float]] = None
+    ) -> str:
+        """자막 오버레이를 추가하고 성공하면 자막 포함 영상 경로 반환 (실패 시 원본 유지)"""
+        print("📝 자막 오버레이 추가 중...")
+        srt_path = self.create_srt_file(scripts, audio_clips, task_id, durations)
+        video_with_subtitles = await self.add_subtitles_to_video(video_path, srt_path, task_id)
+        
+        if video_with_subtitles:
+            # 기존 파일 삭제하고 자막 포함 파일로 교체
+            os.remove(video_path)
+            print("✅ 자막 오버레이 완료")
+            return video_with_subtitles
+        
+        print("❌ 자막 오버레이 실패, 원본 영상 사용")
+        return video_path
+    
+    def write_pipe(self, fd: int, data: bytes):
+        """파이프에 데이터를 모두 쓰고 닫음 (ffmpeg가 먼저 종료하면 중단)"""
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+        except (BrokenPipeError, OSError) as pipe_error:
+            print(f"❌ 오디오 파이프 오류: {pipe_error}")
+        finally:
+            os.close(fd)
+    
     async def create_video_segment(
         self, 
         slide_image: str, 
-        audio_file: str, 
+        audio: AudioBuffer, 
         duration: float, 
         task_id: str, 
         segment_num: int
     ) -> Optional[str]:
-        """개별 영상 세그먼트 생성"""
+        """개별 영상 세그먼트 생성 (오디오는 원시 PCM으로 표준 입력에 전달)"""
         try:
             segment_path = os.path.join("temp", task_id, f"video{segment_num}.mp4")
+            w, h = self.frame_width, self.frame_height
             
             cmd = [
                 "ffmpeg", "-y",
                 "-loop", "1", "-i", slide_image,  # 이미지를 무한 루프
-                "-i", audio_file,                 # 오디오 파일
+                "-f", "s16le", "-ar", str(audio.sample_rate), "-ac", "1",
+                "-i", "pipe:0",                   # 메모리 오디오 (원시 PCM)
                 "-c:v", "libx264",               # 비디오 코덱
                 "-t", str(duration),             # 오디오 길이만큼만 생성
                 "-pix_fmt", "yuv420p",           # 픽셀 포맷
-                "-vf", "scale=1920:1080:force_original_aspect_ratio=increase,crop=1920:1080",  # 이미지 크기 조정
+                # 슬라이드 이미지는 페이지 전체(contain)로 렌더링됨 - 프레임을 채우도록 확대 후 잘라냄
+                "-vf", f"scale={w}:{h}:force_original_aspect_ratio=increase,crop={w}:{h}",
                 segment_path
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = subprocess.run(cmd, input=audio.pcm16(), capture_output=True)
             if result.returncode == 0:
                 return segment_path
             else:
-                print(f"❌ 세그먼트 생성 실패: {result.stderr}")
+                print(f"❌ 세그먼트 생성 실패: {result.stderr.decode(errors='ignore')}")
                 return None
                 
         except Exception as e:
@@ -179,35 +339,27 @@ class VideoCreator:
         except Exception as e:
             print(f"⚠️ 세그먼트 파일 정리 실패: {e}")
     
-    def get_video_info(self, video_path: str) -> dict:
-        """영상 파일 정보 조회"""
-        try:
-            result = subprocess.run([
-                "ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", "-show_streams", video_path
-            ], capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                import json
-                return json.loads(result.stdout)
-            else:
-                return {"error": "영상 정보 조회 실패"}
-                
-        except Exception as e:
-            return {"error": str(e)}
-
-    def create_srt_file(self, scripts: List[str], audio_files: List[str], task_id: str) -> str:
-        """SRT 자막 파일 생성"""
+    def create_srt_file(
+        self,
+        scripts: List[str],
+        audio_clips: List[Optional[AudioBuffer]],
+        task_id: str,
+        durations: Optional[List[float]] = None
+    ) -> str:
+        """SRT 자막 파일 생성 (durations가 주어지면 오디오 길이 대신 사용)"""
         srt_path = os.path.join(self.output_dir, f"{task_id}_subtitles.srt")
         
         with open(srt_path, 'w', encoding='utf-8') as f:
             subtitle_index = 1
             current_time = 0.0
             
-            for i, (script, audio_file) in enumerate(zip(scripts, audio_files)):
-                # 오디오 길이 확인
-                duration = self.get_audio_duration_sync(audio_file)
-                if duration is None:
-                    duration = 5.0  # 기본값
+            for i, (script, audio) in enumerate(zip(scripts, audio_clips)):
+                # 음성이 없는 슬라이드는 영상에서도 빠지므로 자막도 건너뜀
+                if audio is None:
+                    continue
+                
+                # 메모리 버퍼의 길이 사용 (파일을 다시 분석하지 않음)
+                duration = durations[i] if durations is not None else audio.duration
                 
                 # 시작 시간과 종료 시간 계산
                 start_time = self.format_srt_time(current_time)
@@ -223,19 +375,6 @@ class VideoCreator:
         
         return srt_path
     
-    def get_audio_duration_sync(self, audio_file: str) -> Optional[float]:
-        """오디오 파일 길이를 동기적으로 가져오기"""
-        try:
-            cmd = [
-                'ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
-                '-of', 'csv=p=0', audio_file
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            return float(result.stdout.strip())
-        except Exception as e:
-            print(f"❌ 오디오 길이 확인 실패: {e}")
-            return None
-    
     def format_srt_time(self, seconds: float) -> str:
         """초를 SRT 시간 형식으로 변환 (HH:MM:SS,mmm)"""
         hours = int(seconds // 3600)
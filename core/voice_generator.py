@@ -3,96 +3,68 @@
 """
 
 import os
-import sys
-import subprocess
-import tempfile
-import torch
-import soundfile as sf
-import librosa
-from typing import Optional
+import re
+import asyncio
+import numpy as np
+from typing import AsyncIterator, List, Optional, Tuple
+from .audio_buffer import AudioBuffer
+from .tts_backend import create_tts_backend
+from .tts_batcher import TTSBatcher
+from .reference_voice import ReferenceVoiceTrimmer
 
-# VibeVoice 모듈 경로 추가
-sys.path.append('/home/devsy/workspace/VibeVoice')
+# 문장 경계 (마침표·물음표·느낌표 뒤 공백)
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?。])\s+')
 
 class VoiceGenerator:
     """음성 생성 클래스"""
     
     def __init__(self):
-        self.vibevoice_dir = "/home/devsy/workspace/VibeVoice"
-        self.voices_dir = os.path.join(self.vibevoice_dir, "demo", "voices")
-        os.makedirs(self.voices_dir, exist_ok=True)
+        # 합성 백엔드 (TTS_BACKEND=vibevoice/stub, VibeVoice 경로는 VIBEVOICE_DIR)
+        self.backend = create_tts_backend()
+        print(f"🔊 TTS 백엔드: {self.backend.name}")
+        # 문장 스트리밍 시 문장 클립 사이에 넣을 휴지 (초)
+        self.sentence_pause_seconds = float(os.getenv("TTS_SENTENCE_PAUSE_SECONDS", "0.25"))
+        # 슬라이드 음성을 temp/{task_id}/audio에 WAV로도 저장할지 (디버깅용, 파이프라인은 메모리 버퍼 사용)
+        self.save_audio_files = os.getenv("TTS_SAVE_AUDIO_FILES", "false").lower() == "true"
+        # 긴 스크립트는 문장 경계에서 이 글자 수 이하의 청크로 나눠 따로 합성
+        self.chunk_max_chars = int(os.getenv("TTS_CHUNK_MAX_CHARS", "300"))
+        # 청크별 재시도 횟수와 청크 경계 크로스페이드 길이 (초)
+        self.chunk_retries = int(os.getenv("TTS_CHUNK_RETRIES", "2"))
+        self.chunk_crossfade_seconds = float(os.getenv("TTS_CHUNK_CROSSFADE_SECONDS", "0.03"))
+        # 작업 간 동적 배칭 (최대 배치 크기가 1이면 사용 안 함)
+        max_batch_size = int(os.getenv("TTS_MAX_BATCH_SIZE", "1"))
+        self.batcher = TTSBatcher(
+            self.backend, max_batch_size, float(os.getenv("TTS_BATCH_MAX_WAIT_MS", "50")) / 1000
+        ) if max_batch_size > 1 else None
+        # 스크립트 스트리밍 시 문장 단위로 합성할지 (요청마다 모델을 로드하는 백엔드면 슬라이드 단위로 합성)
+        self.sentence_synthesis = not self.backend.loads_model_per_request
+        # 화자 업로드당 한 번 무음 제거 후 가장 깨끗한 발화 구간만 참조 음성으로 사용 (SPEAKER_REFERENCE_SECONDS=0이면 원본)
+        self.reference_trimmer = ReferenceVoiceTrimmer()
     
     def check_vibevoice_status(self) -> dict:
-        """VibeVoice 상태 확인"""
-        try:
-            # VibeVoice 디렉토리 존재 확인
-            if not os.path.exists(self.vibevoice_dir):
-                return {"status": "error", "message": "VibeVoice 디렉토리를 찾을 수 없습니다."}
-            
-            # 데모 스크립트 존재 확인
-            demo_script = os.path.join(self.vibevoice_dir, "demo", "inference_from_file.py")
-            if not os.path.exists(demo_script):
-                return {"status": "error", "message": "VibeVoice 데모 스크립트를 찾을 수 없습니다."}
-            
-            # GPU 사용 가능 여부
-            gpu_available = torch.cuda.is_available()
-            
-            return {
-                "status": "ready",
-                "message": "VibeVoice 준비 완료",
-                "gpu_available": gpu_available,
-                "device": "cuda" if gpu_available else "cpu"
-            }
-            
-        except Exception as e:
-            return {"status": "error", "message": f"VibeVoice 상태 확인 실패: {str(e)}"}
+        """TTS 백엔드 상태 확인"""
+        status = self.backend.check_status()
+        if self.batcher is not None:
+            status["batching"] = self.batcher.get_stats()
+        return status
     
-    def get_quality_parameters(self, quality_mode: str = "presentation") -> dict:
-        """품질 모드에 따른 VibeVoice 파라미터 설정"""
-        
-        # 기본 설정들
-        base_params = {
-            "model_path": "vibevoice/VibeVoice-1.5B",  # 안정성을 위해 1.5B 사용
-            "device": "cuda" if torch.cuda.is_available() else "cpu",
-            "cfg_scale": 1.3  # CFG 스케일 (기본값)
-        }
-        
-        if quality_mode == "presentation":
-            # 발표용 최적화 설정
-            return {
-                **base_params,
-                "cfg_scale": 1.5,  # 높은 CFG로 더 명확한 음성
-            }
-        
-        elif quality_mode == "high_quality":
-            # 최고 품질 설정 (느리지만 고품질)
-            return {
-                **base_params,
-                "model_path": "vibevoice/VibeVoice-7B",  # 더 큰 모델 사용
-                "cfg_scale": 1.8,  # 매우 높은 CFG로 최고 품질
-            }
-        
-        elif quality_mode == "fast":
-            # 빠른 생성 설정
-            return {
-                **base_params,
-                "cfg_scale": 1.1,  # 낮은 CFG로 빠른 생성
-            }
-        
-        elif quality_mode == "stable_korean":
-            # 한국어 안정성 최적화 설정 (메모리 문제 해결을 위해 1.5B 사용)
-            return {
-                **base_params,
-                "model_path": "vibevoice/VibeVoice-1.5B",  # 메모리 문제 해결
-                "cfg_scale": 1.6,  # 높은 CFG로 안정성 확보
-            }
-        
-        else:
-            # 기본 설정
-            return {
-                **base_params,
-                "cfg_scale": 1.3,
-            }
+    async def prewarm(self, quality_mode: str):
+        """작업 시작 시 품질 모드의 모델을 미리 로드 (스크립트 생성과 겹쳐 진행)"""
+        await self.backend.prewarm(quality_mode)
+    
+    async def prepare_reference_voice(self, audio_path: str, output_path: str) -> Tuple[str, Optional[dict]]:
+        """업로드된 화자 음성을 정리해 (합성에 쓸 참조 음성 경로, 정리 결과) 반환 (실패 시 원본 경로)"""
+        if not self.reference_trimmer.enabled:
+            return audio_path, None
+        loop = asyncio.get_running_loop()
+        report = await loop.run_in_executor(None, self.reference_trimmer.trim, audio_path, output_path)
+        return (output_path, report) if report else (audio_path, None)
+    
+    async def synthesize(self, text: str, speaker_audio_path: str, quality_mode: str) -> Optional[AudioBuffer]:
+        """배칭이 켜져 있으면 배처를 거쳐, 아니면 백엔드로 바로 합성"""
+        if self.batcher is not None:
+            return await self.batcher.synthesize(text, speaker_audio_path, quality_mode)
+        return await self.backend.synthesize(text, speaker_audio_path, quality_mode)
     
     async def generate_voice(
         self, 
@@ -100,9 +72,16 @@ class VoiceGenerator:
         speaker_audio_path: str, 
         task_id: str, 
         slide_num: int, 
-        quality_mode: str = "presentation"
-    ) -> Optional[str]:
-        """텍스트를 음성으로 변환하는 VibeVoice 함수"""
+        quality_mode: str = "presentation",
+        save: bool = True
+    ) -> Optional[AudioBuffer]:
+        """텍스트를 음성으로 변환해 메모리 오디오 버퍼로 반환
+        
+        긴 스크립트는 문장 경계에서 청크로 나눠 백엔드 용량만큼 병렬로 합성하고, 청크별로 재시도한 뒤
+        짧은 크로스페이드로 이어 붙입니다. 재시도 후에도 실패한 청크는 같은 길이의 무음으로 채워
+        슬라이드 전체가 빠지지 않게 하며, 모든 청크가 실패했을 때만 None을 반환합니다.
+        TTS_SAVE_AUDIO_FILES가 켜져 있고 save가 True이면 slide_{slide_num}_audio.wav로 한 번 저장합니다.
+        """
         try:
             if not speaker_audio_path or not os.path.exists(speaker_audio_path):
                 print("❌ 스피커 오디오 파일이 필요합니다.")
@@ -114,122 +93,168 @@ class VoiceGenerator:
             processed_text = self.preprocess_korean_text_for_presentation(text)
             print(f"📝 전처리된 텍스트: '{processed_text[:50]}...'")
             
-            # 품질 모드에 따른 파라미터 설정
-            quality_params = self.get_quality_parameters(quality_mode)
-            print(f"🎛️ 품질 설정: {quality_mode} 모드")
-            
-            # 임시 파일들 생성
-            temp_text_file = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8')
-            formatted_text = f"Speaker 1: {processed_text}"
-            temp_text_file.write(formatted_text)
-            temp_text_file.close()
-            
-            # voices 디렉토리에 음성 파일 복사
-            speaker_voice_file = os.path.join(self.voices_dir, "Speaker_1.wav")
+            chunks = self.split_into_chunks(processed_text)
+            if len(chunks) > 1:
+                print(f"✂️ 슬라이드 {slide_num}: {len(chunks)}개 청크로 나눠 합성")
             
-            # 음성 파일 전처리 (24kHz로 변환)
-            try:
-                audio, sr = librosa.load(speaker_audio_path, sr=24000)
-                sf.write(speaker_voice_file, audio, 24000)
-                print(f"✅ 음성 파일 전처리 완료")
-            except Exception as e:
-                print(f"❌ 음성 파일 전처리 실패: {e}")
+            results = await asyncio.gather(*[
+                self.synthesize_chunk(chunk, speaker_audio_path, quality_mode, slide_num, n + 1, len(chunks))
+                for n, chunk in enumerate(chunks)
+            ])
+            if not any(results):
                 return None
+            if not all(results):
+                results = self.fill_failed_chunks(chunks, results, slide_num)
+            audio = results[0] if len(results) == 1 else AudioBuffer.crossfade(results, self.chunk_crossfade_seconds)
             
-            # 출력 디렉토리 설정
-            output_dir = os.path.abspath(os.path.join("temp", task_id, "audio"))
-            os.makedirs(output_dir, exist_ok=True)
-            print(f"📁 VibeVoice 출력 디렉토리: {output_dir}")
-            
-            # VibeVoice 명령어 구성
-            cmd = [
-                "python", "demo/inference_from_file.py",
-                "--model_path", quality_params["model_path"],
-                "--txt_path", temp_text_file.name,
-                "--speaker_names", "Speaker 1",
-                "--output_dir", output_dir,
-                "--device", quality_params["device"],
-                "--cfg_scale", str(quality_params["cfg_scale"])
-            ]
+            print(f"✅ 음성 생성 완료: 슬라이드 {slide_num} ({audio.duration:.2f}초)")
+            if save:
+                self.save_audio(audio, task_id, slide_num)
+            return audio
             
-            print(f"🚀 VibeVoice 실행 중... (시간이 오래 걸릴 수 있습니다)")
-            print(f"📋 실행 명령어: {' '.join(cmd)}")
-            
-            # 타임아웃 설정 (10분)
-            result = subprocess.run(cmd, cwd=self.vibevoice_dir, capture_output=True, text=True, timeout=600)
-            
-            if result.returncode == 0:
-                # VibeVoice가 생성하는 파일명 예측
-                txt_filename = os.path.splitext(os.path.basename(temp_text_file.name))[0]
-                expected_filename = f"{txt_filename}_generated.wav"
-                expected_path = os.path.join(output_dir, expected_filename)
-                
-                # 예상 파일이 존재하는지 확인
-                if os.path.exists(expected_path):
-                    source_path = expected_path
-                    print(f"✅ VibeVoice 생성 파일 발견: {expected_filename}")
-                else:
-                    # 예상 파일이 없으면 디렉토리에서 _generated.wav 파일 찾기
-                    output_files = [f for f in os.listdir(output_dir) if f.endswith('_generated.wav')]
-                    if output_files:
-                        # 가장 최근 파일 선택
-                        latest_file = max(output_files, key=lambda x: os.path.getctime(os.path.join(output_dir, x)))
-                        source_path = os.path.join(output_dir, latest_file)
-                        print(f"✅ 대체 파일 사용: {latest_file}")
-                    else:
-                        print("❌ 생성된 오디오 파일을 찾을 수 없습니다.")
-                        return None
-                
-                # 최종 출력 파일 경로
-                final_output_path = os.path.join(output_dir, f"slide_{slide_num}_audio.wav")
-                
-                # 파일 복사
-                import shutil
-                shutil.copy2(source_path, final_output_path)
-                print(f"✅ 음성 생성 완료: {final_output_path}")
-                
-                # 원본 임시 파일 삭제
-                try:
-                    if source_path != final_output_path and os.path.exists(source_path):
-                        os.remove(source_path)
-                        print(f"🗑️ 임시 파일 삭제: {os.path.basename(source_path)}")
-                except Exception as e:
-                    print(f"⚠️ 임시 파일 삭제 실패: {e}")
-                
-                # 오디오 길이 확인
-                try:
-                    audio, sr = librosa.load(final_output_path, sr=24000)
-                    print(f"음성 길이: {len(audio)/24000:.2f}초")
-                except:
-                    pass
-                
-                return final_output_path
+        except Exception as e:
+            print(f"❌ 음성 생성 실패: {e}")
+            return None
+    
+    async def synthesize_chunk(
+        self,
+        text: str,
+        speaker_audio_path: str,
+        quality_mode: str,
+        slide_num: int,
+        chunk_num: int,
+        chunk_count: int
+    ) -> Optional[AudioBuffer]:
+        """청크 1개 합성 (실패 시 지수 백오프로 재시도)"""
+        for attempt in range(self.chunk_retries + 1):
+            audio = await self.synthesize(text, speaker_audio_path, quality_mode)
+            if audio is not None and audio.sample_count > 0:
+                return audio
+            if attempt < self.chunk_retries:
+                print(f"🔁 슬라이드 {slide_num} 청크 {chunk_num}/{chunk_count} 합성 실패, 재시도 ({attempt + 1}/{self.chunk_retries})")
+                await asyncio.sleep(min(2 ** attempt, 10))
+        
+        print(f"❌ 슬라이드 {slide_num} 청크 {chunk_num}/{chunk_count} 합성 최종 실패")
+        return None
+    
+    def split_into_chunks(self, text: str) -> List[str]:
+        """문장 경계에서 chunk_max_chars 이하의 청크로 나눔 (더 긴 문장은 쉼표·공백에서 나눔)"""
+        pieces = []
+        for sentence in SENTENCE_BOUNDARY.split(text.strip()):
+            while len(sentence) > self.chunk_max_chars:
+                cut = sentence.rfind(", ", 0, self.chunk_max_chars)
+                if cut <= 0:
+                    cut = sentence.rfind(" ", 0, self.chunk_max_chars)
+                cut = cut + 1 if cut > 0 else self.chunk_max_chars
+                pieces.append(sentence[:cut].strip())
+                sentence = sentence[cut:].strip()
+            if sentence:
+                pieces.append(sentence)
+        
+        chunks = []
+        for piece in pieces:
+            if chunks and len(chunks[-1]) + 1 + len(piece) <= self.chunk_max_chars:
+                chunks[-1] += " " + piece
             else:
-                print(f"❌ VibeVoice 실행 실패:")
-                print(f"   Return code: {result.returncode}")
-                print(f"   Error output: {result.stderr}")
-                print(f"   Standard output: {result.stdout}")
-                return None
-            
-        except subprocess.TimeoutExpired:
-            print(f"⏰ VibeVoice 실행 시간 초과 (10분)")
-            print("💡 해결 방법:")
-            print("   1. 더 작은 모델 사용 (fast 모드)")
-            print("   2. 텍스트를 더 짧게 나누기")
-            print("   3. GPU 메모리 확인")
+                chunks.append(piece)
+        return chunks or [text]
+    
+    def fill_failed_chunks(self, chunks: List[str], results: List[Optional[AudioBuffer]], slide_num: int) -> List[AudioBuffer]:
+        """실패한 청크를 성공한 청크의 글자당 길이로 추정한 무음으로 대체"""
+        succeeded = [(chunk, audio) for chunk, audio in zip(chunks, results) if audio is not None]
+        sample_rate = succeeded[0][1].sample_rate
+        seconds_per_char = sum(audio.duration for _, audio in succeeded) / max(1, sum(len(chunk) for chunk, _ in succeeded))
+        
+        filled = []
+        for n, (chunk, audio) in enumerate(zip(chunks, results)):
+            if audio is None:
+                seconds = len(chunk) * seconds_per_char
+                print(f"⚠️ 슬라이드 {slide_num} 청크 {n + 1}: 합성 실패로 {seconds:.2f}초 무음 삽입")
+                audio = AudioBuffer(np.zeros(int(seconds * sample_rate), dtype=np.float32), sample_rate)
+            filled.append(audio)
+        return filled
+    
+    def save_audio(self, audio: AudioBuffer, task_id: str, slide_num: int):
+        """설정된 경우 슬라이드 음성을 WAV로 한 번 저장"""
+        if not self.save_audio_files:
+            return
+        try:
+            output_dir = os.path.abspath(os.path.join("temp", task_id, "audio"))
+            os.makedirs(output_dir, exist_ok=True)
+            audio.write(os.path.join(output_dir, f"slide_{slide_num}_audio.wav"))
+            print(f"📁 음성 파일 저장: {audio.path}")
+        except Exception as e:
+            print(f"⚠️ 음성 파일 저장 실패: {e}")
+    
+    async def generate_voice_from_sentences(
+        self,
+        sentences: AsyncIterator[str],
+        speaker_audio_path: str,
+        task_id: str,
+        slide_num: int,
+        quality_mode: str = "presentation"
+    ) -> Tuple[str, "asyncio.Task[Optional[AudioBuffer]]"]:
+        """스트리밍으로 도착하는 문장을 받는 즉시 합성 작업으로 제출하고, 스크립트가 완성되면
+        (전체 스크립트, 슬라이드 음성 작업)을 반환
+        
+        문장 합성은 각각 작업으로 제출되어 백엔드의 빈 슬롯(CPU 복제본·배칭)에 바로 배정되고, 호출자는
+        음성을 기다리지 않고 다음 슬라이드 스크립트 생성으로 넘어갑니다. 음성 작업은 문장 음성을 이어 붙이며,
+        일부 문장 합성에 실패하면 완성된 스크립트 전체를 한 번에 다시 합성합니다.
+        요청마다 모델을 로드하는 백엔드(상주 워커 꺼짐)에서는 문장별 합성 대신 완성된 스크립트를 한 번에 합성합니다.
+        """
+        received = []
+        sentence_tasks = []
+        try:
+            async for sentence in sentences:
+                received.append(sentence)
+                if self.sentence_synthesis:
+                    print(f"🧩 슬라이드 {slide_num}: {len(received)}번째 문장 수신, 합성 제출")
+                    sentence_tasks.append(asyncio.create_task(self.generate_voice(
+                        sentence, speaker_audio_path, task_id, slide_num, quality_mode, save=False
+                    )))
+        except BaseException:
+            for sentence_task in sentence_tasks:
+                sentence_task.cancel()
+            raise
+        
+        script = " ".join(received)
+        audio_task = asyncio.create_task(
+            self.combine_sentence_audio(script, sentence_tasks, speaker_audio_path, task_id, slide_num, quality_mode)
+        )
+        # 슬라이드 음성 작업이 취소되면 (작업 실패 등) 아직 진행 중인 문장 합성도 함께 취소
+        audio_task.add_done_callback(
+            lambda task: [sentence_task.cancel() for sentence_task in sentence_tasks] if task.cancelled() else None
+        )
+        return script, audio_task
+    
+    async def combine_sentence_audio(
+        self,
+        script: str,
+        sentence_tasks: List["asyncio.Task[Optional[AudioBuffer]]"],
+        speaker_audio_path: str,
+        task_id: str,
+        slide_num: int,
+        quality_mode: str
+    ) -> Optional[AudioBuffer]:
+        """문장 합성 작업을 기다려 슬라이드 음성으로 이어 붙임 (문장 합성을 안 했으면 스크립트 전체 합성)"""
+        if not script:
             return None
+        if not sentence_tasks:
+            return await self.generate_voice(script, speaker_audio_path, task_id, slide_num, quality_mode)
+        
+        clips = await asyncio.gather(*sentence_tasks)
+        if not all(clips):
+            print(f"⚠️ 슬라이드 {slide_num}: 문장 합성 실패, 전체 스크립트로 다시 합성")
+            return await self.generate_voice(script, speaker_audio_path, task_id, slide_num, quality_mode)
+        
+        try:
+            audio = AudioBuffer.concatenate(clips, self.sentence_pause_seconds)
         except Exception as e:
-            print(f"❌ 음성 생성 실패: {e}")
+            print(f"❌ 문장 음성 결합 실패: {e}")
             return None
-        finally:
-            # 임시 파일 정리
-            try:
-                if 'temp_text_file' in locals():
-                    os.unlink(temp_text_file.name)
-                    print(f"🗑️ 임시 파일 정리: {temp_text_file.name}")
-            except Exception as cleanup_error:
-                print(f"⚠️ 임시 파일 정리 실패: {cleanup_error}")
-                pass
+        print(f"✅ 문장 {len(clips)}개 음성 결합 완료: 슬라이드 {slide_num} ({audio.duration:.2f}초)")
+        self.save_audio(audio, task_id, slide_num)
+        return audio
     
     def preprocess_korean_text_for_presentation(self, text: str) -> str:
         """한국어 텍스트를 발표에 적합하게 전처리"""
@@ -27,6 +27,7 @@ from core.pdf_processor import PDFProcessor
 from core.voice_generator import VoiceGenerator
 from core.video_creator import VideoCreator
 from core.script_generator import ScriptGenerator
+from core.background_tasks import BackgroundTaskSet
 from models.schemas import (
     PresentationRequest, 
     PresentationResponse, 
@@ -55,6 +56,7 @@ app.mount("/static", StaticFiles(directory="."), name="static")
 
 # 전역 변수
 processing_tasks = {}  # 진행 중인 작업들 추적
+detached_tasks = BackgroundTaskSet()  # 결과를 기다리지 않는 보조 태스크 (모델 미리 로드 등)
 output_dir = "outputs"
 temp_dir = "temp"
 
@@ -67,6 +69,11 @@ pdf_processor = PDFProcessor()
 voice_generator = VoiceGenerator()
 video_creator = VideoCreator()
 script_generator = ScriptGenerator()
+if script_generator.streaming and not voice_generator.sentence_synthesis:
+    print(
+        "⚠️ SCRIPT_STREAMING=true이지만 TTS 백엔드가 요청마다 모델을 로드합니다 (VIBEVOICE_RESIDENT=false). "
+        "문장 단위 대신 슬라이드 단위로 합성하며, 문장 단위 합성에는 VIBEVOICE_RESIDENT=true가 필요합니다."
+    )
 
 @app.get("/")
 async def root():
@@ -79,7 +86,8 @@ async def root():
             "upload": "/upload (파일 업로드 + 자동 발표영상 생성)",
             "status": "/status/{task_id}",
             "download": "/download/{task_id}",
-            "list_tasks": "/tasks"
+            "list_tasks": "/tasks",
+            "llm_usage": "/usage/llm"
         }
     }
 
@@ -97,7 +105,9 @@ async def health_check():
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
             "system": system_info,
-            "vibevoice": vibevoice_status
+            "vibevoice": vibevoice_status,
+            "script_generator": script_generator.get_status(),
+            "render_cache": pdf_processor.get_cache_stats()
         }
     except Exception as e:
         return JSONResponse(
@@ -111,6 +121,7 @@ async def upload_and_create_presentation(
     speaker_audio: UploadFile = File(..., description="스피커 음성 파일 (WAV/MP3/M4A)"),
     language: str = Form("korean"),
     include_subtitles: str = Form("false"),
+    force_regenerate: str = Form("false"),
     background_tasks: BackgroundTasks = BackgroundTasks()
 ):
     """파일 업로드 및 발표영상 자동 생성 엔드포인트"""
@@ -122,8 +133,11 @@ async def upload_and_create_presentation(
         if not speaker_audio.filename.endswith(('.wav', '.mp3', '.m4a')):
             raise HTTPException(status_code=400, detail="음성 파일은 WAV, MP3, M4A 형식만 지원됩니다.")
         
-        # 품질 모드와 슬라이드 지속시간은 기본값으로 고정
-        quality_mode = "stable_korean"
+        # 품질 모드와 슬라이드 지속시간은 기본값으로 고정 (GPU 없는 노드는 TTS_QUALITY_MODE=cpu_optimized)
+        quality_mode = os.getenv("TTS_QUALITY_MODE", QualityMode.STABLE_KOREAN.value)
+        if quality_mode not in [mode.value for mode in QualityMode]:
+            print(f"⚠️ 알 수 없는 TTS_QUALITY_MODE '{quality_mode}', stable_korean 사용")
+            quality_mode = QualityMode.STABLE_KOREAN.value
         slide_duration = 5
         
         # 언어 유효성 검사
@@ -132,6 +146,15 @@ async def upload_and_create_presentation(
         
         # 자막 옵션 처리
         include_subtitles_bool = include_subtitles.lower() == "true"
+        # 스크립트 캐시를 무시하고 새로 생성할지 여부
+        force_regenerate_bool = force_regenerate.lower() == "true"
+        
+        # PDF 사전 검사 (손상/암호화/과대 파일은 작업 생성 전에 거부)
+        pdf_content = await pdf_file.read()
+        preflight = pdf_processor.preflight_pdf(pdf_content)
+        if not preflight["ok"]:
+            raise HTTPException(status_code=preflight["status_code"], detail=preflight["errors"][0])
+        print(f"📋 PDF 사전 검사 통과: {preflight['info']['page_count']}페이지, 예상 처리 시간 {preflight['estimate']['processing_seconds']}초")
         
         # 고유 ID 생성
         task_id = str(uuid.uuid4())
@@ -143,8 +166,7 @@ async def upload_and_create_presentation(
         audio_path = os.path.join(task_dir, "speaker_audio.wav")
         
         with open(pdf_path, "wb") as f:
-            content = await pdf_file.read()
-            f.write(content)
+            f.write(pdf_content)
         
         with open(audio_path, "wb") as f:
             content = await speaker_audio.read()
@@ -165,7 +187,10 @@ async def upload_and_create_presentation(
             "quality_mode": quality_mode,
             "slide_duration": slide_duration,
             "language": language,
-            "include_subtitles": include_subtitles_bool
+            "include_subtitles": include_subtitles_bool,
+            "force_regenerate": force_regenerate_bool,
+            "pdf_info": preflight["info"],
+            "estimate": preflight["estimate"]
         }
         
         # 백그라운드 작업이 실제로 시작될 때까지 잠시 대기
@@ -178,7 +203,8 @@ async def upload_and_create_presentation(
             quality_mode,
             slide_duration,
             language,
-            include_subtitles_bool
+            include_subtitles_bool,
+            force_regenerate_bool
         )
         
         # 백그라운드 작업이 실제로 시작될 때까지 추가 대기
@@ -190,10 +216,14 @@ async def upload_and_create_presentation(
             "message": "파일이 업로드되었고 발표영상 생성이 시작되었습니다.",
             "quality_mode": quality_mode,
             "slide_duration": slide_duration,
+            "page_count": preflight["info"]["page_count"],
+            "estimate": preflight["estimate"],
             "check_status_url": f"/status/{task_id}",
             "download_url": f"/download/{task_id}"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"파일 업로드 및 처리 실패: {str(e)}")
 
@@ -218,8 +248,41 @@ async def get_task_status(task_id: str):
         completed_at=task.get("completed_at"),
         error_message=task.get("error_message"),
         result_file=task.get("result_file"),
-        download_filename=task.get("download_filename")
+        download_filename=task.get("download_filename"),
+        llm_usage=script_generator.usage_tracker.get_summary(task_id),
+        speaker_reference=task.get("speaker_reference")
+    )
+
+@app.get("/usage/llm")
+async def get_llm_usage_summary():
+    """작업별·전체 LLM 토큰/요청 크기/지연 시간 요약 (용량 계획용)"""
+    summaries = script_generator.usage_tracker.get_all_summaries()
+    
+    totals = {
+        key: sum(summary[key] for summary in summaries.values())
+        for key in (
+            "calls", "failed_calls", "retries", "prompt_tokens", "cached_prompt_tokens",
+            "completion_tokens", "total_tokens", "request_bytes", "estimated_calls"
+        )
+    }
+    totals["latency_seconds_total"] = round(sum(summary["latency_seconds_total"] for summary in summaries.values()), 3)
+    
+    # 슬라이드당 평균 (용량 계획용)
+    slide_count = sum(
+        processing_tasks[task_id].get("pdf_info", {}).get("page_count", 0)
+        for task_id in summaries if task_id in processing_tasks
     )
+    per_slide = {
+        key: round(totals[key] / slide_count, 1)
+        for key in ("calls", "prompt_tokens", "completion_tokens", "total_tokens", "request_bytes", "latency_seconds_total")
+    } if slide_count else None
+    
+    return {
+        "tasks": summaries,
+        "totals": totals,
+        "slides": slide_count,
+        "per_slide": per_slide
+    }
 
 @app.get("/download/{task_id}")
 async def download_result(task_id: str):
@@ -296,19 +359,30 @@ async def delete_task(task_id: str):
         
         # 작업 정보 삭제
         del processing_tasks[task_id]
+        script_generator.usage_tracker.remove(task_id)
         
         return {"message": "작업이 성공적으로 삭제되었습니다."}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"작업 삭제 실패: {str(e)}")
 
-async def process_presentation_task(task_id: str, quality_mode: str, slide_duration: int, language: str, include_subtitles: bool):
+async def process_presentation_task(task_id: str, quality_mode: str, slide_duration: int, language: str, include_subtitles: bool, force_regenerate: bool = False):
     """백그라운드에서 발표 영상 생성 처리"""
+    # 이 작업이 띄운 하위 작업 (화자 음성 정리, 음성 합성) - 끝날 때 남은 것은 취소하고 회수
+    pipeline_tasks = []
     try:
         task = processing_tasks[task_id]
         pdf_path = task["pdf_path"]
         audio_path = task["audio_path"]
         
+        # 음성 모델은 PDF 처리·스크립트 생성과 겹쳐 미리 로드 (상주 워커 모드)
+        detached_tasks.spawn(voice_generator.prewarm(quality_mode), f"[{task_id}] 음성 모델 미리 로드")
+        # 화자 음성의 무음 제거·발화 구간 선택도 PDF 처리와 겹쳐 업로드당 한 번 수행
+        reference_task = asyncio.create_task(voice_generator.prepare_reference_voice(
+            audio_path, os.path.join(os.path.dirname(audio_path), "speaker_reference.wav")
+        ))
+        pipeline_tasks.append(reference_task)
+        
         # 1. PDF 처리
         task["current_step"] = "PDF 페이지 추출 중..."
         task["progress"] = 5
@@ -319,11 +393,38 @@ async def process_presentation_task(task_id: str, quality_mode: str, slide_durat
         if not slide_images:
             raise Exception("PDF 페이지 추출 실패")
         
+        # 슬라이드별 텍스트 레이어/레이아웃 (텍스트 전용 스크립트 생성, 근접 중복 확인용)
+        slide_layouts = pdf_processor.load_slide_layouts(slide_images)
+        # 동일/근접 중복 슬라이드 그룹화 (스크립트·음성·세그먼트 재사용, 이미지 디코딩·해시는 스레드에서 실행)
+        slide_groups = await asyncio.get_running_loop().run_in_executor(
+            None, pdf_processor.find_duplicate_slides, slide_images, slide_layouts
+        )
+        # 완전 중복이라도 위치 역할(첫/중간/마지막)이 다르면 인사·마무리 멘트가 달라야 하므로 재사용하지 않고
+        # 같은 역할의 이전 사본이 있으면 그것을, 없으면 원본을 참고하는 연속 스크립트로 생성
+        slide_roles = [
+            "first" if j == 0 else "last" if j == len(slide_images) - 1 else "middle"
+            for j in range(len(slide_images))
+        ]
+        role_copies = {}
+        for j, group in enumerate(slide_groups):
+            source = group["duplicate_of"]
+            if source is None or slide_roles[source] == slide_roles[j]:
+                continue
+            if (source, slide_roles[j]) in role_copies:
+                group["duplicate_of"] = role_copies[(source, slide_roles[j])]
+                continue
+            role_copies[(source, slide_roles[j])] = j
+            group["duplicate_of"], group["near_duplicate_of"] = None, source
+            print(f"🔁 슬라이드 {j + 1}: 슬라이드 {source + 1}와 동일하지만 위치 역할이 달라 연속 스크립트 생성")
+        duplicate_of = [group["duplicate_of"] for group in slide_groups]
+        
         task["current_step"] = f"PDF 처리 완료 - {len(slide_images)}개 슬라이드 추출"
         task["progress"] = 10
         print(f"🔄 [{task_id}] 진행률 업데이트: {task['progress']}% - {task['current_step']}")
         await asyncio.sleep(0)  # 다른 코루틴이 실행될 수 있도록 양보
         
+        speaker_path, task["speaker_reference"] = await reference_task
+        
         # 2. 스크립트 생성
         task["current_step"] = "발표 스크립트 생성 시작..."
         task["progress"] = 15
@@ -331,18 +432,66 @@ async def process_presentation_task(task_id: str, quality_mode: str, slide_durat
         await asyncio.sleep(0)  # 다른 코루틴이 실행될 수 있도록 양보
         scripts = []
         previous_script = ""
+        # 스트리밍 모드에서 스크립트와 함께 제출된 슬라이드 음성 합성 작업 (슬라이드 인덱스 → AudioBuffer를 반환하는 작업)
+        streamed_audio = {}
         
-        for i, slide_image in enumerate(slide_images):
+        i = 0
+        while i < len(slide_images):
+            slide_image = slide_images[i]
             lang_text = "영어" if language == "english" else "한국어"
             task["current_step"] = f"{lang_text} 발표 스크립트 생성 중... ({i + 1}/{len(slide_images)})"
-            script = await script_generator.generate_script_for_slide(
-                i + 1, slide_image, i == 0, i == len(slide_images) - 1, previous_script, language
-            )
-            scripts.append(script)
-            previous_script = script
+            group = slide_groups[i]
+            if group["duplicate_of"] is not None:
+                # 완전히 같은 슬라이드: 기존 스크립트 재사용
+                scripts.append(scripts[group["duplicate_of"]])
+            elif group["near_duplicate_of"] is not None:
+                # 근접 중복 슬라이드: 텍스트 전용 연속 프롬프트
+                scripts.append(await script_generator.generate_continuation_script(
+                    i + 1, slide_image, scripts[group["near_duplicate_of"]],
+                    i == len(slide_images) - 1, previous_script, language, slide_layouts[i], force_regenerate,
+                    task_id
+                ))
+            elif script_generator.streaming:
+                # 문장 단위 스트리밍: 완성된 문장부터 바로 음성 합성 (LLM 디코딩과 TTS 병행)
+                # 스크립트가 완성되면 음성 합성을 기다리지 않고 다음 슬라이드로 넘어감
+                task["current_step"] = f"{lang_text} 발표 스크립트·음성 생성 중... ({i + 1}/{len(slide_images)})"
+                script, streamed_audio[i] = await voice_generator.generate_voice_from_sentences(
+                    script_generator.stream_script_sentences(
+                        i + 1, slide_image, i == 0, i == len(slide_images) - 1, previous_script, language,
+                        slide_layouts[i], force_regenerate, task_id
+                    ),
+                    speaker_path, task_id, i + 1, quality_mode
+                )
+                pipeline_tasks.append(streamed_audio[i])
+                scripts.append(script)
+            elif script_generator.batch_size > 1:
+                # 중복이 아닌 연속 슬라이드를 최대 batch_size개씩 한 요청으로 생성
+                batch = [i]
+                while (
+                    len(batch) < script_generator.batch_size
+                    and batch[-1] + 1 < len(slide_images)
+                    and slide_groups[batch[-1] + 1]["duplicate_of"] is None
+                    and slide_groups[batch[-1] + 1]["near_duplicate_of"] is None
+                ):
+                    batch.append(batch[-1] + 1)
+                task["current_step"] = f"{lang_text} 발표 스크립트 생성 중... ({batch[0] + 1}-{batch[-1] + 1}/{len(slide_images)})"
+                scripts.extend(await script_generator.generate_scripts_batch(
+                    [
+                        {"slide_num": j + 1, "image_path": slide_images[j], "layout": slide_layouts[j]}
+                        for j in batch
+                    ],
+                    len(slide_images), previous_script, language, force_regenerate, task_id
+                ))
+            else:
+                scripts.append(await script_generator.generate_script_for_slide(
+                    i + 1, slide_image, i == 0, i == len(slide_images) - 1, previous_script, language,
+                    slide_layouts[i], force_regenerate, task_id
+                ))
+            previous_script = scripts[-1]
+            i = len(scripts)
             
             # 진행률 업데이트 (15% → 30%)
-            progress = 15 + (i + 1) * 15 // len(slide_images)
+            progress = 15 + i * 15 // len(slide_images)
             task["progress"] = progress
             print(f"🔄 [{task_id}] 진행률 업데이트: {task['progress']}% - {task['current_step']}")
             await asyncio.sleep(0)  # 다른 코루틴이 실행될 수 있도록 양보
@@ -358,16 +507,31 @@ async def process_presentation_task(task_id: str, quality_mode: str, slide_durat
         task["progress"] = 35
         print(f"🔄 [{task_id}] 진행률 업데이트: {task['progress']}% - {task['current_step']}")
         await asyncio.sleep(0)  # 다른 코루틴이 실행될 수 있도록 양보
-        audio_files = []
+        audio_clips = []  # 슬라이드별 메모리 오디오 버퍼 (파일 왕복 없이 영상 단계로 전달)
+        
+        # 합성할 슬라이드를 한꺼번에 제출해 TTS 백엔드의 빈 슬롯(CPU 복제본 등)에 바로 배정되게 함
+        voice_tasks = {
+            i: asyncio.create_task(voice_generator.generate_voice(
+                script, speaker_path, task_id, i + 1, quality_mode
+            ))
+            for i, script in enumerate(scripts)
+            if duplicate_of[i] is None and i not in streamed_audio
+        }
+        pipeline_tasks.extend(voice_tasks.values())
         
         for i, script in enumerate(scripts):
             lang_text = "영어" if language == "english" else "한국어"
             task["current_step"] = f"{lang_text} 음성 생성 중... ({i + 1}/{len(scripts)})"
-            audio_path = await voice_generator.generate_voice(
-                script, task["audio_path"], task_id, i + 1, quality_mode
-            )
-            if audio_path:
-                audio_files.append(audio_path)
+            if duplicate_of[i] is not None:
+                # 완전히 같은 슬라이드: 기존 음성 재사용
+                audio = audio_clips[duplicate_of[i]]
+            elif i in streamed_audio:
+                # 스크립트 스트리밍 중 제출된 음성 합성
+                audio = await streamed_audio[i]
+            else:
+                audio = await voice_tasks[i]
+            # 슬라이드 인덱스와 맞추기 위해 실패한 슬라이드는 None으로 유지
+            audio_clips.append(audio)
             
             # 진행률 업데이트 (35% → 60%)
             progress = 35 + (i + 1) * 25 // len(scripts)
@@ -376,7 +540,8 @@ async def process_presentation_task(task_id: str, quality_mode: str, slide_durat
             await asyncio.sleep(0)  # 다른 코루틴이 실행될 수 있도록 양보
         
         lang_text = "영어" if language == "english" else "한국어"
-        task["current_step"] = f"{lang_text} 음성 생성 완료 - {len(audio_files)}개 음성 파일 생성"
+        generated_count = sum(1 for audio in audio_clips if audio is not None)
+        task["current_step"] = f"{lang_text} 음성 생성 완료 - {generated_count}개 음성 생성"
         task["progress"] = 60
         print(f"🔄 [{task_id}] 진행률 업데이트: {task['progress']}% - {task['current_step']}")
         await asyncio.sleep(0)  # 다른 코루틴이 실행될 수 있도록 양보
@@ -387,9 +552,15 @@ async def process_presentation_task(task_id: str, quality_mode: str, slide_durat
         print(f"🔄 [{task_id}] 진행률 업데이트: {task['progress']}% - {task['current_step']}")
         await asyncio.sleep(0)  # 다른 코루틴이 실행될 수 있도록 양보
         
-        result_file = await video_creator.create_presentation_video(
-            slide_images, audio_files, task_id, slide_duration, scripts, include_subtitles
-        )
+        if video_creator.render_mode == "pipe":
+            # 원시 프레임을 단일 ffmpeg 프로세스에 파이프로 전달
+            result_file = await video_creator.create_presentation_video_piped(
+                pdf_processor.iter_raw_frames(pdf_path, slide_images), audio_clips, task_id, slide_duration, scripts, include_subtitles
+            )
+        else:
+            result_file = await video_creator.create_presentation_video(
+                slide_images, audio_clips, task_id, slide_duration, scripts, include_subtitles, duplicate_of
+            )
         
         if not result_file:
             raise Exception("영상 생성 실패")
@@ -428,6 +599,14 @@ async def process_presentation_task(task_id: str, quality_mode: str, slide_durat
         task["error_message"] = str(e)
         task["current_step"] = f"오류: {str(e)}"
         print(f"작업 {task_id} 실패: {e}")
+    
+    finally:
+        # 실패·취소된 작업의 음성 합성이 공유 TTS 백엔드를 계속 점유하지 않도록 남은 하위 작업을 취소하고,
+        # 예외가 "Task exception was never retrieved"로 남지 않도록 결과를 회수
+        for pipeline_task in pipeline_tasks:
+            if not pipeline_task.done():
+                pipeline_task.cancel()
+        await asyncio.gather(*pipeline_tasks, return_exceptions=True)
 
 async def cleanup_temp_files(task_id: str):
     """임시 파일 정리"""
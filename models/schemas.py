@@ -12,6 +12,7 @@ class QualityMode(str, Enum):
     PRESENTATION = "presentation"
     HIGH_QUALITY = "high_quality"
     FAST = "fast"
+    CPU_OPTIMIZED = "cpu_optimized"
 
 class PresentationRequest(BaseModel):
     """발표 영상 생성 요청 모델"""
@@ -45,6 +46,8 @@ class StatusResponse(BaseModel):
     error_message: Optional[str] = None
     result_file: Optional[str] = None
     download_filename: Optional[str] = None
+    llm_usage: Optional[dict] = Field(default=None, description="작업의 LLM 토큰·요청 크기·지연 시간·재시도 집계")
+    speaker_reference: Optional[dict] = Field(default=None, description="화자 참조 음성 정리 결과 (원본·발화·선택 구간 길이)")
 
 class HealthResponse(BaseModel):
     """시스템 상태 응답 모델"""
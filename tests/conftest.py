@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 프로젝트 루트를 모듈 경로에 추가 (core 패키지 import용)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,117 @@
+"""
+WAV 헤더 파싱과 메모리 매핑 읽기 테스트
+"""
+
+import struct
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from core.audio_buffer import (
+    AudioBuffer,
+    WAV_SIZE_UNKNOWN,
+    WAVE_FORMAT_EXTENSIBLE,
+    WAVE_FORMAT_IEEE_FLOAT,
+    WAVE_FORMAT_PCM,
+    read_wav_header,
+)
+
+# KSDATAFORMAT_SUBTYPE_IEEE_FLOAT (앞 2바이트가 포맷 태그)
+FLOAT_SUBFORMAT_GUID = struct.pack("<H", WAVE_FORMAT_IEEE_FLOAT) + bytes.fromhex("000000001000800000aa00389b71")
+
+def fmt_chunk(format_tag: int, channels: int, sample_rate: int, bits: int, extensible: bool = False) -> bytes:
+    block_align = channels * bits // 8
+    body = struct.pack("<HHIIHH", format_tag, channels, sample_rate, sample_rate * block_align, block_align, bits)
+    if extensible:
+        body += struct.pack("<HHI", 22, bits, 0) + FLOAT_SUBFORMAT_GUID
+    return b"fmt " + struct.pack("<I", len(body)) + body
+
+def write_wav(path, chunks: list, data: bytes, data_size=None) -> str:
+    size = len(data) if data_size is None else data_size
+    body = b"WAVE" + b"".join(chunks) + b"data" + struct.pack("<I", size) + data
+    with open(path, "wb") as f:
+        f.write(b"RIFF" + struct.pack("<I", len(body)) + body)
+    return str(path)
+
+@pytest.fixture
+def pcm16():
+    samples = (np.sin(np.arange(2400) / 10) * 10000).astype("<i2")
+    return samples, samples.tobytes()
+
+@pytest.mark.parametrize("data_size", [0, WAV_SIZE_UNKNOWN])
+def test_unknown_data_size_reads_until_end_of_file(tmp_path, pcm16, data_size):
+    samples, data = pcm16
+    path = write_wav(tmp_path / "stream.wav", [fmt_chunk(WAVE_FORMAT_PCM, 1, 24000, 16)], data, data_size)
+    
+    header = read_wav_header(path)
+    
+    assert header["sample_count"] == len(samples)
+    assert AudioBuffer.from_file(path).sample_count == len(samples)
+
+def test_data_size_is_clamped_to_file_size(tmp_path, pcm16):
+    samples, data = pcm16
+    path = write_wav(tmp_path / "truncated.wav", [fmt_chunk(WAVE_FORMAT_PCM, 1, 24000, 16)], data, len(data) * 4)
+    
+    assert read_wav_header(path)["sample_count"] == len(samples)
+
+def test_explicit_data_size_is_respected(tmp_path, pcm16):
+    _, data = pcm16
+    path = write_wav(tmp_path / "short.wav", [fmt_chunk(WAVE_FORMAT_PCM, 1, 24000, 16)], data, 200)
+    
+    assert read_wav_header(path)["sample_count"] == 100
+
+def test_extensible_float_header(tmp_path):
+    samples = np.linspace(-0.5, 0.5, 480, dtype="<f4")
+    fact = b"fact" + struct.pack("<II", 4, len(samples))
+    path = write_wav(
+        tmp_path / "float.wav",
+        [fmt_chunk(WAVE_FORMAT_EXTENSIBLE, 1, 24000, 32, extensible=True), fact],
+        samples.tobytes()
+    )
+    
+    header = read_wav_header(path)
+    
+    assert header["format_tag"] == WAVE_FORMAT_IEEE_FLOAT
+    assert header["data_offset"] == 80
+    assert header["sample_count"] == len(samples)
+    np.testing.assert_allclose(AudioBuffer.from_file(path).samples, samples)
+
+def test_stereo_pcm_is_downmixed(tmp_path):
+    left = np.full(1000, 8000, dtype="<i2")
+    right = np.full(1000, -4000, dtype="<i2")
+    interleaved = np.stack([left, right], axis=1).reshape(-1)
+    path = write_wav(tmp_path / "stereo.wav", [fmt_chunk(WAVE_FORMAT_PCM, 2, 44100, 16)], interleaved.tobytes())
+    
+    header = read_wav_header(path)
+    audio = AudioBuffer.from_file(path)
+    
+    assert header["channels"] == 2
+    assert header["sample_count"] == 1000
+    assert audio.sample_rate == 44100
+    np.testing.assert_allclose(audio.samples, np.full(1000, 2000 / 32768, dtype=np.float32))
+
+def test_odd_sized_chunk_is_padded(tmp_path, pcm16):
+    samples, data = pcm16
+    odd = b"LIST" + struct.pack("<I", 3) + b"abc" + b"\x00"
+    path = write_wav(tmp_path / "list.wav", [fmt_chunk(WAVE_FORMAT_PCM, 1, 24000, 16), odd], data)
+    
+    header = read_wav_header(path)
+    
+    assert header["sample_count"] == len(samples)
+    assert header["data_offset"] == 12 + 24 + 12 + 8
+
+def test_matches_soundfile(tmp_path):
+    samples = np.random.default_rng(0).uniform(-0.8, 0.8, size=(3000, 2)).astype(np.float32)
+    path = str(tmp_path / "sf.wav")
+    sf.write(path, samples, 24000, subtype="PCM_16")
+    
+    expected, _ = sf.read(path, dtype="float32")
+    
+    np.testing.assert_allclose(AudioBuffer.from_file(path).samples, expected.mean(axis=1), atol=1e-6)
+
+def test_non_wav_returns_none(tmp_path):
+    path = tmp_path / "not.wav"
+    path.write_bytes(b"ID3" + bytes(64))
+    
+    assert read_wav_header(str(path)) is None
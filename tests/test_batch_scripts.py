@@ -0,0 +1,99 @@
+"""
+배치 스크립트 응답 파싱과 슬라이드별 대체 테스트
+"""
+
+import json
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from core.script_generator import ScriptGenerator
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "test")
+    monkeypatch.setenv("SCRIPT_CACHE_MAX_ENTRIES", "0")
+    monkeypatch.setenv("SCRIPT_CACHE_PATH", str(tmp_path / "scripts.db"))
+    monkeypatch.delenv("AZURE_OPENAI_LIGHT_DEPLOYMENT", raising=False)
+    monkeypatch.delenv("LLM_BASE_URL", raising=False)
+    return ScriptGenerator()
+
+@pytest.fixture
+def slides(tmp_path):
+    slides = []
+    for slide_num in (2, 3, 4):
+        image_path = tmp_path / f"slide_{slide_num}.jpg"
+        Image.new("RGB", (64, 36), "white").save(image_path)
+        text = f"Slide {slide_num} title\n" + "Body text with enough characters to use the text prompt. " * 3
+        layout = {"text": text, "text_length": len(text), "image_ratio": 0.0, "blocks": []}
+        slides.append({"slide_num": slide_num, "image_path": str(image_path), "layout": layout})
+    return slides
+
+def test_parse_objects_in_slide_order(generator):
+    content = json.dumps({"scripts": [
+        {"slide": 3, "script": " 세 번째 "},
+        {"slide": 2, "script": "두 번째"},
+    ]})
+    
+    assert generator.parse_batch_scripts(content, [2, 3]) == ["두 번째", "세 번째"]
+
+def test_parse_plain_list_of_strings(generator):
+    assert generator.parse_batch_scripts(json.dumps(["a", "b"]), [5, 6]) == ["a", "b"]
+
+def test_parse_uses_position_when_slide_number_is_missing(generator):
+    content = json.dumps({"scripts": [{"script": "a"}, {"script": "b"}]})
+    
+    assert generator.parse_batch_scripts(content, [7, 8]) == ["a", "b"]
+
+@pytest.mark.parametrize("content", [
+    "not json",
+    '{"scripts": [{"slide": 2, "script": "a"}',
+    json.dumps({"scripts": [{"slide": 2, "script": "a"}]}),
+    json.dumps({"scripts": [{"slide": 2, "script": "a"}, {"slide": 9, "script": "b"}]}),
+    json.dumps({"scripts": [{"slide": 2, "script": "a"}, {"slide": 3, "script": "  "}]}),
+    json.dumps({"result": "a"}),
+])
+def test_parse_rejects_malformed_or_incomplete_responses(generator, content):
+    with pytest.raises(ValueError):
+        generator.parse_batch_scripts(content, [2, 3])
+
+def fake_response(content: str):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def test_batch_returns_parsed_scripts(generator, slides, monkeypatch):
+    calls = []
+    
+    async def create_chat_completion(messages, **kwargs):
+        calls.append(kwargs)
+        return fake_response(json.dumps({"scripts": [
+            {"slide": slide["slide_num"], "script": f"script {slide['slide_num']}"} for slide in slides
+        ]}))
+    
+    monkeypatch.setattr(generator, "create_chat_completion", create_chat_completion)
+    
+    scripts = asyncio.run(generator.generate_scripts_batch(slides, 10, force_regenerate=True))
+    
+    assert scripts == ["script 2", "script 3", "script 4"]
+    assert len(calls) == 1
+    assert calls[0]["response_format"] == {"type": "json_object"}
+
+def test_batch_falls_back_to_per_slide_generation(generator, slides, monkeypatch):
+    fallback_calls = []
+    
+    async def create_chat_completion(messages, **kwargs):
+        return fake_response('{"scripts": [{"slide": 2, "script": "only one"}]}')
+    
+    async def generate_script_for_slide(slide_num, image_path, is_first, is_last, previous_script, *args):
+        fallback_calls.append((slide_num, previous_script))
+        return f"fallback {slide_num}"
+    
+    monkeypatch.setattr(generator, "create_chat_completion", create_chat_completion)
+    monkeypatch.setattr(generator, "generate_script_for_slide", generate_script_for_slide)
+    
+    scripts = asyncio.run(generator.generate_scripts_batch(slides, 10, "intro", force_regenerate=True))
+    
+    assert scripts == ["fallback 2", "fallback 3", "fallback 4"]
+    # 대체 경로에서도 직전 스크립트가 순서대로 이어짐
+    assert fallback_calls == [(2, "intro"), (3, "fallback 2"), (4, "fallback 3")]
@@ -0,0 +1,76 @@
+"""
+중복 슬라이드 감지 테스트
+"""
+
+import fitz
+import pytest
+
+from core.pdf_processor import PDFProcessor
+
+SLIDES = [
+    ("Introduction", ["Background of the project"]),
+    ("Methodology", ["Survey of 120 teams"]),
+    ("Results", ["Response time halved"]),
+    ("Results", ["Response time halved", "Satisfaction up 12 points"]),
+    ("Conclusion", ["Next steps"]),
+]
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.setenv("RENDER_CACHE_MAX_MB", "0")
+    monkeypatch.setenv("RENDER_FRAME_CACHE_MAX_MB", "0")
+    monkeypatch.setenv("VIDEO_RENDER_MODE", "segments")
+    processor = PDFProcessor()
+    processor.output_dir = str(tmp_path / "out")
+    return processor
+
+def make_deck(path, slides):
+    doc = fitz.open()
+    for title, bullets in slides:
+        page = doc.new_page(width=960, height=540)
+        page.insert_text((60, 100), title, fontsize=40)
+        for k, bullet in enumerate(bullets):
+            page.insert_text((80, 180 + 50 * k), "- " + bullet, fontsize=24)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+def test_different_text_slides_are_not_grouped(processor, tmp_path):
+    pdf_path = make_deck(tmp_path / "deck.pdf", [SLIDES[i] for i in (0, 1, 2, 4)])
+    slide_images = processor.extract_pages(pdf_path, "task")
+    
+    # 해시 임계값을 넓혀도 텍스트 레이어 확인으로 걸러져야 함
+    processor.near_duplicate_threshold = 8
+    groups = processor.find_duplicate_slides(slide_images)
+    
+    assert [group["duplicate_of"] for group in groups] == [None] * 4
+    assert [group["near_duplicate_of"] for group in groups] == [None] * 4
+
+def test_progressive_build_and_exact_copy(processor, tmp_path):
+    pdf_path = make_deck(tmp_path / "deck.pdf", SLIDES + [SLIDES[1]])
+    slide_images = processor.extract_pages(pdf_path, "task")
+    
+    processor.near_duplicate_threshold = 8
+    groups = processor.find_duplicate_slides(slide_images)
+    
+    assert groups[3]["near_duplicate_of"] == 2
+    assert groups[5]["duplicate_of"] == 1
+    assert all(group["near_duplicate_of"] is None for k, group in enumerate(groups) if k != 3)
+
+def test_default_threshold_is_strict(processor):
+    assert processor.near_duplicate_threshold <= 2
+
+@pytest.mark.parametrize("earlier, text, expected", [
+    ("Results\n- Response time halved", "Results\n- Response time halved\n- Satisfaction up", True),
+    ("Results\n- Response time halved", "Results\n- Satisfaction up\n- Response time halved", True),
+    ("Introduction\n- Background", "Results\n- Response time halved", False),
+    ("Results\n- Response time halved", "Results", False),
+    ("", "Results", False),
+    ("Results", "", False),
+])
+def test_is_text_continuation(earlier, text, expected):
+    assert PDFProcessor.is_text_continuation({"text": earlier}, {"text": text}) is expected
+
+def test_image_only_slides_are_not_continuations():
+    assert not PDFProcessor.is_text_continuation(None, None)
+    assert not PDFProcessor.is_text_continuation({"text": ""}, {"text": ""})
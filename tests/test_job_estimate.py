@@ -0,0 +1,45 @@
+"""
+사전 검사 비용 추정 테스트
+"""
+
+import pytest
+
+from core.pdf_processor import PDFProcessor
+
+@pytest.mark.parametrize("batch_size, page_count, expected_calls", [
+    ("1", 10, 10),
+    ("3", 10, 4),
+    ("4", 8, 2),
+    ("0", 5, 5),
+])
+def test_llm_calls_follow_script_batch_size(monkeypatch, batch_size, page_count, expected_calls):
+    monkeypatch.setenv("RENDER_CACHE_MAX_MB", "0")
+    monkeypatch.setenv("RENDER_FRAME_CACHE_MAX_MB", "0")
+    monkeypatch.setenv("SCRIPT_BATCH_SIZE", batch_size)
+    monkeypatch.delenv("SCRIPT_STREAMING", raising=False)
+    
+    estimate = PDFProcessor().estimate_job_cost({"page_count": page_count})
+    
+    assert estimate["llm_calls"] == expected_calls
+
+def test_streaming_requests_each_slide(monkeypatch):
+    monkeypatch.setenv("RENDER_CACHE_MAX_MB", "0")
+    monkeypatch.setenv("RENDER_FRAME_CACHE_MAX_MB", "0")
+    monkeypatch.setenv("SCRIPT_BATCH_SIZE", "3")
+    monkeypatch.setenv("SCRIPT_STREAMING", "true")
+    
+    estimate = PDFProcessor().estimate_job_cost({"page_count": 10})
+    
+    assert estimate["llm_calls"] == 10
+
+def test_batching_shortens_processing_estimate(monkeypatch):
+    monkeypatch.setenv("RENDER_CACHE_MAX_MB", "0")
+    monkeypatch.setenv("RENDER_FRAME_CACHE_MAX_MB", "0")
+    monkeypatch.delenv("SCRIPT_STREAMING", raising=False)
+    monkeypatch.setenv("SCRIPT_BATCH_SIZE", "1")
+    single = PDFProcessor().estimate_job_cost({"page_count": 10})
+    monkeypatch.setenv("SCRIPT_BATCH_SIZE", "3")
+    batched = PDFProcessor().estimate_job_cost({"page_count": 10})
+    
+    assert batched["processing_seconds"] < single["processing_seconds"]
+    assert batched["tts_audio_seconds"] == single["tts_audio_seconds"]
@@ -0,0 +1,141 @@
+"""
+LLM 속도 제한 테스트 (토큰 버킷 보충, Retry-After, 선착순 대기)
+"""
+
+import time
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core import rate_limiter
+from core.rate_limiter import LLMRateLimiter, TokenBucket
+from core.script_generator import ScriptGenerator
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+def test_bucket_refills_at_rate_and_caps_at_capacity(clock):
+    bucket = TokenBucket(capacity=60, refill_rate=1.0)
+    bucket.tokens = 0
+    
+    clock.now += 10
+    bucket.refill()
+    assert bucket.tokens == pytest.approx(10)
+    
+    clock.now += 1000
+    bucket.refill()
+    assert bucket.tokens == 60
+
+def test_bucket_wait_time(clock):
+    bucket = TokenBucket(capacity=100, refill_rate=2.0)
+    bucket.tokens = 10
+    
+    assert bucket.wait_time(10) == 0.0
+    assert bucket.wait_time(30) == pytest.approx(10.0)
+
+def test_record_usage_refunds_and_charges(clock):
+    limiter = LLMRateLimiter(requests_per_minute=0, tokens_per_minute=6000)
+    limiter.token_bucket.tokens = 1000
+    
+    limiter.record_usage(estimated_tokens=500, actual_tokens=200)
+    assert limiter.token_bucket.tokens == pytest.approx(1300)
+    
+    limiter.record_usage(estimated_tokens=100, actual_tokens=400)
+    assert limiter.token_bucket.tokens == pytest.approx(1000)
+    
+    limiter.record_usage(estimated_tokens=100, actual_tokens=None)
+    assert limiter.token_bucket.tokens == pytest.approx(1000)
+
+def test_acquire_is_immediate_with_tokens():
+    limiter = LLMRateLimiter(requests_per_minute=60, tokens_per_minute=6000)
+    
+    waited = asyncio.run(limiter.acquire(100))
+    
+    assert waited < 0.05
+    assert limiter.request_bucket.tokens == pytest.approx(59, abs=0.1)
+    assert limiter.token_bucket.tokens == pytest.approx(5900, abs=1)
+
+def test_oversized_request_is_capped_at_bucket_capacity():
+    limiter = LLMRateLimiter(requests_per_minute=0, tokens_per_minute=600)
+    
+    waited = asyncio.run(limiter.acquire(10_000))
+    
+    assert waited < 0.05
+    assert limiter.token_bucket.tokens == pytest.approx(0, abs=1)
+
+def test_retry_after_blocks_all_requests():
+    limiter = LLMRateLimiter(requests_per_minute=6000, tokens_per_minute=0)
+    
+    async def run():
+        limiter.record_throttle(0.3)
+        assert limiter.is_saturated()
+        return await limiter.acquire(1)
+    
+    waited = asyncio.run(run())
+    
+    assert waited >= 0.29
+    assert limiter.throttled == 1
+    assert not limiter.is_saturated()
+
+def test_waiters_are_served_in_arrival_order():
+    # 초당 20건 보충, 버킷을 비운 뒤 세 요청을 차례로 보냄
+    limiter = LLMRateLimiter(requests_per_minute=1200, tokens_per_minute=0)
+    limiter.request_bucket.tokens = 0
+    finished = []
+    
+    async def request(name: str):
+        await limiter.acquire(1)
+        finished.append((name, time.monotonic()))
+    
+    async def run():
+        tasks = []
+        for name in ("a", "b", "c"):
+            tasks.append(asyncio.create_task(request(name)))
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        assert limiter.is_saturated()
+        await asyncio.gather(*tasks)
+    
+    started_at = time.monotonic()
+    asyncio.run(run())
+    
+    assert [name for name, _ in finished] == ["a", "b", "c"]
+    # 요청 하나당 약 0.05초씩 보충을 기다림
+    assert finished[-1][1] - started_at >= 0.14
+    assert limiter.requests == 3
+
+def make_error(headers: dict):
+    return SimpleNamespace(response=SimpleNamespace(headers=headers))
+
+@pytest.fixture
+def generator():
+    # 재시도 대기 계산에 필요한 설정만 가진 객체 (클라이언트 생성 없이)
+    return SimpleNamespace(backoff_base_seconds=1.0, backoff_max_seconds=30.0)
+
+def test_retry_after_header_is_honoured(generator):
+    delay = ScriptGenerator.get_retry_delay(generator, make_error({"retry-after": "4"}), attempt=0)
+    assert 4.0 <= delay <= 4.0 + 0.1 * 4.0 + 0.05
+
+def test_retry_after_ms_takes_precedence(generator):
+    delay = ScriptGenerator.get_retry_delay(generator, make_error({"retry-after-ms": "500", "retry-after": "9"}), attempt=0)
+    assert 0.5 <= delay <= 0.5 + 0.1 * 0.5 + 0.05
+
+def test_retry_after_is_capped(generator):
+    delay = ScriptGenerator.get_retry_delay(generator, make_error({"retry-after": "120"}), attempt=0)
+    assert delay == 30.0
+
+def test_backoff_without_header_is_bounded(generator):
+    for attempt in range(6):
+        delay = ScriptGenerator.get_retry_delay(generator, make_error({"retry-after": "soon"}), attempt=attempt)
+        assert 0.0 <= delay <= min(30.0, 2 ** attempt)
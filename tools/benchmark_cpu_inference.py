@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+VibeVoice CPU 추론 최적화 벤치마크
+상주 워커와 같은 방식으로 모델을 로드해 fp32 기준과 CPU 최적화(int8 동적 양자화, bf16)의
+실시간 배율(RTF = 합성 시간 / 오디오 길이)과 출력 차이(길이 비율, 로그 스펙트럼 거리, 파형 상관계수)를 비교
+
+사용법:
+    python tools/benchmark_cpu_inference.py --speaker voice.wav
+    python tools/benchmark_cpu_inference.py --vibevoice_dir /home/devsy/workspace/VibeVoice \\
+        --speaker voice.wav --optimizations none int8 bf16 --output cpu_bench.json
+    
+    # 스레드 수·컴파일 여부는 상주 워커와 같은 환경변수로 지정
+    VIBEVOICE_CPU_THREADS=8 VIBEVOICE_CPU_COMPILE=true python tools/benchmark_cpu_inference.py --speaker voice.wav
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import numpy as np
+import soundfile as sf
+
+CORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core")
+
+DEFAULT_TEXTS = [
+    "안녕하세요. 오늘 발표에서는 시스템의 전체 구조와 주요 성능 지표를 소개하겠습니다.",
+    "다음 슬라이드에서는 처리량을 높이기 위해 적용한 세 가지 최적화 방법을 설명드리겠습니다.",
+    "마지막으로 실험 결과를 정리하고, 앞으로의 개선 계획을 말씀드리겠습니다. 감사합니다."
+]
+
+def log_spectrum(samples: np.ndarray, frame: int = 1024, hop: int = 256) -> np.ndarray:
+    """프레임별 로그 크기 스펙트럼 (dB)"""
+    if len(samples) < frame:
+        samples = np.pad(samples, (0, frame - len(samples)))
+    count = 1 + (len(samples) - frame) // hop
+    frames = np.lib.stride_tricks.as_strided(
+        samples, shape=(count, frame), strides=(samples.strides[0] * hop, samples.strides[0])
+    )
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(frame).astype(np.float32), axis=1))
+    return 20 * np.log10(spectrum + 1e-5)
+
+def compare(baseline: np.ndarray, candidate: np.ndarray) -> dict:
+    """기준 출력 대비 차이 (앞부분을 같은 길이로 맞춰 비교)"""
+    length = min(len(baseline), len(candidate))
+    base, cand = baseline[:length].astype(np.float32), candidate[:length].astype(np.float32)
+    base_spec, cand_spec = log_spectrum(base), log_spectrum(cand)
+    correlation = float(np.corrcoef(base, cand)[0, 1]) if length > 1 and base.std() > 0 and cand.std() > 0 else 0.0
+    return {
+        "duration_ratio": round(len(candidate) / len(baseline), 3) if len(baseline) else None,
+        "log_spectral_distance_db": round(float(np.mean(np.abs(base_spec - cand_spec))), 2),
+        "waveform_correlation": round(correlation, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="VibeVoice CPU 추론 최적화 벤치마크")
+    parser.add_argument("--vibevoice_dir", default=os.getenv("VIBEVOICE_DIR", "/home/devsy/workspace/VibeVoice"))
+    parser.add_argument("--model_path", default="vibevoice/VibeVoice-1.5B")
+    parser.add_argument("--speaker", required=True, help="화자 참조 음성 파일")
+    parser.add_argument("--optimizations", nargs="+", default=["none", "int8", "bf16"],
+                        help="비교할 CPU 최적화 방식 (none이 기준, auto/int8/bf16)")
+    parser.add_argument("--texts", type=int, default=len(DEFAULT_TEXTS), help="합성할 예시 문장 수")
+    parser.add_argument("--cfg_scale", type=float, default=1.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+    
+    speaker_path = os.path.abspath(args.speaker)
+    output_path = os.path.abspath(args.output) if args.output else None
+    with open(speaker_path, "rb") as f:
+        speaker_hash = hashlib.sha256(f.read()).hexdigest()
+    
+    # 상주 워커 모듈은 VibeVoice 디렉토리를 작업 디렉토리로 가정
+    os.chdir(args.vibevoice_dir)
+    sys.path.insert(0, CORE_DIR)
+    import torch
+    from vibevoice_worker import ResidentEngine
+    
+    optimizations = ["none"] + [opt for opt in args.optimizations if opt != "none"]
+    texts = (DEFAULT_TEXTS * (args.texts // len(DEFAULT_TEXTS) + 1))[:args.texts]
+    work_dir = tempfile.mkdtemp(prefix="cpu_bench_")
+    # 한 번에 한 모델만 올리고, 방식마다 화자 인코딩을 새로 측정하도록 캐시 디스크 저장은 끔
+    os.environ["VIBEVOICE_MODEL_MEMORY_BUDGET_MB"] = "0"
+    os.environ["SPEAKER_CACHE_DIR"] = ""
+    engine = ResidentEngine()
+    
+    print(f"🏁 CPU 추론 벤치마크: {args.model_path}, 문장 {len(texts)}개, 방식 {optimizations}")
+    results = {}
+    outputs = {}
+    for optimization in optimizations:
+        started_at = time.monotonic()
+        resident = engine.models.load(args.model_path, "cpu", optimization, "benchmark")
+        load_seconds = time.monotonic() - started_at
+        
+        synth_seconds, audio_seconds, clips = 0.0, 0.0, []
+        for n, text in enumerate(texts):
+            clip_path = os.path.join(work_dir, f"{optimization}_{n}.wav")
+            torch.manual_seed(args.seed)
+            started_at = time.monotonic()
+            response = engine.synthesize({
+                "model_path": args.model_path,
+                "device": "cpu",
+                "optimization": optimization,
+                "cfg_scale": args.cfg_scale,
+                "items": [{
+                    "text": text, "speaker_path": speaker_path,
+                    "speaker_hash": speaker_hash, "output_path": clip_path
+                }]
+            })
+            synth_seconds += time.monotonic() - started_at
+            if response["outputs"][0] is None:
+                print(f"⚠️ [{optimization}] {n + 1}번 문장 합성 결과 없음")
+                clips.append(np.zeros(0, dtype=np.float32))
+                continue
+            samples, sample_rate = sf.read(clip_path, dtype="float32")
+            audio_seconds += len(samples) / sample_rate
+            clips.append(samples)
+        
+        outputs[optimization] = clips
+        results[optimization] = {
+            "applied": resident.applied,
+            "load_seconds": round(load_seconds, 2),
+            "model_mb": round(resident.size_bytes / 1024 / 1024, 1),
+            "synth_seconds": round(synth_seconds, 2),
+            "audio_seconds": round(audio_seconds, 2),
+            "rtf": round(synth_seconds / audio_seconds, 3) if audio_seconds else None,
+            "threads": torch.get_num_threads()
+        }
+        print(f"✅ [{optimization}] RTF {results[optimization]['rtf']} ({synth_seconds:.1f}초 / 오디오 {audio_seconds:.1f}초)")
+    
+    # fp32 기준 대비 속도·출력 차이
+    baseline = results["none"]
+    for optimization in optimizations[1:]:
+        result = results[optimization]
+        diffs = [
+            compare(base, cand) for base, cand in zip(outputs["none"], outputs[optimization])
+            if len(base) and len(cand)
+        ]
+        result["speedup"] = round(baseline["rtf"] / result["rtf"], 2) if baseline["rtf"] and result["rtf"] else None
+        result["vs_fp32"] = {
+            key: round(float(np.mean([diff[key] for diff in diffs])), 3) if diffs else None
+            for key in ("duration_ratio", "log_spectral_distance_db", "waveform_correlation")
+        }
+    
+    report = {
+        "model_path": args.model_path,
+        "texts": len(texts),
+        "results": results
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📁 결과 저장: {output_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+스크립트 생성 단계 처리량·재시도 벤치마크
+가짜 발표 자료 여러 개를 동시에 처리하며 ScriptGenerator의 처리량, 지연 시간, 429/재시도 동작을 측정
+
+사용법:
+    python tools/mock_openai_server.py --port 9300 --rate-429 0.05 &
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:9300 python tools/benchmark_script_stage.py --decks 8 --slides 20
+
+    # 배치·스트리밍 등 ScriptGenerator 설정은 평소처럼 환경변수로 지정
+    SCRIPT_BATCH_SIZE=4 AZURE_OPENAI_ENDPOINT=http://127.0.0.1:9300 python tools/benchmark_script_stage.py
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+# 프로젝트 루트를 모듈 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 반복 실행 시 캐시 적중으로 측정이 왜곡되지 않도록 기본적으로 스크립트 캐시 비활성화
+os.environ.setdefault("SCRIPT_CACHE_MAX_ENTRIES", "0")
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "mock")
+
+from core.script_generator import ScriptGenerator
+
+def build_deck(deck_index: int, slide_count: int, image_path: str, vision: bool) -> list:
+    """가짜 슬라이드 목록 (텍스트 레이어 또는 이미지만 있는 슬라이드)"""
+    slides = []
+    for slide_index in range(slide_count):
+        text = (
+            f"발표 {deck_index + 1} - 슬라이드 {slide_index + 1}\n"
+            f"주요 내용: 성능 측정을 위한 예시 문장입니다. 처리량과 지연 시간, 재시도 동작을 확인합니다. ({deck_index}-{slide_index})"
+        )
+        layout = None if vision else {
+            "text": text,
+            "text_length": len(text),
+            "image_ratio": 0.0,
+            "blocks": [
+                {"type": "text", "text": line, "font_size": 32 if line_index == 0 else 18}
+                for line_index, line in enumerate(text.split("\n"))
+            ]
+        }
+        slides.append({"slide_num": slide_index + 1, "image_path": image_path, "layout": layout})
+    return slides
+
+async def run_deck(generator: ScriptGenerator, task_id: str, slides: list, language: str) -> dict:
+    """발표 1건의 스크립트 단계를 main.py와 같은 방식(스트리밍/배치/슬라이드별)으로 실행"""
+    started_at = time.monotonic()
+    scripts = []
+    previous_script = ""
+    total = len(slides)
+    
+    i = 0
+    while i < total:
+        slide = slides[i]
+        if generator.streaming:
+            sentences = [
+                sentence async for sentence in generator.stream_script_sentences(
+                    slide["slide_num"], slide["image_path"], i == 0, i == total - 1, previous_script, language,
+                    slide["layout"], task_id=task_id
+                )
+            ]
+            scripts.append(" ".join(sentences))
+        elif generator.batch_size > 1:
+            batch = slides[i:i + generator.batch_size]
+            scripts.extend(await generator.generate_scripts_batch(
+                batch, total, previous_script, language, task_id=task_id
+            ))
+        else:
+            scripts.append(await generator.generate_script_for_slide(
+                slide["slide_num"], slide["image_path"], i == 0, i == total - 1, previous_script, language,
+                slide["layout"], task_id=task_id
+            ))
+        previous_script = scripts[-1]
+        i = len(scripts)
+    
+    fallbacks = sum(
+        1 for index, script in enumerate(scripts)
+        if script == generator.get_fallback_script(index + 1, index == 0, index == total - 1, language)
+    )
+    return {"seconds": time.monotonic() - started_at, "slides": total, "fallbacks": fallbacks}
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(p * len(values)))], 3) if values else 0.0
+
+async def fetch_mock_stats(generator: ScriptGenerator) -> dict:
+    """목 서버의 /stats (목 서버가 아니면 빈 dict)"""
+    try:
+        import httpx
+        base_url = generator.base_url.rstrip("/")
+        if base_url.endswith("/v1"):
+            base_url = base_url[:-3]
+        base_url = base_url or os.getenv("AZURE_OPENAI_ENDPOINT", "").rstrip("/")
+        async with httpx.AsyncClient(timeout=5) as client:
+            response = await client.get(f"{base_url}/stats")
+            return response.json() if response.status_code == 200 else {}
+    except Exception:
+        return {}
+
+async def main():
+    parser = argparse.ArgumentParser(description="스크립트 생성 단계 벤치마크")
+    parser.add_argument("--decks", type=int, default=4, help="동시에 처리할 발표 수")
+    parser.add_argument("--slides", type=int, default=10, help="발표당 슬라이드 수")
+    parser.add_argument("--language", choices=["korean", "english"], default="korean")
+    parser.add_argument("--vision", action="store_true", help="텍스트 레이어 없이 이미지로 요청")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+    
+    # Vision 모드용 빈 슬라이드 이미지
+    image_path = os.path.join(tempfile.mkdtemp(prefix="bench_"), "slide.jpg")
+    from PIL import Image
+    Image.new("RGB", (1920, 1080), "white").save(image_path, quality=90)
+    
+    generator = ScriptGenerator()
+    print(f"🏁 벤치마크 시작: 발표 {args.decks}개 × 슬라이드 {args.slides}장 "
+          f"(배치 {generator.batch_size}, 스트리밍 {generator.streaming}, {'Vision' if args.vision else '텍스트'})")
+    
+    started_at = time.monotonic()
+    results = await asyncio.gather(*[
+        run_deck(generator, f"bench-{deck_index}", build_deck(deck_index, args.slides, image_path, args.vision), args.language)
+        for deck_index in range(args.decks)
+    ])
+    wall_seconds = time.monotonic() - started_at
+    
+    total_slides = sum(result["slides"] for result in results)
+    deck_seconds = [result["seconds"] for result in results]
+    usage = generator.usage_tracker.get_all_summaries()
+    report = {
+        "decks": args.decks,
+        "slides": total_slides,
+        "wall_seconds": round(wall_seconds, 3),
+        "slides_per_second": round(total_slides / wall_seconds, 3) if wall_seconds else None,
+        "deck_seconds_p50": percentile(deck_seconds, 0.5),
+        "deck_seconds_p95": percentile(deck_seconds, 0.95),
+        "fallback_scripts": sum(result["fallbacks"] for result in results),
+        "llm_calls": sum(summary["calls"] for summary in usage.values()),
+        "llm_failed_calls": sum(summary["failed_calls"] for summary in usage.values()),
+        "llm_retries": sum(summary["retries"] for summary in usage.values()),
+        "prompt_tokens": sum(summary["prompt_tokens"] for summary in usage.values()),
+        "cached_prompt_tokens": sum(summary["cached_prompt_tokens"] for summary in usage.values()),
+        "completion_tokens": sum(summary["completion_tokens"] for summary in usage.values()),
+        "rate_limiter": generator.rate_limiter.get_stats(),
+        "routes": generator.get_status()["routes"],
+        "mock_server": await fetch_mock_stats(generator)
+    }
+    
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📁 결과 저장: {args.output}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
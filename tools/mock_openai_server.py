@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+로컬 OpenAI 호환 채팅 완성 목(mock) 서버
+네트워크나 Azure 할당량 없이 스크립트 단계 처리량·재시도 동작을 측정하기 위한 대체 서버
+
+사용법:
+    python tools/mock_openai_server.py --port 9300 --latency lognormal --latency-median 1.5 --rate-429 0.05
+    
+    # Azure 클라이언트 경로 그대로 사용 (/openai/deployments/{deployment}/chat/completions)
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:9300 python main.py
+    # OpenAI 호환 경로 사용 (/v1/chat/completions)
+    LLM_BASE_URL=http://127.0.0.1:9300/v1 python main.py
+"""
+
+import re
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import hashlib
+from typing import Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Vision 입력 이미지 1장의 토큰 수 (core/script_generator.py와 같은 기준)
+IMAGE_TOKEN_ESTIMATE = 1105
+
+app = FastAPI(title="Mock OpenAI Chat Completions")
+
+# 실행 옵션 (main()에서 명령행 인자로 덮어씀)
+settings = argparse.Namespace(
+    latency="lognormal",      # fixed / uniform / lognormal
+    latency_median=1.5,       # fixed·lognormal 중앙값 (초)
+    latency_min=0.5,          # uniform 최소값 (초)
+    latency_max=4.0,          # uniform 최대값이자 모든 분포의 상한 (초)
+    latency_sigma=0.5,        # lognormal 표준편차 (로그 스케일)
+    first_token_ratio=0.3,    # 스트리밍 시 전체 지연 중 첫 토큰까지의 비율
+    rate_429=0.0,             # 429 응답 비율
+    rate_500=0.0,             # 500 응답 비율
+    retry_after=1.0,          # 429 응답의 Retry-After (초)
+    seed=None
+)
+
+stats = {"requests": 0, "streamed": 0, "throttled_429": 0, "errors_500": 0}
+seen_prefixes = set()  # 프롬프트 캐시 흉내용 (이미 본 시스템 프롬프트)
+
+def sample_latency() -> float:
+    """설정된 분포에서 응답 지연 시간 추출"""
+    if settings.latency == "fixed":
+        latency = settings.latency_median
+    elif settings.latency == "uniform":
+        latency = random.uniform(settings.latency_min, settings.latency_max)
+    else:
+        latency = random.lognormvariate(math.log(settings.latency_median), settings.latency_sigma)
+    return max(0.0, min(latency, settings.latency_max))
+
+def inject_error() -> Optional[JSONResponse]:
+    """설정된 비율에 따라 429/500 오류 응답 생성"""
+    roll = random.random()
+    if roll < settings.rate_429:
+        stats["throttled_429"] += 1
+        return JSONResponse(
+            status_code=429,
+            content={"error": {"code": "429", "message": "Rate limit is exceeded. (mock)"}},
+            headers={"retry-after": str(settings.retry_after)}
+        )
+    if roll < settings.rate_429 + settings.rate_500:
+        stats["errors_500"] += 1
+        return JSONResponse(
+            status_code=500,
+            content={"error": {"code": "500", "message": "Internal server error. (mock)"}}
+        )
+    return None
+
+def iter_text_parts(messages: list):
+    """메시지의 (역할, 텍스트 조각) 목록, 이미지 조각은 None"""
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, str):
+            yield message.get("role"), content
+            continue
+        for part in content:
+            yield message.get("role"), part.get("text") if part.get("type") == "text" else None
+
+def build_script(slide_num: Optional[int], english: bool) -> str:
+    """두 문장짜리 발표 스크립트"""
+    if english:
+        label = f"slide {slide_num}" if slide_num else "this slide"
+        return f"Next, let's look at {label}, which summarizes the key idea. This point sets up the rest of the talk."
+    label = f"{slide_num}번째 슬라이드" if slide_num else "이 슬라이드"
+    return f"다음으로 {label}의 핵심 내용을 살펴보겠습니다. 이 부분은 이후 내용을 이해하는 데 중요합니다."
+
+def build_content(body: dict) -> str:
+    """요청에 맞는 응답 본문 (배치 요청은 JSON)"""
+    messages = body.get("messages", [])
+    parts = list(iter_text_parts(messages))
+    english = any(role == "system" and text and text.startswith("You are") for role, text in parts)
+    
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        # 배치 요청: 사용자 메시지의 슬라이드 라벨("Slide 3:", "3번째 슬라이드:")에서 번호 추출
+        slide_nums = []
+        for role, text in parts:
+            if role != "user" or not text:
+                continue
+            match = re.match(r"\s*(?:Slide\s+)?(\d+)(?:번째 슬라이드)?[^\n]*:", text)
+            if match and len(text.split("\n", 1)[0]) < 40:
+                slide_nums.append(int(match.group(1)))
+        return json.dumps(
+            {"scripts": [{"slide": num, "script": build_script(num, english)} for num in slide_nums]},
+            ensure_ascii=False
+        )
+    
+    user_text = " ".join(text for role, text in parts if role == "user" and text)
+    match = re.search(r"(?:slide |Slide number: )(\d+)|(\d+)번째 슬라이드", user_text)
+    slide_num = int(match.group(1) or match.group(2)) if match else None
+    return build_script(slide_num, english)
+
+def build_usage(messages: list, content: str) -> dict:
+    """대략적인 토큰 사용량 (이미 본 시스템 프롬프트는 캐시 적중으로 보고)"""
+    characters = 0
+    images = 0
+    system_text = ""
+    for role, text in iter_text_parts(messages):
+        if text is None:
+            images += 1
+            continue
+        characters += len(text)
+        if role == "system":
+            system_text += text
+    prompt_tokens = characters // 2 + images * IMAGE_TOKEN_ESTIMATE
+    completion_tokens = len(content) // 2
+    
+    # 실제 서비스처럼 1024토큰 이상 접두부만 128토큰 단위로 캐시
+    cached_tokens = 0
+    prefix_tokens = len(system_text) // 2
+    prefix_hash = hashlib.sha256(system_text.encode("utf-8")).hexdigest()
+    if prefix_hash in seen_prefixes and prefix_tokens >= 1024:
+        cached_tokens = prefix_tokens // 128 * 128
+    seen_prefixes.add(prefix_hash)
+    
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": cached_tokens}
+    }
+
+async def stream_chunks(completion_id: str, model: str, content: str, latency: float):
+    """SSE 형식 스트리밍 응답 (첫 토큰 지연 후 나머지 시간 동안 조각 전송)"""
+    pieces = [content[i:i + 4] for i in range(0, len(content), 4)] or [""]
+    await asyncio.sleep(latency * settings.first_token_ratio)
+    piece_delay = latency * (1 - settings.first_token_ratio) / len(pieces)
+    
+    for index, piece in enumerate(pieces):
+        if index:
+            await asyncio.sleep(piece_delay)
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+        }
+        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+    
+    final_chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+    }
+    yield f"data: {json.dumps(final_chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+async def handle_chat_completion(body: dict, model: str):
+    """채팅 완성 요청 공통 처리"""
+    stats["requests"] += 1
+    
+    error_response = inject_error()
+    if error_response is not None:
+        return error_response
+    
+    latency = sample_latency()
+    content = build_content(body)
+    completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+    
+    if body.get("stream"):
+        stats["streamed"] += 1
+        return StreamingResponse(
+            stream_chunks(completion_id, model, content, latency),
+            media_type="text/event-stream"
+        )
+    
+    await asyncio.sleep(latency)
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": build_usage(body.get("messages", []), content)
+    }
+
+@app.post("/openai/deployments/{deployment}/chat/completions")
+async def azure_chat_completions(deployment: str, request: Request):
+    """Azure OpenAI 경로"""
+    return await handle_chat_completion(await request.json(), deployment)
+
+@app.post("/v1/chat/completions")
+async def openai_chat_completions(request: Request):
+    """OpenAI 호환 경로"""
+    body = await request.json()
+    return await handle_chat_completion(body, body.get("model", "mock"))
+
+@app.get("/stats")
+async def get_stats():
+    """요청·오류 주입 통계"""
+    return {**stats, "settings": vars(settings)}
+
+@app.post("/stats/reset")
+async def reset_stats():
+    """통계 초기화"""
+    for key in stats:
+        stats[key] = 0
+    seen_prefixes.clear()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 OpenAI 호환 채팅 완성 목 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9300)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default=settings.latency)
+    parser.add_argument("--latency-median", type=float, default=settings.latency_median)
+    parser.add_argument("--latency-min", type=float, default=settings.latency_min)
+    parser.add_argument("--latency-max", type=float, default=settings.latency_max)
+    parser.add_argument("--latency-sigma", type=float, default=settings.latency_sigma)
+    parser.add_argument("--first-token-ratio", type=float, default=settings.first_token_ratio)
+    parser.add_argument("--rate-429", type=float, default=settings.rate_429)
+    parser.add_argument("--rate-500", type=float, default=settings.rate_500)
+    parser.add_argument("--retry-after", type=float, default=settings.retry_after)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    
+    host, port = args.host, args.port
+    del args.host, args.port
+    vars(settings).update(vars(args))
+    if settings.seed is not None:
+        random.seed(settings.seed)
+    
+    import uvicorn
+    print(f"🧪 목 서버 시작: http://{host}:{port} ({settings.latency}, 429 {settings.rate_429:.0%}, 500 {settings.rate_500:.0%})")
+    uvicorn.run(app, host=host, port=port, log_level="warning")
+
+if __name__ == "__main__":
+    main()